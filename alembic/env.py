@@ -0,0 +1,57 @@
+"""
+Migration environment. Run ``alembic upgrade head`` from the project root,
+or let the app do it on startup (app.core.database.init_db).
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.migrations import include_name
+from app.models import booking, device, idempotency_key, user  # noqa: F401 (registers the tables)
+
+config = context.config
+# The app passes its own connection and has its own logging
+connection = config.attributes.get("connection")
+if connection is None and config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # ALTER TABLE support in SQLite is limited; batch ops rebuild the table
+        render_as_batch=True,
+        # Revisions with autocommit blocks commit as they go anyway
+        transaction_per_migration=True,
+        **kwargs
+    )
+
+def run_migrations_offline() -> None:
+    """
+    Emit the migrations as SQL instead of running them
+    """
+    configure(url=settings.DATABASE_URL, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    if connection is not None:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.connect() as conn:
+        configure(connection=conn)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,51 @@
+"""Index bookings by user and time slot; drop the redundant index on bookings.id
+
+Listing a user's bookings and owner-filtered search scanned the whole
+table. ``id`` is the rowid, so ix_bookings_id only cost writes. Large
+tables are rebuilt with copy-and-swap so writers aren't locked out while
+the index is built.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+from app.core.migrations import copy_and_swap, row_count
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    # Databases created by create_all since this revision are stamped as 0001
+    # but already have the new schema
+    if conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ix_bookings_user_id_time_slot'"
+    ).scalar():
+        return
+    if row_count(conn, "bookings") < settings.MIGRATION_ONLINE_MIN_ROWS:
+        op.drop_index("ix_bookings_id", "bookings")
+        op.create_index("ix_bookings_user_id_time_slot", "bookings", ["user_id", "time_slot"])
+        return
+    with op.get_context().autocommit_block():
+        copy_and_swap(
+            conn, "bookings",
+            indexes=["CREATE INDEX ix_bookings_user_id_time_slot ON {table} (user_id, time_slot)"]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_bookings_user_id_time_slot", "bookings")
+    op.create_index("ix_bookings_id", "bookings", ["id"])
@@ -0,0 +1,36 @@
+"""Add bookings.version for ETags and If-Match conditional writes
+
+The column has a constant default, which SQLite keeps in the table
+definition: ADD COLUMN doesn't rewrite existing rows (they read as
+version 1), so there is nothing to backfill and the write lock is only
+held for the schema change, however large the table.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases stamped as 0001 may have been created with the column already
+    if "version" in {column["name"] for column in sa.inspect(op.get_bind()).get_columns("bookings")}:
+        return
+    op.add_column("bookings", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("bookings", "version")
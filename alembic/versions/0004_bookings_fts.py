@@ -0,0 +1,70 @@
+"""Full-text search over booking descriptions and addresses (SQLite FTS5)
+
+Creates the external-content bookings_fts table with the triggers that
+keep it in sync, then indexes the existing bookings with a rebuild.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of BOOKINGS_FTS_DDL (app/models/booking.py) at this revision
+BOOKINGS_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS bookings_fts USING fts5(
+        description, address, content='bookings', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookings_fts_insert AFTER INSERT ON bookings BEGIN
+        INSERT INTO bookings_fts(rowid, description, address)
+        VALUES (new.id, new.description, new.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookings_fts_delete AFTER DELETE ON bookings BEGIN
+        INSERT INTO bookings_fts(bookings_fts, rowid, description, address)
+        VALUES ('delete', old.id, old.description, old.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookings_fts_update AFTER UPDATE OF description, address ON bookings BEGIN
+        INSERT INTO bookings_fts(bookings_fts, rowid, description, address)
+        VALUES ('delete', old.id, old.description, old.address);
+        INSERT INTO bookings_fts(rowid, description, address)
+        VALUES (new.id, new.description, new.address);
+    END
+    """,
+    # Index rows that existed before the table was created
+    "INSERT INTO bookings_fts(bookings_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases stamped as 0001 may have been created with the index already
+    if op.get_bind().exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bookings_fts'"
+    ).scalar():
+        return
+    for statement in BOOKINGS_FTS_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for trigger in ("insert", "delete", "update"):
+        op.execute(f"DROP TRIGGER IF EXISTS bookings_fts_{trigger}")
+    op.execute("DROP TABLE IF EXISTS bookings_fts")
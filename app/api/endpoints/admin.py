@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+from typing import Dict, List, Literal, Optional
+from app.core.auth import get_current_admin_user
+from app.core.backup import BackupInProgress, get_backup_manager
+from app.core.config import settings
+from app.core.memory import TracemallocNotRunning, cache_sizes, get_memory_diagnostics, identity_map_sizes
+from app.core.profiler import get_profile_store
+from app.core.serialization import FastJSONResponse
+from app.core.tracing import get_trace_exporter
+
+router = APIRouter(dependencies=[Depends(get_current_admin_user)])
+
+@router.get("/profiles", response_model=List[Dict])
+def list_profiles(request: Request):
+    """
+    Stored request profiles, newest first (admin only)
+    """
+    return FastJSONResponse(get_profile_store(request.app.state.settings).list())
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str, request: Request):
+    """
+    One profile as collapsed stacks, for flamegraph.pl or speedscope (admin only)
+    """
+    content = get_profile_store(request.app.state.settings).read(profile_id)
+    if content is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return PlainTextResponse(content)
+
+@router.get("/traces")
+def list_traces(format: Literal["otlp", "chrome"] = Query("otlp")):
+    """
+    Recently sampled request traces as OTLP/JSON, or as Chrome trace events
+    for Perfetto and chrome://tracing (admin only)
+    """
+    return FastJSONResponse(get_trace_exporter().render(format))
+
+@router.get("/memory")
+def memory_status():
+    """
+    tracemalloc state, session identity-map sizes and in-process cache sizes (admin only)
+    """
+    return FastJSONResponse({
+        **get_memory_diagnostics().status(),
+        "identity_maps": identity_map_sizes(),
+        "caches": cache_sizes(),
+    })
+
+@router.post("/memory/tracemalloc/start")
+def start_tracemalloc(frames: Optional[int] = Query(None, ge=1, le=100)):
+    """
+    Start tracing allocations; more frames cost more memory and time (admin only)
+    """
+    diagnostics = get_memory_diagnostics()
+    diagnostics.start(frames or settings.MEMORY_TRACEMALLOC_FRAMES)
+    return FastJSONResponse(diagnostics.status())
+
+@router.post("/memory/tracemalloc/stop")
+def stop_tracemalloc():
+    """
+    Stop tracing allocations; snapshots already taken are kept (admin only)
+    """
+    diagnostics = get_memory_diagnostics()
+    diagnostics.stop()
+    return FastJSONResponse(diagnostics.status())
+
+@router.post("/memory/snapshots", status_code=status.HTTP_201_CREATED)
+def take_snapshot(
+    group_by: Literal["lineno", "filename"] = Query("lineno"),
+    limit: int = Query(20, ge=1, le=500)
+):
+    """
+    Snapshot traced allocations and return the largest (admin only)
+    """
+    try:
+        snapshot = get_memory_diagnostics().snapshot(group_by, limit)
+    except TracemallocNotRunning as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return FastJSONResponse(snapshot, status_code=status.HTTP_201_CREATED)
+
+@router.get("/memory/snapshots/{old_id}/diff/{new_id}")
+def diff_snapshots(
+    old_id: int,
+    new_id: int,
+    group_by: Literal["lineno", "filename"] = Query("lineno"),
+    limit: int = Query(20, ge=1, le=500)
+):
+    """
+    Allocation growth between two snapshots by file and line, largest first (admin only)
+    """
+    diff = get_memory_diagnostics().diff(old_id, new_id, group_by, limit)
+    if diff is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found")
+    return FastJSONResponse(diff)
+
+@router.get("/backups")
+def list_backups():
+    """
+    Completed database backups, newest first, and the last backup's report (admin only)
+    """
+    manager = get_backup_manager()
+    return FastJSONResponse({"running": manager.running, "last": manager.last, "backups": manager.list()})
+
+@router.post("/backups", status_code=status.HTTP_202_ACCEPTED)
+def start_backup(
+    method: Literal["backup", "vacuum"] = Query("backup"),
+    compress: bool = Query(True)
+):
+    """
+    Start an online backup (stepped backup API, or VACUUM INTO) in the
+    background; poll GET /backups for the result (admin only)
+    """
+    try:
+        get_backup_manager().start(method, compress)
+    except BackupInProgress as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return FastJSONResponse({"status": "started", "method": method}, status_code=status.HTTP_202_ACCEPTED)
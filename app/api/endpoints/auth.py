@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
+from app.core.bulkhead import bulkhead
 from app.core.database import get_db
 from app.services.auth_service import AuthService
 from app.schemas.auth import LoginRequest, Token
@@ -7,6 +8,7 @@ from app.schemas.auth import LoginRequest, Token
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
+@bulkhead("auth")
 def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """
     Login endpoint that authenticates users and returns a JWT token
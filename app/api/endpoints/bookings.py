@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import FrozenSet, List, Literal, Optional
+from app.core.bulkhead import bulkhead
 from app.core.database import get_db
-from app.core.auth import get_current_user
-from app.schemas.booking import BookingCreate, BookingResponse, BookingUpdate
+from app.core.auth import get_current_user, is_admin
+from app.core.etags import booking_etag, booking_list_etag, etag_matches, parse_if_match
+from app.core.exceptions import PreconditionFailedError
+from app.core.serialization import FastJSONResponse
+from app.schemas.booking import BookingBatchCreate, BookingCreate, BookingResponse, BookingExpandedResponse, BookingSearchResult, BookingUpdate
 from app.services.booking_service import BookingService
+from app.services.idempotency_service import IdempotencyService, request_fingerprint
 from app.models.user import User
 
 router = APIRouter()
 
 @router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
+@bulkhead("db_write")
 def create_booking(
     booking: BookingCreate,
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -26,22 +33,85 @@ def create_booking(
     - Prevent double booking for the same time slot
     - Validate that the time slot is not in the past
     - Associate the booking with the current user
+
+    Retries carrying the same Idempotency-Key get the first attempt's response.
     """
-    try:
-        booking_service = BookingService(db)
-        return booking_service.create_booking(booking, current_user.id)
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    def handler():
+        try:
+            booking_service = BookingService(db)
+            return booking_service.create_booking(booking, current_user.id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if idempotency_key is None:
+        return _created(handler())
+    return _created(IdempotencyService(db).execute(
+        current_user.id,
+        idempotency_key,
+        request_fingerprint("create_booking", booking),
+        handler,
+        status_code=status.HTTP_201_CREATED
+    ))
+
+@router.post("/batch", response_model=List[BookingResponse], status_code=status.HTTP_201_CREATED)
+@bulkhead("db_write")
+def create_bookings(
+    batch: BookingBatchCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create several bookings at once. Either all bookings are created or none.
+
+    Retries carrying the same Idempotency-Key get the first attempt's response.
+    """
+    def handler():
+        try:
+            booking_service = BookingService(db)
+            return booking_service.create_bookings(batch.bookings, current_user.id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if idempotency_key is None:
+        return _created(handler())
+    return _created(IdempotencyService(db).execute(
+        current_user.id,
+        idempotency_key,
+        request_fingerprint("create_bookings", batch),
+        handler,
+        status_code=status.HTTP_201_CREATED
+    ))
+
+@router.get("/search", response_model=List[BookingSearchResult])
+@bulkhead("db_read")
+def search_bookings(
+    q: str = Query(..., min_length=1, description="Words to find in the description or address"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full-text search over booking descriptions and addresses, best match first.
+    Users only see their own bookings; admins search all bookings.
+    """
+    booking_service = BookingService(db)
+    owner_id = None if is_admin(current_user) else current_user.id
+    return FastJSONResponse(booking_service.search_bookings(q, owner_id, limit, offset))
 
 @router.get("/{booking_id}", response_model=BookingResponse)
+@bulkhead("db_read")
 def get_booking(
     booking_id: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get details of a specific booking by ID.
     Only the user who created the booking can view its details.
+    Returns 304 when If-None-Match matches the booking's current ETag.
     """
     booking_service = BookingService(db)
     booking = booking_service.get_booking(booking_id)
@@ -49,62 +119,106 @@ def get_booking(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
     if booking.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this booking")
-    return booking
+    return _conditional_response(booking, booking_etag(booking), if_none_match)
 
-@router.get("/user/me", response_model=List[BookingResponse])
+@router.get("/user/me", response_model=List[BookingExpandedResponse])
+@bulkhead("db_read")
 def get_user_bookings(
+    expand: List[Literal["device", "user"]] = Query([]),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all bookings for the current user
+    Get all bookings for the current user.
+    Use ?expand=device (and ?expand=user for admins) to embed related objects.
     """
+    expansions = _expansions(expand, current_user)
     booking_service = BookingService(db)
-    return booking_service.get_user_bookings(current_user.id)
+    bookings = booking_service.get_user_bookings(current_user.id, expansions)
+    return _conditional_response(bookings, booking_list_etag(bookings, expansions), if_none_match)
 
-@router.get("/device/{device_id}", response_model=List[BookingResponse])
+@router.get("/device/{device_id}", response_model=List[BookingExpandedResponse])
+@bulkhead("db_read")
 def get_device_bookings(
     device_id: int,
+    expand: List[Literal["device", "user"]] = Query([]),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all bookings for a specific device
+    Get all bookings for a specific device.
+    Use ?expand=device (and ?expand=user for admins) to embed related objects.
     """
+    expansions = _expansions(expand, current_user)
     booking_service = BookingService(db)
-    return booking_service.get_device_bookings(device_id)
+    bookings = booking_service.get_device_bookings(device_id, expansions)
+    return _conditional_response(bookings, booking_list_etag(bookings, expansions), if_none_match)
 
 @router.patch("/{booking_id}", response_model=BookingResponse)
+@bulkhead("db_write")
 def update_booking(
     booking_id: int,
     booking_update: BookingUpdate,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Update a booking
+    Update a booking.
+    With If-Match, the update only applies if the booking is still at the
+    given ETag's version; otherwise 412 Precondition Failed is returned.
     """
     try:
         booking_service = BookingService(db)
-        updated_booking = booking_service.update_booking(booking_id, booking_update, current_user.id)
+        updated_booking = booking_service.update_booking(
+            booking_id, booking_update, current_user.id, parse_if_match(if_match, booking_id)
+        )
         if not updated_booking:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
-        return updated_booking
+        return FastJSONResponse(updated_booking, headers={"ETag": booking_etag(updated_booking)})
+    except PreconditionFailedError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
+@bulkhead("db_write")
 def delete_booking(
     booking_id: int,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Delete a booking
+    Delete a booking.
+    With If-Match, the delete only applies if the booking is still at the
+    given ETag's version; otherwise 412 Precondition Failed is returned.
     """
     try:
         booking_service = BookingService(db)
-        if not booking_service.delete_booking(booking_id, current_user.id):
+        if not booking_service.delete_booking(booking_id, current_user.id, parse_if_match(if_match, booking_id)):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
+    except PreconditionFailedError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) 
+
+def _conditional_response(body, etag: str, if_none_match: Optional[str]) -> Response:
+    # Skip serialising the body when the client already has this representation
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return FastJSONResponse(body, headers={"ETag": etag})
+
+def _expansions(expand: List[str], current_user: User) -> FrozenSet[str]:
+    expansions = frozenset(expand)
+    if "user" in expansions and not is_admin(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can expand users")
+    return expansions
+
+def _created(result) -> Response:
+    # Idempotent replays come back as ready-made responses
+    if isinstance(result, Response):
+        return result
+    return FastJSONResponse(result, status_code=status.HTTP_201_CREATED)
\ No newline at end of file
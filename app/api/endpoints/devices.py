@@ -1,24 +1,97 @@
-from fastapi import APIRouter, Depends, status
+import io
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 from app.services.device_service import DeviceService
-from app.schemas.device import DeviceCreate, DeviceResponse
+from app.services.device_import_service import DeviceImportService, SUPPORTED_FORMATS
+from app.schemas.device import DeviceCreate, DeviceImportResult, DeviceResponse
+from app.core.bulkhead import bulkhead
 from app.core.database import get_db
-from typing import List
+from app.core.auth import get_current_admin_user
+from app.core.serialization import FastJSONResponse
+from typing import List, Optional
 
 router = APIRouter()
 
+# Page size when only a cursor is given, and for autocomplete
+DEFAULT_PAGE_SIZE = 100
+
 @router.get("/", response_model=List[DeviceResponse])
-def list_devices(db: Session = Depends(get_db)):
+@bulkhead("db_read")
+def list_devices(
+    q: Optional[str] = Query(
+        None, min_length=1, pattern=r"\S", description="Autocomplete: match a word prefix in the name"
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description=f"Page size (default {DEFAULT_PAGE_SIZE})"),
+    cursor: Optional[int] = Query(None, ge=0, description="X-Next-Cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
     """
-    List all devices
+    List devices ordered by id. Without limit or cursor every device is
+    returned; with either, one page at a time, and the cursor for the next
+    page is returned in the X-Next-Cursor header.
+    With q, return up to ``limit`` devices matching the name prefix instead.
     """
     device_service = DeviceService(db)
-    return device_service.get_all_devices()
+    if q is not None:
+        return FastJSONResponse(device_service.search_devices(q, limit or DEFAULT_PAGE_SIZE))
+    if limit is None and cursor is None:
+        return FastJSONResponse(device_service.get_all_devices())
+
+    devices, next_cursor = device_service.list_devices(limit or DEFAULT_PAGE_SIZE, cursor)
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return FastJSONResponse(devices, headers=headers)
 
 @router.post("/", response_model=DeviceResponse, status_code=status.HTTP_201_CREATED)
+@bulkhead("db_write")
 def create_device(device: DeviceCreate, db: Session = Depends(get_db)):
     """
     Create a new device
     """
     device_service = DeviceService(db)
-    return device_service.create_device(device) 
\ No newline at end of file
+    return FastJSONResponse(device_service.create_device(device), status_code=status.HTTP_201_CREATED) 
+
+@router.post("/bulk", response_model=DeviceImportResult)
+@bulkhead("db_write")
+def import_devices(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$", description="Defaults to the file extension"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Import devices from a CSV (``name`` and optional ``id`` columns) or JSONL
+    upload (admin only). The file is parsed as a stream and written in batches;
+    rows with an id update the existing device.
+    """
+    if format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        if extension not in SUPPORTED_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot infer the format from the file name; pass format=csv or format=jsonl"
+            )
+        format = extension
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = DeviceImportService(db).import_devices(stream, format, batch_size)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded")
+    finally:
+        stream.detach()
+    return FastJSONResponse(result)
+
+@router.delete("/{device_id}", status_code=status.HTTP_204_NO_CONTENT)
+@bulkhead("db_write")
+def delete_device(
+    device_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Delete a device and all of its bookings (admin only)
+    """
+    device_service = DeviceService(db)
+    if not device_service.delete_device(device_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Device not found")
\ No newline at end of file
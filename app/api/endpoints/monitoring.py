@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import render
+from app.core.serialization import FastJSONResponse
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Metrics in the Prometheus text format
+    """
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/health/live")
+async def live():
+    """
+    Liveness: the process is serving requests
+    """
+    return FastJSONResponse({"status": "alive"})
+
+@router.get("/health/ready")
+def ready(request: Request):
+    """
+    Readiness from the cached database check; cheap enough to probe often
+    """
+    health = request.app.state.health
+    if health.status():
+        return FastJSONResponse({"status": "ready"})
+    return FastJSONResponse(
+        {"status": "unavailable", "error": health.error},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
@@ -2,14 +2,31 @@ from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 from app.services.user_service import UserService
 from app.schemas.user import UserCreate, UserResponse
+from app.core.bulkhead import bulkhead
 from app.core.database import get_db
+from app.core.auth import get_current_user
+from app.models.user import User
+from app.core.serialization import FastJSONResponse
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@bulkhead("auth")
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user
     """
     user_service = UserService(db)
-    return user_service.register_user(user) 
\ No newline at end of file
+    return FastJSONResponse(user_service.register_user(user), status_code=status.HTTP_201_CREATED) 
+
+@router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
+@bulkhead("db_write")
+def delete_current_user(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete the current user's account and all of their bookings
+    """
+    user_service = UserService(db)
+    user_service.delete_user(current_user.id)
\ No newline at end of file
@@ -0,0 +1,186 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+import anyio
+from app.core.config import Settings, settings
+from app.core.serialization import FastJSONResponse
+
+EXEMPT = "exempt"
+# Weight of the newest request in the service-time average
+_SMOOTHING = 0.2
+
+class AdmissionClass:
+    """
+    Concurrency limit for one class of routes, with a bounded FIFO queue.
+
+    A request is shed instead of queued when the queue is full, or when the
+    wait it can expect (its place in the queue times the average service
+    time, spread over ``limit`` slots) exceeds its budget; a queued request
+    is shed once its budget runs out. A finishing request hands its slot
+    straight to the next one in the queue.
+
+    Only touched from the event loop, so it needs no lock.
+    """
+    def __init__(self, name: str, limit: int, queue: int):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.in_flight = 0
+        self.service_time = 0.0
+        self._waiters: Deque[anyio.Event] = deque()
+        # Counters, exported as metrics
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "deadline": 0, "timeout": 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self) -> float:
+        if self.in_flight < self.limit and not self._waiters:
+            return 0.0
+        return (len(self._waiters) + 1) * self.service_time / max(self.limit, 1)
+
+    async def acquire(self, budget: float) -> Optional[str]:
+        """
+        Wait for a slot; the reason the request was shed, or None once admitted
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.queue:
+            return self._shed("queue_full")
+        if self.expected_wait() > budget:
+            return self._shed("deadline")
+
+        event = anyio.Event()
+        self._waiters.append(event)
+        try:
+            with anyio.move_on_after(budget):
+                await event.wait()
+        except BaseException:
+            # Client gone: give back a slot handed over meanwhile
+            if event.is_set():
+                self.release()
+            else:
+                self._waiters.remove(event)
+            raise
+        if event.is_set():
+            self.admitted += 1
+            return None
+        self._waiters.remove(event)
+        return self._shed("timeout")
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        if service_time is not None:
+            self.service_time += _SMOOTHING * (service_time - self.service_time)
+        if self._waiters:
+            # The slot passes to the next request; in_flight stays the same
+            self._waiters.popleft().set()
+        else:
+            self.in_flight -= 1
+
+    def _shed(self, reason: str) -> str:
+        self.shed[reason] += 1
+        return reason
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "service_time": self.service_time,
+            "admitted": self.admitted,
+            **{f"shed_{reason}": count for reason, count in self.shed.items()},
+        }
+
+def classify(method: str, path: str, app_settings: Settings = settings) -> str:
+    """
+    Admission class of a request: the longest matching ADMISSION_ROUTES
+    prefix, else ``read`` for safe methods and ``write`` for the rest
+    """
+    best, best_class = "", None
+    for template, name in app_settings.ADMISSION_ROUTES.items():
+        prefix = template.replace("{API_V1_STR}", app_settings.API_V1_STR)
+        if path.startswith(prefix) and len(prefix) > len(best):
+            best, best_class = prefix, name
+    if best_class is not None:
+        return best_class
+    return "read" if method in ("GET", "HEAD", "OPTIONS") else "write"
+
+_classes: Optional[Dict[str, AdmissionClass]] = None
+_classes_lock = threading.Lock()
+
+def get_admission_classes() -> Dict[str, AdmissionClass]:
+    global _classes
+    if _classes is None:
+        with _classes_lock:
+            if _classes is None:
+                _classes = {
+                    name: AdmissionClass(name, int(config["limit"]), int(config["queue"]))
+                    for name, config in settings.ADMISSION_CLASSES.items()
+                }
+    return _classes
+
+def reset_admission_classes() -> None:
+    global _classes
+    with _classes_lock:
+        _classes = None
+
+def admission_stats() -> Dict[str, Dict[str, float]]:
+    return {name: admission_class.stats() for name, admission_class in (_classes or {}).items()}
+
+def _budget(scope, app_settings: Settings) -> float:
+    # How long the client is prepared to wait, from ADMISSION_BUDGET_HEADER (seconds)
+    header = app_settings.ADMISSION_BUDGET_HEADER.lower().encode()
+    for name, value in scope["headers"]:
+        if name == header:
+            try:
+                budget = float(value)
+            except ValueError:
+                break
+            if math.isfinite(budget) and budget >= 0:
+                return budget
+            break
+    return app_settings.ADMISSION_DEFAULT_BUDGET_SECONDS
+
+class AdmissionMiddleware:
+    """
+    Admission control: cap concurrent requests per class of routes (see
+    ADMISSION_CLASSES and ADMISSION_ROUTES) and shed what can't be served
+    in time with a fast 503 and a Retry-After, rather than letting every
+    request queue in the threadpool until clients give up.
+    """
+    def __init__(self, app, app_settings: Settings = settings):
+        self.app = app
+        self.settings = app_settings
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.settings.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        name = classify(scope["method"], scope["path"], self.settings)
+        admission_class = get_admission_classes().get(name) if name != EXEMPT else None
+        if admission_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await admission_class.acquire(_budget(scope, self.settings))
+        if reason is not None:
+            retry_after = max(1, math.ceil(admission_class.expected_wait()))
+            response = FastJSONResponse(
+                {"detail": "Server is overloaded, retry later", "reason": reason},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_class.release(time.perf_counter() - started)
@@ -35,4 +35,15 @@ async def get_current_user(
     user = user_service.get_user_by_email(token_data.email)
     if user is None:
         raise credentials_exception
-    return user 
\ No newline at end of file
+    return user 
+
+def is_admin(user) -> bool:
+    return user.email in settings.ADMIN_EMAILS
+
+async def get_current_admin_user(current_user = Depends(get_current_user)):
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
\ No newline at end of file
@@ -0,0 +1,279 @@
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.core.metrics import backup_duration, backups
+
+try:
+    import fcntl
+except ImportError:  # Windows: backups are only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("backup", "vacuum")
+
+class BackupInProgress(Exception):
+    """Raised when a backup is requested while another one is running."""
+
+class _TooManyRestarts(Exception):
+    pass
+
+def database_path(database_url: str) -> str:
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise ValueError(f"Backups need an SQLite database file, not {database_url}")
+    return url.database
+
+class BackupManager:
+    """
+    Backs up a live SQLite database into ``directory`` without stopping the app.
+
+    ``backup`` uses the online backup API, copying ``pages_per_step`` pages
+    at a time and sleeping ``step_sleep`` seconds between steps, so writers
+    get the lock between steps. A write from another connection restarts
+    the copy; after ``max_restarts`` restarts the rest is copied in a single
+    step, which blocks writers for its length unless the database is in WAL
+    mode. ``vacuum`` writes a compacted copy with VACUUM INTO in one read
+    transaction (again only non-blocking in WAL mode).
+
+    Only the newest ``retention`` backups are kept. A lock file serializes
+    backups across worker processes.
+    """
+    def __init__(
+        self,
+        database: str,
+        directory: str,
+        retention: int,
+        pages_per_step: int,
+        step_sleep: float,
+        max_restarts: int,
+    ):
+        self.database = database
+        self.directory = directory
+        self.retention = retention
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.max_restarts = max_restarts
+        self.last: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def backup(self, method: str = "backup", compress: bool = True) -> Dict:
+        if method not in METHODS:
+            raise ValueError(f"Unknown backup method {method!r}")
+        if not self._lock.acquire(blocking=False):
+            raise BackupInProgress("A backup is already running")
+        try:
+            return self._backup_locked(method, compress)
+        finally:
+            self._lock.release()
+
+    def _backup_locked(self, method: str, compress: bool) -> Dict:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise BackupInProgress("A backup is already running in another process")
+            with backup_duration.time(method):
+                try:
+                    result = self._run(method, compress)
+                except Exception:
+                    backups.labels(method, "error").inc()
+                    raise
+        backups.labels(method, "ok").inc()
+        self.last = result
+        return result
+
+    def _run(self, method: str, compress: bool) -> Dict:
+        stem = os.path.splitext(os.path.basename(self.database))[0]
+        name = f"{stem}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}.db"
+        path = os.path.join(self.directory, name)
+        tmp = path + ".tmp"
+        started = time.monotonic()
+        source = sqlite3.connect(self.database, timeout=30)
+        try:
+            journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+            if method == "vacuum":
+                source.execute("VACUUM INTO ?", (tmp,))
+                steps = restarts = 0
+            else:
+                steps, restarts = self._copy(source, tmp)
+        except BaseException:
+            _remove(tmp)
+            raise
+        finally:
+            source.close()
+        copied_at = time.monotonic()
+
+        if compress:
+            with open(tmp, "rb") as f, gzip.open(path + ".gz.tmp", "wb", compresslevel=settings.BACKUP_COMPRESSION_LEVEL) as out:
+                shutil.copyfileobj(f, out, 1024 * 1024)
+            _remove(tmp)
+            tmp, name = path + ".gz.tmp", name + ".gz"
+        # Renamed only when complete, so a listed backup is always whole
+        os.replace(tmp, os.path.join(self.directory, name))
+        removed = self._prune()
+
+        result = {
+            "name": name,
+            "method": method,
+            "journal_mode": journal_mode,
+            "size": os.path.getsize(os.path.join(self.directory, name)),
+            "steps": steps,
+            "restarts": restarts,
+            "copy_seconds": round(copied_at - started, 3),
+            "total_seconds": round(time.monotonic() - started, 3),
+            "removed": removed,
+        }
+        logger.info("Backed up %s to %s", self.database, name, extra={"backup": result})
+        return result
+
+    def _copy(self, source: sqlite3.Connection, path: str):
+        steps = restarts = 0
+        remaining_before = None
+
+        def progress(status, remaining, total):
+            nonlocal steps, restarts, remaining_before
+            steps += 1
+            # A restarted copy starts over, so it makes no progress on the step
+            if remaining_before is not None and remaining >= remaining_before:
+                restarts += 1
+                if restarts > self.max_restarts:
+                    raise _TooManyRestarts()
+            remaining_before = remaining
+
+        target = sqlite3.connect(path)
+        try:
+            try:
+                source.backup(target, pages=self.pages_per_step, progress=progress, sleep=self.step_sleep)
+            except _TooManyRestarts:
+                logger.warning("Backup restarted %d times by concurrent writes; finishing in one step", restarts)
+                source.backup(target, pages=-1)
+                steps += 1
+        finally:
+            target.close()
+        return steps, restarts
+
+    def list(self) -> List[Dict]:
+        """
+        Completed backups, newest first
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        found = []
+        for name in names:
+            if not name.endswith((".db", ".db.gz")):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            found.append({"name": name, "size": stat.st_size, "created_at": stat.st_mtime})
+        # Names embed a UTC timestamp
+        found.sort(key=lambda backup: backup["name"], reverse=True)
+        return found
+
+    def _prune(self) -> List[str]:
+        removed = []
+        for stale in self.list()[self.retention:]:
+            _remove(os.path.join(self.directory, stale["name"]))
+            removed.append(stale["name"])
+        return removed
+
+    def start(self, method: str = "backup", compress: bool = True) -> None:
+        """
+        Run a backup on a background thread; BackupInProgress if one is running
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown backup method {method!r}")
+        if not self._lock.acquire(blocking=False):
+            raise BackupInProgress("A backup is already running")
+        threading.Thread(target=self._background, args=(method, compress), name="backup", daemon=True).start()
+
+    def _background(self, method: str, compress: bool) -> None:
+        # Runs with the lock start() acquired
+        try:
+            self._backup_locked(method, compress)
+        except BackupInProgress:
+            pass
+        except Exception:
+            logger.exception("Backup of %s failed", self.database)
+        finally:
+            self._lock.release()
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class BackupScheduler:
+    """
+    Back up whenever the newest backup is older than ``interval`` seconds.
+    Every worker runs one; the lock file makes sure only one backs up.
+    """
+    def __init__(self, manager: BackupManager, interval: float, method: str, compress: bool):
+        self.manager = manager
+        self.interval = interval
+        self.method = method
+        self.compress = compress
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        # Check often enough to notice a backup due, without busy-looping
+        while not self._stop.wait(min(self.interval, 60.0)):
+            newest = self.manager.list()
+            if newest and time.time() - newest[0]["created_at"] < self.interval:
+                continue
+            try:
+                self.manager.backup(self.method, self.compress)
+            except BackupInProgress:
+                pass
+            except Exception:
+                logger.exception("Scheduled backup of %s failed", self.manager.database)
+
+_manager: Optional[BackupManager] = None
+_manager_lock = threading.Lock()
+
+def get_backup_manager() -> BackupManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = BackupManager(
+                    database_path(settings.DATABASE_URL),
+                    settings.BACKUP_DIR,
+                    settings.BACKUP_RETENTION,
+                    settings.BACKUP_PAGES_PER_STEP,
+                    settings.BACKUP_STEP_SLEEP_SECONDS,
+                    settings.BACKUP_MAX_RESTARTS,
+                )
+    return _manager
+
+def reset_backup_manager() -> None:
+    global _manager
+    with _manager_lock:
+        _manager = None
@@ -0,0 +1,81 @@
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import anyio
+import anyio.to_thread
+from app.core.config import settings
+from app.core.metrics import bulkhead_wait
+
+class Bulkhead:
+    """
+    Named share of the worker threads: at most ``size`` calls run through it
+    at once and the rest wait their turn here, so a burst of one workload
+    (bcrypt at login, say) can't take the threads another one needs.
+
+    Calls run on anyio's worker threads with a copy of the caller's context,
+    like sync endpoints in the shared threadpool; only the limit is separate.
+    """
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self.limiter = anyio.CapacityLimiter(size)
+        # Counter, exported as a metric
+        self.completed = 0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        queued = time.perf_counter()
+
+        def timed():
+            bulkhead_wait.labels(self.name).observe(time.perf_counter() - queued)
+            return fn(*args, **kwargs)
+
+        try:
+            return await anyio.to_thread.run_sync(timed, limiter=self.limiter)
+        finally:
+            self.completed += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": self.size,
+            "busy": self.limiter.borrowed_tokens,
+            "waiting": self.limiter.statistics().tasks_waiting,
+            "completed": self.completed,
+        }
+
+_bulkheads: Optional[Dict[str, Bulkhead]] = None
+_bulkheads_lock = threading.Lock()
+
+def get_bulkheads() -> Dict[str, Bulkhead]:
+    global _bulkheads
+    if _bulkheads is None:
+        with _bulkheads_lock:
+            if _bulkheads is None:
+                _bulkheads = {name: Bulkhead(name, int(size)) for name, size in settings.BULKHEADS.items()}
+    return _bulkheads
+
+def reset_bulkheads() -> None:
+    global _bulkheads
+    with _bulkheads_lock:
+        _bulkheads = None
+
+def bulkhead_stats() -> Dict[str, Dict[str, float]]:
+    return {name: pool.stats() for name, pool in (_bulkheads or {}).items()}
+
+def bulkhead(name: str):
+    """
+    Run a sync endpoint in the named bulkhead (see BULKHEADS) instead of the
+    shared threadpool. Goes under the route decorator; the endpoint's own
+    dependencies still run in the shared threadpool.
+    """
+    if name not in settings.BULKHEADS:
+        raise ValueError(f"Unknown bulkhead {name!r}")
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def endpoint(*args, **kwargs):
+            if not settings.BULKHEADS_ENABLED:
+                return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+            return await get_bulkheads()[name].run(fn, *args, **kwargs)
+        return endpoint
+    return decorator
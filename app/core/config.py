@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, validator
 import os
@@ -28,12 +28,158 @@ class Settings(BaseSettings):
 
     # Database settings
     DATABASE_URL: str = f"sqlite:///{os.path.abspath('app.db')}"
+    # Run migrations (alembic upgrade head) when the app starts, not at import
+    DATABASE_INIT_ON_STARTUP: bool = True
+    # Large-table migrations (app/core/migrations.py) work in batches of this many
+    # rows, pausing between batches so other writers get the lock; tables smaller
+    # than MIGRATION_ONLINE_MIN_ROWS are altered in place
+    MIGRATION_BATCH_SIZE: int = 5000
+    MIGRATION_BATCH_PAUSE_SECONDS: float = 0.05
+    MIGRATION_ONLINE_MIN_ROWS: int = 100_000
+
+    # Online backups of the SQLite database (app/core/backup.py) into BACKUP_DIR,
+    # keeping the newest BACKUP_RETENTION. The backup API copies BACKUP_PAGES_PER_STEP
+    # pages at a time and sleeps in between so writers keep going; after
+    # BACKUP_MAX_RESTARTS restarts caused by concurrent writes it finishes in one step.
+    # With BACKUP_INTERVAL_SECONDS set, the app also backs up on that schedule.
+    BACKUP_DIR: str = os.path.abspath('backups')
+    BACKUP_RETENTION: int = 7
+    BACKUP_PAGES_PER_STEP: int = 1024
+    BACKUP_STEP_SLEEP_SECONDS: float = 0.01
+    BACKUP_MAX_RESTARTS: int = 3
+    BACKUP_COMPRESSION_LEVEL: int = 6
+    BACKUP_INTERVAL_SECONDS: Optional[float] = None
+    BACKUP_METHOD: str = "backup"
+    BACKUP_COMPRESS: bool = True
+
+    # The generated OpenAPI schema is cached here and reused until the code changes
+    OPENAPI_CACHE_PATH: Optional[str] = os.path.abspath('.openapi_cache.json')
     
     # JWT settings
     SECRET_KEY: str = "your-secret-key-here"  # Change in production
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Users with these emails get access to admin-only endpoints and fields
+    ADMIN_EMAILS: List[str] = []
+
+    # Shared slot-occupancy bitmap (see app/core/slot_bitmap.py)
+    SLOT_BITMAP_ENABLED: bool = False
+    SLOT_BITMAP_PATH: str = os.path.abspath('app.db.slots')
+    SLOT_BITMAP_SLOT_MINUTES: int = 60
+    SLOT_BITMAP_HORIZON_DAYS: int = 90
+    SLOT_BITMAP_MAX_DEVICES: int = 4096
+
+    # Idempotency-Key handling for booking creation
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_CACHE_SIZE: int = 1024
+    # How long duplicates wait for the first attempt
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    # When a pending attempt counts as abandoned (its process died) and may be
+    # retried; far longer than any request runs, so a slow attempt isn't run twice
+    IDEMPOTENCY_PENDING_TTL_SECONDS: float = 15 * 60
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+    # Expired keys are purged as requests come in: at most IDEMPOTENCY_PURGE_BATCH_SIZE
+    # rows every IDEMPOTENCY_PURGE_INTERVAL_SECONDS per process
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 60.0
+    IDEMPOTENCY_PURGE_BATCH_SIZE: int = 1000
+
+    # In-memory device name index for autocomplete: new devices are picked up
+    # every DEVICE_INDEX_REFRESH_SECONDS, full rebuild every DEVICE_INDEX_REBUILD_SECONDS
+    DEVICE_INDEX_REFRESH_SECONDS: float = 1.0
+    DEVICE_INDEX_REBUILD_SECONDS: float = 300.0
+
+    # Bulk device import: rows written per executemany batch (and transaction)
+    DEVICE_IMPORT_BATCH_SIZE: int = 1000
+    DEVICE_IMPORT_MAX_ERRORS: int = 100
+
+    # Per-request SQL statement count and time (Server-Timing header and logs).
+    # Assertion mode: requests running more statements than QUERY_STATS_MAX_QUERIES,
+    # or one statement more than QUERY_STATS_MAX_REPEATS times (an N+1), raise.
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_STATS_MAX_QUERIES: Optional[int] = None
+    QUERY_STATS_MAX_REPEATS: Optional[int] = None
+
+    # Slow-query log: statements over the threshold are logged (None disables it).
+    # EXPLAIN QUERY PLAN is captured for a sample of them, once per statement
+    # fingerprint per interval.
+    SLOW_QUERY_THRESHOLD_MS: Optional[float] = 100.0
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 1.0
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 300.0
+
+    # Sampling profiler: profiles requests that carry PROFILER_HEADER from an admin,
+    # plus a PROFILER_SAMPLE_RATE fraction of all requests. Collapsed stacks are kept
+    # in PROFILER_DIR, newest PROFILER_MAX_PROFILES only, and served under /admin/profiles.
+    PROFILER_ENABLED: bool = False
+    PROFILER_HEADER: str = "X-Profile"
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_DIR: str = os.path.abspath('profiles')
+    PROFILER_MAX_PROFILES: int = 50
+
+    # Request tracing: spans for requests, services, repositories, SQL and bcrypt.
+    # A TRACING_SAMPLE_RATE fraction of requests is traced (plus requests whose W3C
+    # traceparent is sampled). The last TRACING_BUFFER_SIZE traces are served under
+    # /admin/traces; with TRACING_FILE set they're also appended there in
+    # TRACING_FORMAT ("otlp" JSON lines or "chrome" trace events).
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 0.01
+    TRACING_BUFFER_SIZE: int = 100
+    TRACING_FILE: Optional[str] = None
+    TRACING_FORMAT: str = "otlp"
+
+    # Memory diagnostics under /admin/memory: tracemalloc records this many frames
+    # per allocation once started, and the newest MEMORY_MAX_SNAPSHOTS snapshots are kept
+    MEMORY_TRACEMALLOC_FRAMES: int = 1
+    MEMORY_MAX_SNAPSHOTS: int = 10
+
+    # Prometheus metrics at /metrics; latency histogram buckets in seconds
+    METRICS_ENABLED: bool = True
+    METRICS_LATENCY_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+    # /health/ready serves the last database check; a new one runs at most this often
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5.0
+
+    # Single-flight coalescing of identical concurrent reads, per endpoint group.
+    # Groups not listed here are not coalesced.
+    SINGLEFLIGHT_ENABLED: bool = True
+    SINGLEFLIGHT_GROUPS: Dict[str, Dict[str, float]] = {
+        "device_bookings": {"max_waiters": 1000, "timeout": 5.0},
+        "user_bookings": {"max_waiters": 100, "timeout": 5.0},
+        "devices": {"max_waiters": 1000, "timeout": 5.0},
+    }
+
+    # Admission control (app/core/admission.py): at most "limit" requests of a class
+    # run at once and at most "queue" wait for a slot. Requests that can't start within
+    # their budget (ADMISSION_BUDGET_HEADER in seconds, else ADMISSION_DEFAULT_BUDGET_SECONDS)
+    # get a 503 with Retry-After. Paths are classed by the longest ADMISSION_ROUTES
+    # prefix, else as "read" (GET/HEAD/OPTIONS) or "write"; "exempt" ones are never held.
+    # "{API_V1_STR}" in a prefix stands for the app's API_V1_STR.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CLASSES: Dict[str, Dict[str, float]] = {
+        "auth": {"limit": 4, "queue": 32},
+        "write": {"limit": 8, "queue": 64},
+        "read": {"limit": 32, "queue": 256},
+    }
+    ADMISSION_ROUTES: Dict[str, str] = {
+        "{API_V1_STR}/auth/": "auth",
+        "{API_V1_STR}/users/register": "auth",
+        "{API_V1_STR}/admin/": "exempt",
+        "/health/": "exempt",
+        "/metrics": "exempt",
+    }
+    ADMISSION_BUDGET_HEADER: str = "X-Request-Timeout"
+    ADMISSION_DEFAULT_BUDGET_SECONDS: float = 10.0
+
+    # Bulkheads (app/core/bulkhead.py): endpoints marked @bulkhead(name) run on at most
+    # this many worker threads of their own instead of the shared threadpool (anyio's
+    # 40), so a burst of bcrypt-heavy logins and sign-ups can't stall booking reads.
+    BULKHEADS_ENABLED: bool = True
+    BULKHEADS: Dict[str, int] = {
+        "auth": 4,
+        "db_read": 16,
+        "db_write": 4,
+    }
+
     class Config:
         case_sensitive = True
         env_file = ".env"
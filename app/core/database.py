@@ -1,15 +1,32 @@
-from typing import Generator
-from sqlalchemy import create_engine
+import sqlite3
+from typing import Generator, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.core.config import settings
+from app.core.slow_query import slow_query_log
+
+def make_engine(url: str) -> Engine:
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False}  # Needed for SQLite
+    )
+    slow_query_log.install(engine)
+    return engine
 
 # Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = make_engine(settings.DATABASE_URL)
+
+# SQLite ignores foreign keys (and so ON DELETE CASCADE) unless enabled per connection
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -17,16 +34,25 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create Base class
 Base = declarative_base()
 
+def init_db(bind: Optional[Engine] = None) -> None:
+    """
+    Migrate the schema to the latest revision. Called from the app's
+    lifespan, not at import, so importing the app never touches the database.
+    """
+    from app.core.migrations import upgrade_database
+    upgrade_database(bind or engine)
+
 # Dependency to get DB session
-def get_db() -> Generator[Session, None, None]:
+def get_db(request: Request) -> Generator[Session, None, None]:
     """
-    Dependency function that yields database sessions.
+    Dependency function that yields database sessions from the app's
+    session factory (see create_app).
     Usage:
         @app.get("/")
         def route(db: Session = Depends(get_db)):
             ...
     """
-    db = SessionLocal()
+    db = getattr(request.app.state, "session_factory", SessionLocal)()
     try:
         yield db
     finally:
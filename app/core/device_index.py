@@ -0,0 +1,170 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.repositories.records import DeviceRecord
+
+class DeviceNameIndex:
+    """
+    In-memory prefix index over device names for autocomplete.
+
+    Every word start of a name is a key, so "pro" finds "MacBook Pro". Keys
+    live in one sorted array: a lookup is a bisect plus a scan over the
+    matches, and new devices are inserted in place. Devices created by other
+    workers are picked up incrementally (ids above the highest one seen), and
+    the whole index is rebuilt periodically to drop devices deleted elsewhere.
+    """
+    def __init__(self):
+        self._keys: List[Tuple[str, int]] = []
+        self._names = {}
+        self._max_id = 0
+        self._lock = threading.Lock()
+        # Held by the one caller syncing; the others keep using the index as is
+        self._sync_lock = threading.Lock()
+        # add/remove calls made while a rebuild loads, replayed onto its result
+        self._changes: Optional[List[Tuple[str, int, Optional[str]]]] = None
+        self._built = False
+        self._synced_at = 0.0
+        self._built_at = 0.0
+
+    def sync(
+        self,
+        load_all: Callable[[], Iterable[DeviceRecord]],
+        load_after: Callable[[int], Iterable[DeviceRecord]]
+    ) -> None:
+        if not self._due(time.monotonic()):
+            return
+        # Before the first build there is nothing to serve, so wait for it
+        if not self._sync_lock.acquire(blocking=not self._built):
+            return
+        try:
+            now = time.monotonic()
+            if not self._built or now - self._built_at >= settings.DEVICE_INDEX_REBUILD_SECONDS:
+                # Log changes from the moment the snapshot is read
+                self._track_changes()
+                self.rebuild(load_all())
+            elif now - self._synced_at >= settings.DEVICE_INDEX_REFRESH_SECONDS:
+                for device in load_after(self._max_id):
+                    self.add(device.id, device.name)
+                self._synced_at = now
+        except BaseException:
+            with self._lock:
+                self._changes = None
+            raise
+        finally:
+            self._sync_lock.release()
+
+    def _due(self, now: float) -> bool:
+        return (
+            not self._built
+            or now - self._built_at >= settings.DEVICE_INDEX_REBUILD_SECONDS
+            or now - self._synced_at >= settings.DEVICE_INDEX_REFRESH_SECONDS
+        )
+
+    def _track_changes(self) -> None:
+        with self._lock:
+            if self._changes is None:
+                self._changes = []
+
+    def rebuild(self, devices: Iterable[DeviceRecord]) -> None:
+        try:
+            self._track_changes()
+            keys, names, max_id = [], {}, 0
+            for device in devices:
+                names[device.id] = device.name
+                keys.extend((key, device.id) for key in _keys_for(device.name))
+                max_id = max(max_id, device.id)
+            keys.sort()
+        except BaseException:
+            with self._lock:
+                self._changes = None
+            raise
+        with self._lock:
+            changes, self._changes = self._changes, None
+            self._keys, self._names, self._max_id = keys, names, max_id
+            self._built = True
+            self._built_at = self._synced_at = time.monotonic()
+            for change, device_id, name in changes:
+                if change == "add":
+                    self._add(device_id, name)
+                else:
+                    self._remove(device_id)
+
+    def invalidate(self) -> None:
+        """
+        Force a full rebuild on the next sync, e.g. after a bulk import
+        """
+        with self._lock:
+            self._built = False
+
+    def add(self, device_id: int, name: str) -> None:
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append(("add", device_id, name))
+            if self._built:
+                self._add(device_id, name)
+
+    def remove(self, device_id: int) -> None:
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append(("remove", device_id, None))
+            self._remove(device_id)
+
+    def _add(self, device_id: int, name: str) -> None:
+        if device_id in self._names:
+            return
+        self._names[device_id] = name
+        self._max_id = max(self._max_id, device_id)
+        for key in _keys_for(name):
+            insort(self._keys, (key, device_id))
+
+    def _remove(self, device_id: int) -> None:
+        name = self._names.pop(device_id, None)
+        if name is None:
+            return
+        for key in _keys_for(name):
+            position = bisect_left(self._keys, (key, device_id))
+            if position < len(self._keys) and self._keys[position] == (key, device_id):
+                del self._keys[position]
+
+    def search(self, prefix: str, limit: int) -> List[DeviceRecord]:
+        prefix = _normalize(prefix)
+        results, seen = [], set()
+        with self._lock:
+            position = bisect_left(self._keys, (prefix, 0))
+            while position < len(self._keys) and len(results) < limit:
+                key, device_id = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if device_id not in seen:
+                    seen.add(device_id)
+                    results.append(DeviceRecord(device_id, self._names[device_id]))
+                position += 1
+        return results
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+def _keys_for(name: str) -> List[str]:
+    words = _normalize(name).split(" ")
+    return list(dict.fromkeys(" ".join(words[i:]) for i in range(len(words))))
+
+_device_index: Optional[DeviceNameIndex] = None
+_device_index_lock = threading.Lock()
+
+def get_device_index() -> DeviceNameIndex:
+    global _device_index
+    if _device_index is None:
+        with _device_index_lock:
+            if _device_index is None:
+                _device_index = DeviceNameIndex()
+    return _device_index
+
+def reset_device_index() -> None:
+    global _device_index
+    with _device_index_lock:
+        _device_index = None
@@ -0,0 +1,50 @@
+import hashlib
+from typing import Iterable, Optional
+from app.core.exceptions import PreconditionFailedError
+
+def booking_etag(booking) -> str:
+    """
+    Strong ETag for a single booking, derived from its id and version
+    """
+    return f'"{booking.id}-{booking.version}"'
+
+def booking_list_etag(bookings: Iterable, variant: Iterable[str] = ()) -> str:
+    """
+    Weak ETag for a list of bookings, derived from every id and version
+    and the representation variant (e.g. the expanded relationships)
+    """
+    digest = hashlib.blake2b(",".join(sorted(variant)).encode(), digest_size=16)
+    for booking in bookings:
+        digest.update(f"{booking.id}-{booking.version};".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+def parse_if_match(if_match: Optional[str], booking_id: int) -> Optional[int]:
+    """
+    Extract the expected version of a booking from an If-Match header.
+    Returns None when the request is unconditional (no header or "*").
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    for candidate in if_match.split(","):
+        candidate = candidate.strip()
+        # If-Match uses strong comparison, so weak validators never match
+        if not (candidate.startswith('"') and candidate.endswith('"')):
+            continue
+        etag_id, _, etag_version = candidate[1:-1].partition("-")
+        if etag_id == str(booking_id) and etag_version.isdigit():
+            return int(etag_version)
+    raise PreconditionFailedError("Booking has been modified")
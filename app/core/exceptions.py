@@ -8,4 +8,8 @@ class DatabaseError(Exception):
 
 class AuthenticationError(Exception):
     """Raised when there is an authentication-related error."""
-    pass 
\ No newline at end of file
+    pass 
+
+class PreconditionFailedError(Exception):
+    """Raised when a conditional request's If-Match doesn't match the current version."""
+    pass
\ No newline at end of file
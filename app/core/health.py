@@ -0,0 +1,40 @@
+import threading
+import time
+from typing import Callable, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+class HealthCheck:
+    """
+    Cached readiness state. A probe only triggers a real database check when
+    the cached result is older than ``interval`` seconds, and only one probe
+    runs it; the others answer from the cache meanwhile.
+    """
+    def __init__(self, check: Callable[[], None], interval: float):
+        self.check = check
+        self.interval = interval
+        self.healthy = False
+        self.error: Optional[str] = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def status(self) -> bool:
+        if time.monotonic() - self.checked_at >= self.interval and self._lock.acquire(blocking=False):
+            try:
+                self.check()
+                self.healthy, self.error = True, None
+            except Exception as e:
+                self.healthy, self.error = False, str(e)
+            finally:
+                self.checked_at = time.monotonic()
+                self._lock.release()
+        return self.healthy
+
+def database_health_check(engine: Engine, interval: float) -> HealthCheck:
+    """
+    Health check of ``engine``; create_app keeps one per app in app.state
+    """
+    def check() -> None:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    return HealthCheck(check, interval)
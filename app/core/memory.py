@@ -0,0 +1,155 @@
+import itertools
+import linecache
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+# Allocations made by the diagnostics themselves are noise
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+]
+
+class TracemallocNotRunning(Exception):
+    """Raised when a snapshot is requested while tracemalloc is stopped."""
+
+class MemoryDiagnostics:
+    """
+    Admin-driven tracemalloc control: start/stop tracing, keep the last
+    ``max_snapshots`` snapshots and diff any two of them
+    """
+    def __init__(self, max_snapshots: int):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[int, Tuple[float, tracemalloc.Snapshot]]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = 1) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        # Snapshots survive stopping, so they can still be diffed
+        tracemalloc.stop()
+
+    def status(self) -> Dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+            "snapshots": [
+                {"id": snapshot_id, "taken_at": taken_at}
+                for snapshot_id, (taken_at, _) in self._snapshots.items()
+            ],
+        }
+
+    def snapshot(self, group_by: str = "lineno", limit: int = 20) -> Dict:
+        if not tracemalloc.is_tracing():
+            raise TracemallocNotRunning("tracemalloc is not running; start it first")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        taken_at = time.time()
+        with self._lock:
+            snapshot_id = next(self._ids)
+            self._snapshots[snapshot_id] = (taken_at, snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        stats = snapshot.statistics(group_by)
+        return {
+            "id": snapshot_id,
+            "taken_at": taken_at,
+            "total_bytes": sum(stat.size for stat in stats),
+            "top": [
+                {"location": _location(stat.traceback, group_by), "size": stat.size, "count": stat.count}
+                for stat in stats[:limit]
+            ],
+        }
+
+    def diff(self, old_id: int, new_id: int, group_by: str = "lineno", limit: int = 20) -> Optional[Dict]:
+        """
+        Allocation growth from snapshot ``old_id`` to ``new_id``, largest first
+        """
+        old, new = self._snapshots.get(old_id), self._snapshots.get(new_id)
+        if old is None or new is None:
+            return None
+        stats = new[1].compare_to(old[1], group_by)
+        return {
+            "from": old_id,
+            "to": new_id,
+            "size_diff": sum(stat.size_diff for stat in stats),
+            "top": [
+                {
+                    "location": _location(stat.traceback, group_by),
+                    "size_diff": stat.size_diff,
+                    "size": stat.size,
+                    "count_diff": stat.count_diff,
+                    "count": stat.count,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+def _location(traceback: tracemalloc.Traceback, group_by: str) -> str:
+    frame = traceback[0]
+    return frame.filename if group_by == "filename" else f"{frame.filename}:{frame.lineno}"
+
+# Sessions that have begun a transaction, to report identity-map sizes
+_sessions: "weakref.WeakSet[Session]" = weakref.WeakSet()
+
+@event.listens_for(Session, "after_begin")
+def _track_session(session, transaction, connection):
+    _sessions.add(session)
+
+def identity_map_sizes() -> Dict[str, int]:
+    sizes = [len(session.identity_map) for session in list(_sessions)]
+    return {
+        "sessions": len(sizes),
+        "objects": sum(sizes),
+        "largest": max(sizes, default=0),
+    }
+
+def cache_sizes() -> Dict[str, int]:
+    """
+    Entries held by the in-process caches
+    """
+    from app.core.device_index import get_device_index
+    from app.core.serialization import list_adapter
+    from app.core.singleflight import singleflight_stats
+    from app.core.slow_query import slow_query_log
+    from app.core.tracing import get_trace_exporter
+    from app.services.idempotency_service import _response_cache
+
+    return {
+        "idempotency_responses": len(_response_cache),
+        "device_index": len(get_device_index()),
+        "list_adapters": list_adapter.cache_info().currsize,
+        "singleflight_in_flight": sum(stats["in_flight"] for stats in singleflight_stats().values()),
+        "slow_query_fingerprints": len(slow_query_log._explained_at),
+        "traces": len(get_trace_exporter().traces),
+    }
+
+_diagnostics: Optional[MemoryDiagnostics] = None
+_diagnostics_lock = threading.Lock()
+
+def get_memory_diagnostics() -> MemoryDiagnostics:
+    global _diagnostics
+    if _diagnostics is None:
+        with _diagnostics_lock:
+            if _diagnostics is None:
+                _diagnostics = MemoryDiagnostics(settings.MEMORY_MAX_SNAPSHOTS)
+    return _diagnostics
+
+def reset_memory_diagnostics() -> None:
+    global _diagnostics
+    with _diagnostics_lock:
+        _diagnostics = None
@@ -0,0 +1,377 @@
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+import anyio.to_thread
+from sqlalchemy import event
+from app.core.config import Settings, settings
+from app.core.admission import admission_stats
+from app.core.singleflight import singleflight_stats
+
+class _Shards:
+    """
+    Per-thread value arrays. Each thread only ever writes its own array, so
+    recording needs no lock; a scrape sums the arrays of every thread.
+
+    Worker threads come and go (anyio retires idle ones), so the arrays of
+    threads that have exited are folded into ``_retired`` and dropped.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._all: List[Tuple[threading.Thread, List[float]]] = []
+        self._retired = [0.0] * size
+        self._lock = threading.Lock()
+
+    def mine(self) -> List[float]:
+        values = getattr(self._local, "values", None)
+        if values is None:
+            values = self._local.values = [0.0] * self.size
+            with self._lock:
+                self._retire()
+                self._all.append((threading.current_thread(), values))
+        return values
+
+    def total(self) -> List[float]:
+        with self._lock:
+            self._retire()
+            shards = [values for _, values in self._all]
+            shards.append(list(self._retired))
+        return [sum(column) for column in zip(*shards)]
+
+    def _retire(self) -> None:
+        # Called with the lock held; a dead thread can't write its array any more
+        alive = []
+        for thread, values in self._all:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                for i, value in enumerate(values):
+                    self._retired[i] += value
+        self._all = alive
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            for suffix, extra, value in child.samples():
+                yield self.name + suffix, {**labels, **extra}, value
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] += amount
+
+    def samples(self):
+        yield "", {}, self._shards.total()[0]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        # One count per bucket, then +Inf, then the sum
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._shards.mine()
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                values[i] += 1
+                break
+        else:
+            values[len(self.buckets)] += 1
+        values[-1] += value
+
+    def samples(self):
+        totals = self._shards.total()
+        cumulative = 0.0
+        for bound, count in zip(list(self.buckets) + [math.inf], totals):
+            cumulative += count
+            yield "_bucket", {"le": "+Inf" if bound == math.inf else repr(float(bound))}, cumulative
+        yield "_count", {}, cumulative
+        yield "_sum", {}, totals[-1]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = ()):
+        self.buckets = tuple(sorted(buckets or settings.METRICS_LATENCY_BUCKETS))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def time(self, *labels: str):
+        return _Timer(self.labels(*labels))
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.started)
+
+class Gauge(_Metric):
+    """
+    Gauge whose value is computed at scrape time by ``collect``, which returns
+    {label values: value}
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.collect = collect
+        super().__init__(name, documentation, labelnames)
+
+    def samples(self):
+        for values, value in self.collect().items():
+            yield self.name, dict(zip(self.labelnames, values)), value
+
+class CallbackCounter(Gauge):
+    """
+    Counter read at scrape time like Gauge, for totals kept elsewhere (the
+    single-flight groups, admission, bulkheads); name it ``..._total``
+    """
+    kind = "counter"
+
+REGISTRY: List[_Metric] = []
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format (version 0.0.4)
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            if labels:
+                rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{rendered}}} {_number(value)}")
+            else:
+                lines.append(f"{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+# --- Application metrics ---
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "Time spent in bcrypt", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0)
+)
+db_pool_checkouts = Counter("db_pool_checkouts_total", "Connections checked out of the pool")
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds", "Time waiting for a pooled connection",
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+cache_lookups = Counter("cache_lookups_total", "Cache lookups by cache and result", ("cache", "result"))
+backups = Counter("db_backups_total", "Database backups by method and result", ("method", "result"))
+backup_duration = Histogram(
+    "db_backup_duration_seconds", "Time to back up the database, compression included", ("method",),
+    buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+)
+bulkhead_wait = Histogram(
+    "bulkhead_wait_seconds", "Time calls waited for a thread of their bulkhead", ("pool",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+_in_flight = 0
+_instrumented_engine = None
+_threadpool_limiter = None
+
+def _pool_gauges() -> Dict[Tuple[str, ...], float]:
+    if _instrumented_engine is None:
+        return {}
+    pool = _instrumented_engine.pool
+    values = {}
+    for state in ("checkedout", "checkedin", "overflow", "size"):
+        method = getattr(pool, state, None)
+        if method is not None:
+            values[(state,)] = method()
+    return values
+
+def _threadpool_gauges() -> Dict[Tuple[str, ...], float]:
+    if _threadpool_limiter is None:
+        return {}
+    return {("busy",): _threadpool_limiter.borrowed_tokens, ("total",): _threadpool_limiter.total_tokens}
+
+def _cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), child in list(cache_lookups._children.items()):
+        totals.setdefault(cache, [0.0, 0.0])[result == "hit"] += next(child.samples())[2]
+    # A coalesced single-flight call is a hit: it was served another call's result
+    for name, stats in singleflight_stats().items():
+        totals[f"singleflight_{name}"] = [stats["executed"], stats["coalesced"]]
+    return {(cache,): hits / (hits + misses) for cache, (misses, hits) in totals.items() if hits + misses}
+
+# Stats that go up and down; everything else the stats() dicts hold is a
+# running total and is exported as a counter
+_LEVELS = frozenset(("in_flight", "limit", "queued", "service_time", "size", "busy", "waiting"))
+
+def _split(stats: Dict[str, Dict[str, float]], totals: bool) -> Dict[Tuple[str, ...], float]:
+    return {
+        (name, key): value
+        for name, values in stats.items()
+        for key, value in values.items()
+        if (key not in _LEVELS) == totals
+    }
+
+def _bulkhead_stats() -> Dict[str, Dict[str, float]]:
+    # Imported here: app.core.bulkhead records into bulkhead_wait above
+    from app.core.bulkhead import bulkhead_stats
+    return bulkhead_stats()
+
+Gauge("http_requests_in_flight", "HTTP requests being handled", (), lambda: {(): _in_flight})
+Gauge("threadpool_threads", "Worker threads for sync endpoints, busy and total", ("state",), _threadpool_gauges)
+Gauge("db_pool_connections", "SQLAlchemy pool state", ("state",), _pool_gauges)
+Gauge("cache_hit_ratio", "Hit ratio per cache since start", ("cache",), _cache_hit_ratios)
+CallbackCounter(
+    "singleflight_calls_total", "Single-flight calls by group and outcome: executed, coalesced, "
+    "overflowed, timed_out", ("group", "outcome"), lambda: _split(singleflight_stats(), totals=True)
+)
+Gauge(
+    "singleflight_in_flight", "Single-flight calls being executed per group", ("group",),
+    lambda: {(name,): stats["in_flight"] for name, stats in singleflight_stats().items()}
+)
+CallbackCounter(
+    "admission_requests_total", "Requests by admission class and outcome: admitted or shed_<reason>",
+    ("class", "outcome"), lambda: _split(admission_stats(), totals=True)
+)
+Gauge(
+    "admission", "Admission control per route class: limit, in_flight, queued, service_time (s)",
+    ("class", "state"), lambda: _split(admission_stats(), totals=False)
+)
+CallbackCounter(
+    "bulkhead_calls_total", "Calls completed per bulkhead pool", ("pool",),
+    lambda: {(name,): stats["completed"] for name, stats in _bulkhead_stats().items()}
+)
+Gauge(
+    "bulkhead_threads", "Bulkhead pools: size, busy threads and calls waiting for one",
+    ("pool", "state"), lambda: _split(_bulkhead_stats(), totals=False)
+)
+
+def instrument_engine(engine) -> None:
+    """
+    Count pool checkouts and time how long callers wait for a connection
+    """
+    global _instrumented_engine
+    # Every app built by create_app shares the engine; instrument it once
+    if _instrumented_engine is engine:
+        return
+
+    def wrap(pool):
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                db_pool_wait.labels().observe(time.perf_counter() - started)
+        pool.connect = timed_connect
+
+    _instrumented_engine = engine
+    wrap(engine.pool)
+    # dispose() replaces the pool
+    event.listen(engine, "engine_disposed", lambda conn: wrap(engine.pool))
+    event.listen(engine, "checkout", lambda *args: db_pool_checkouts.labels().inc())
+
+class MetricsMiddleware:
+    """
+    Record per-route request counts and latency, and requests in flight.
+
+    Routes are labelled with their path template (``/bookings/{booking_id}``),
+    never the raw path, so the number of series stays bounded.
+    """
+    def __init__(self, app, app_settings: Settings = settings):
+        self.app = app
+        self.settings = app_settings
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight, _threadpool_limiter
+        if scope["type"] != "http" or not self.settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        # Only reachable from inside the event loop, which the scrape may not be
+        _threadpool_limiter = anyio.to_thread.current_default_thread_limiter()
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _in_flight -= 1
+            path = route_template(scope)
+            http_requests.labels(scope["method"], path, str(status_code)).inc()
+            http_request_duration.labels(scope["method"], path).observe(elapsed)
+
+def route_template(scope) -> str:
+    """
+    Full path template of the matched route, e.g. ``/api/v1/bookings/{booking_id}``
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    # Routes of included routers only know their path below the router's
+    # prefix; recover the prefix from the request path
+    try:
+        suffix = path_format.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return path_format
+    path = scope["path"]
+    if suffix and path.endswith(suffix):
+        return path[:len(path) - len(suffix)] + path_format
+    return path_format
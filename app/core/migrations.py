@@ -0,0 +1,177 @@
+import logging
+import os
+import re
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+# Databases created by create_all before migrations existed match this revision
+BASELINE_REVISION = "0001"
+# SQLite manages the FTS5 shadow tables itself
+_UNMANAGED_TABLES = re.compile(r"^bookings_fts(_\w+)?$")
+_MIN_KEY = -(2 ** 63)
+
+def include_name(name, type_, parent_names) -> bool:
+    """
+    Keep the FTS5 table and its shadow tables out of autogenerate
+    """
+    return not (type_ == "table" and name and _UNMANAGED_TABLES.match(name))
+
+def upgrade_database(engine: Engine) -> None:
+    """
+    Migrate the database to the latest revision. A database created by
+    create_all (tables but no alembic_version) is stamped as the baseline
+    first; later revisions skip the changes such a database already has.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    with engine.connect() as conn:
+        config.attributes["connection"] = conn
+        tables = inspect(conn).get_table_names()
+        if "alembic_version" not in tables and "users" in tables:
+            logger.info("Stamping existing schema as revision %s", BASELINE_REVISION)
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+        conn.commit()
+
+def row_count(conn: Connection, table: str) -> int:
+    return conn.exec_driver_sql(f'SELECT count(*) FROM "{table}"').scalar()
+
+def key_ranges(conn: Connection, table: str, key: str = "id", batch_size: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """
+    Consecutive (exclusive low, inclusive high) ranges of an integer key,
+    ``batch_size`` rows each, found by walking the key's index
+    """
+    batch_size = batch_size or settings.MIGRATION_BATCH_SIZE
+    low = _MIN_KEY
+    while True:
+        high = conn.exec_driver_sql(
+            f'SELECT max("{key}") FROM (SELECT "{key}" FROM "{table}" WHERE "{key}" > ? ORDER BY "{key}" LIMIT ?)',
+            (low, batch_size)
+        ).scalar()
+        if high is None:
+            return
+        yield low, high
+        low = high
+
+def batched_backfill(
+    conn: Connection,
+    table: str,
+    assignments: str,
+    where: Optional[str] = None,
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """
+    ``UPDATE table SET assignments [WHERE where]`` in key-range batches, so
+    the write lock is held for one batch at a time and writers get a turn
+    (``pause`` seconds) in between.
+
+    Run it inside ``op.get_context().autocommit_block()``: in the migration's
+    transaction the batches would all commit together.
+    """
+    pause = settings.MIGRATION_BATCH_PAUSE_SECONDS if pause is None else pause
+    extra = f" AND ({where})" if where else ""
+    updated = 0
+    for low, high in key_ranges(conn, table, key, batch_size):
+        result = conn.exec_driver_sql(
+            f'UPDATE "{table}" SET {assignments} WHERE "{key}" > ? AND "{key}" <= ?{extra}', (low, high)
+        )
+        updated += result.rowcount
+        time.sleep(pause)
+    logger.info("Backfilled %d rows of %s", updated, table)
+    return updated
+
+def copy_and_swap(
+    conn: Connection,
+    table: str,
+    indexes: Sequence[str] = (),
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> None:
+    """
+    Rebuild ``table`` without holding the write lock for the whole copy:
+
+    1. create ``<table>__new`` with the same definition plus ``indexes``
+       (CREATE INDEX statements with ``{table}`` for the table name)
+    2. triggers mirror writes to the original into the copy
+    3. rows are copied in key-range batches, pausing between them
+    4. one short transaction drops the original, renames the copy into
+       place and recreates the original's triggers
+
+    SQLite can't rename indexes, so the original's named indexes are
+    dropped with it: give the rebuilt table's indexes names of their own.
+    Tables referenced by other tables' foreign keys can't be swapped.
+
+    Run it inside ``op.get_context().autocommit_block()``.
+    """
+    pause = settings.MIGRATION_BATCH_PAUSE_SECONDS if pause is None else pause
+    shadow = f"{table}__new"
+    table_sql = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).scalar()
+    triggers: List[str] = [
+        sql for (sql,) in conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,)
+        )
+    ]
+    names = [column["name"] for column in inspect(conn).get_columns(table)]
+    columns = ", ".join(f'"{name}"' for name in names)
+    new_values = ", ".join(f'new."{name}"' for name in names)
+
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS \"{shadow}\"")
+    conn.exec_driver_sql(re.sub(
+        rf'^\s*CREATE TABLE\s+("?){re.escape(table)}\1', f'CREATE TABLE "{shadow}"', table_sql, count=1, flags=re.I
+    ))
+    for statement in indexes:
+        conn.exec_driver_sql(statement.format(table=shadow))
+    conn.exec_driver_sql(f"""
+        CREATE TRIGGER "{shadow}_insert" AFTER INSERT ON "{table}" BEGIN
+            INSERT OR REPLACE INTO "{shadow}" ({columns}) VALUES ({new_values});
+        END
+    """)
+    conn.exec_driver_sql(f"""
+        CREATE TRIGGER "{shadow}_update" AFTER UPDATE ON "{table}" BEGIN
+            DELETE FROM "{shadow}" WHERE "{key}" = old."{key}";
+            INSERT OR REPLACE INTO "{shadow}" ({columns}) VALUES ({new_values});
+        END
+    """)
+    conn.exec_driver_sql(f"""
+        CREATE TRIGGER "{shadow}_delete" AFTER DELETE ON "{table}" BEGIN
+            DELETE FROM "{shadow}" WHERE "{key}" = old."{key}";
+        END
+    """)
+
+    copied = 0
+    for low, high in key_ranges(conn, table, key, batch_size):
+        # Rows the triggers already mirrored are newer than the original's
+        result = conn.exec_driver_sql(
+            f'INSERT OR IGNORE INTO "{shadow}" ({columns}) '
+            f'SELECT {columns} FROM "{table}" WHERE "{key}" > ? AND "{key}" <= ?',
+            (low, high)
+        )
+        copied += result.rowcount
+        time.sleep(pause)
+
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        for suffix in ("insert", "update", "delete"):
+            conn.exec_driver_sql(f'DROP TRIGGER "{shadow}_{suffix}"')
+        conn.exec_driver_sql(f'DROP TABLE "{table}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{shadow}" RENAME TO "{table}"')
+        for statement in triggers:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("COMMIT")
+    except Exception:
+        conn.exec_driver_sql("ROLLBACK")
+        raise
+    logger.info("Rebuilt %s: copied %d rows", table, copied)
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+import fastapi
+from fastapi import FastAPI
+from fastapi.openapi.utils import get_openapi
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def source_key(app: FastAPI) -> str:
+    """
+    Changes whenever the schema could: the app's metadata, the FastAPI
+    version or any module under app/ (routes, schemas, dependencies)
+    """
+    digest = hashlib.sha256(f"{fastapi.__version__}|{app.title}|{app.version}|{app.openapi_url}".encode())
+    for root, dirs, files in os.walk(_APP_DIR):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f"{os.path.relpath(os.path.join(root, name), _APP_DIR)}|{stat.st_mtime_ns}|{stat.st_size}".encode())
+    return digest.hexdigest()
+
+def _read(path: str, key: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached.get("schema") if cached.get("key") == key else None
+
+def _write(path: str, key: str, schema: Dict[str, Any]) -> None:
+    # Written to a temporary file and renamed, so concurrent workers never read half a file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump({"key": key, "schema": schema}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Could not cache the OpenAPI schema at %s: %s", path, e)
+
+def install_openapi_cache(app: FastAPI, path: Optional[str]) -> None:
+    """
+    Serve the OpenAPI schema from ``path`` while it matches the code, and
+    generate and store it otherwise, so workers don't each rebuild it
+    """
+    if not path:
+        return
+
+    def openapi() -> Dict[str, Any]:
+        if app.openapi_schema is None:
+            key = source_key(app)
+            schema = _read(path, key)
+            if schema is None:
+                schema = get_openapi(
+                    title=app.title,
+                    version=app.version,
+                    openapi_version=app.openapi_version,
+                    description=app.description,
+                    routes=app.routes,
+                )
+                _write(path, key, schema)
+            app.openapi_schema = schema
+        return app.openapi_schema
+
+    app.openapi = openapi
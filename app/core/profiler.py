@@ -0,0 +1,187 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+import anyio.to_thread
+from jose import JWTError, jwt
+from app.core.config import Settings, settings
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PROFILE_ID = re.compile(r"^[\w.-]+$")
+_PROFILE_FILE = re.compile(r"^((\d+)-[\w.-]*)\.collapsed$")
+
+class StackSampler:
+    """
+    Samples the stacks of every thread running application code until stopped.
+
+    Sync endpoints run in threadpool workers that can't be tied to a request
+    from outside, so concurrent requests show up in the same profile; profile
+    one request at a time for a clean picture.
+    """
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        self._stop.set()
+        if wait:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = _collapse(frame)
+                if stack is not None:
+                    self.stacks[stack] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """
+        Brendan Gregg's collapsed format, one ``frame;frame;frame count`` per
+        line, ready for flamegraph.pl or speedscope
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def _collapse(frame) -> Optional[str]:
+    names: List[str] = []
+    in_app = False
+    while frame is not None:
+        code = frame.f_code
+        in_app = in_app or code.co_filename.startswith(_APP_DIR)
+        names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+    if not in_app:
+        return None
+    return ";".join(reversed(names))
+
+class ProfileStore:
+    """
+    Bounded on-disk ring buffer of profiles: writing a new profile deletes
+    the oldest ones beyond ``max_profiles``
+    """
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, method: str, path: str, content: str) -> str:
+        label = re.sub(r"[^\w-]+", "_", path).strip("_") or "root"
+        profile_id = f"{time.time_ns() // 1000}-{method}-{label}"[:120]
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            with open(os.path.join(self.directory, profile_id + ".collapsed"), "w") as f:
+                f.write(content)
+            for stale in self.list()[self.max_profiles:]:
+                try:
+                    os.remove(os.path.join(self.directory, stale["id"] + ".collapsed"))
+                except FileNotFoundError:
+                    pass
+        return profile_id
+
+    def list(self) -> List[Dict]:
+        """
+        Stored profiles, newest first
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        found = []
+        for name in names:
+            # Ids start with a microsecond timestamp; files named otherwise aren't
+            # ours, so they are neither listed nor pruned
+            match = _PROFILE_FILE.match(name)
+            if match is None:
+                continue
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            found.append((int(match.group(2)), match.group(1), size))
+        found.sort(reverse=True)
+        return [{"id": profile_id, "size": size} for _, profile_id, size in found]
+
+    def read(self, profile_id: str) -> Optional[str]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, profile_id + ".collapsed")) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+def get_profile_store(app_settings: Settings = settings) -> ProfileStore:
+    return ProfileStore(app_settings.PROFILER_DIR, app_settings.PROFILER_MAX_PROFILES)
+
+def _requested_by_admin(scope, app_settings: Settings) -> bool:
+    # Checked from the token alone so deciding doesn't cost a database query
+    headers = dict(scope["headers"])
+    if headers.get(app_settings.PROFILER_HEADER.lower().encode()) is None:
+        return False
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = jwt.decode(token, app_settings.SECRET_KEY, algorithms=[app_settings.ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("sub") in app_settings.ADMIN_EMAILS
+
+class ProfilerMiddleware:
+    """
+    Profile requests carrying PROFILER_HEADER from an admin, plus a
+    PROFILER_SAMPLE_RATE fraction of all requests, and store the collapsed
+    stacks in the profile store. The id is returned in X-Profile-Id.
+
+    When PROFILER_ENABLED is off, a request costs one attribute lookup.
+    """
+    def __init__(self, app, app_settings: Settings = settings):
+        self.app = app
+        self.settings = app_settings
+
+    async def __call__(self, scope, receive, send):
+        if not self.settings.PROFILER_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not (_requested_by_admin(scope, self.settings) or random.random() < self.settings.PROFILER_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(self.settings.PROFILER_INTERVAL_MS / 1e3)
+        profile_id = None
+
+        def finish() -> str:
+            # Joins the sampler and writes a file: kept off the event loop
+            sampler.stop()
+            return get_profile_store(self.settings).save(scope["method"], scope["path"], sampler.collapsed())
+
+        async def send_with_profile(message):
+            nonlocal profile_id
+            # Endpoints have done their work by the time the response starts,
+            # so the profile can be stored and its id sent as a header
+            if message["type"] == "http.response.start" and profile_id is None:
+                profile_id = await anyio.to_thread.run_sync(finish)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if profile_id is None:
+                # The sampler thread exits on its own; don't block the loop on it
+                sampler.stop(wait=False)
@@ -0,0 +1,138 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in assertion mode when a request runs more SQL than allowed (e.g. an N+1)."""
+
+class QueryStats:
+    """
+    SQL statements run on behalf of one request (or one ``count_queries`` block)
+    """
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # Statement text -> executions; an N+1 shows up as one text repeated
+        self.statements = Counter()
+
+    def most_repeated(self) -> int:
+        return max(self.statements.values(), default=0)
+
+    def check(self, max_queries: Optional[int], max_repeats: Optional[int]) -> None:
+        if max_queries is not None and self.count > max_queries:
+            raise QueryBudgetExceeded(f"{self.count} SQL statements run, at most {max_queries} allowed")
+        if max_repeats is not None and self.most_repeated() > max_repeats:
+            statement, repeats = self.statements.most_common(1)[0]
+            raise QueryBudgetExceeded(
+                f"Statement run {repeats} times, at most {max_repeats} allowed (N+1?): {statement}"
+            )
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Listening on Engine covers the application engine and any engine tests create
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_stats_started")
+    if started:
+        stats.duration += time.perf_counter() - started.pop()
+    stats.count += 1
+    stats.statements[statement] += 1
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so it doesn't stay on the pooled connection
+    conn = exception_context.connection
+    if conn is None or _current.get() is None:
+        return
+    started = conn.info.get("query_stats_started")
+    if started:
+        started.pop()
+
+@contextmanager
+def count_queries(max_queries: Optional[int] = None, max_repeats: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Count the SQL statements run in this block (in this thread and in threads
+    started from a copy of its context). With limits, raise QueryBudgetExceeded
+    on leaving the block if they were exceeded.
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    stats.check(max_queries, max_repeats)
+
+class QueryStatsMiddleware:
+    """
+    Count the SQL run by each request and report it in a Server-Timing header
+    and an ``app.core.query_stats`` log record.
+
+    Sync endpoints run in the threadpool with a copy of the request's context,
+    so their statements land in the same QueryStats. In assertion mode
+    (QUERY_STATS_MAX_QUERIES / QUERY_STATS_MAX_REPEATS) a request over budget
+    raises QueryBudgetExceeded, which fails the test that sent it.
+    """
+    def __init__(self, app, app_settings: Settings = settings):
+        self.app = app
+        self.settings = app_settings
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.settings.QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing(stats).encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "%s %s %s queries=%d db_ms=%.2f total_ms=%.2f",
+                scope["method"], scope["path"], status_code, stats.count, stats.duration * 1e3, elapsed * 1e3,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "db_queries": stats.count,
+                    "db_ms": round(stats.duration * 1e3, 2),
+                    "total_ms": round(elapsed * 1e3, 2),
+                }
+            )
+        stats.check(self.settings.QUERY_STATS_MAX_QUERIES, self.settings.QUERY_STATS_MAX_REPEATS)
+
+def server_timing(stats: QueryStats) -> str:
+    return f'db;dur={stats.duration * 1e3:.2f};desc="{stats.count} queries"'
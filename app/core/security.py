@@ -3,6 +3,8 @@ from typing import Any, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import password_hash_duration
+from app.core.tracing import start_span
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -17,7 +19,9 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta | Non
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with password_hash_duration.time("verify"), start_span("bcrypt.verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password) 
\ No newline at end of file
+    with password_hash_duration.time("hash"), start_span("bcrypt.hash"):
+        return pwd_context.hash(password) 
\ No newline at end of file
@@ -0,0 +1,54 @@
+import json
+from functools import lru_cache
+from typing import Any, Iterable, List, Type, TypeVar
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[ModelT]) -> TypeAdapter:
+    """
+    Cached TypeAdapter for ``List[model]``; building one is expensive
+    """
+    return TypeAdapter(List[model])
+
+def validate_list(model: Type[ModelT], objects: Iterable[Any]) -> List[ModelT]:
+    """
+    Validate ORM objects (or any attribute-bearing rows) into response models in one call
+    """
+    return list_adapter(model).validate_python(objects, from_attributes=True)
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode already-validated content to JSON bytes without validating it again
+    """
+    if isinstance(content, BaseModel):
+        if orjson is None:
+            return content.model_dump_json().encode()
+        content = content.model_dump()
+    elif isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        adapter = list_adapter(type(content[0]))
+        if orjson is None:
+            return adapter.dump_json(content)
+        content = adapter.dump_python(content)
+
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """
+    Response for content the service layer has already validated.
+
+    Returning it from an endpoint bypasses FastAPI's second validation against
+    ``response_model`` (which is then only used for the OpenAPI schema).
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,110 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from app.core.config import settings
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    function and every caller arriving while it is in flight gets its result.
+
+    Waiters are capped at ``max_waiters`` and wait at most ``timeout`` seconds;
+    callers over the cap or past the timeout run the function themselves.
+    """
+    def __init__(self, name: str, max_waiters: int = 1000, timeout: float = 5.0, enabled: bool = True):
+        self.name = name
+        self.max_waiters = max_waiters
+        self.timeout = timeout
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        # Counters, exported as metrics
+        self.executed = 0
+        self.coalesced = 0
+        self.overflowed = 0
+        self.timed_out = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.executed += 1
+            elif call.waiters >= self.max_waiters:
+                self.overflowed += 1
+                call = None
+            else:
+                call.waiters += 1
+                leader = False
+
+        if call is None:
+            return fn()
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+
+        if not call.event.wait(self.timeout):
+            with self._lock:
+                self.timed_out += 1
+            return fn()
+        with self._lock:
+            self.coalesced += 1
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "overflowed": self.overflowed,
+            "timed_out": self.timed_out,
+            "in_flight": len(self._calls),
+        }
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+def get_singleflight(name: str) -> SingleFlight:
+    """
+    Return the process-wide single-flight group for an endpoint, configured
+    from ``settings.SINGLEFLIGHT_GROUPS``. Unlisted groups pass calls through.
+    """
+    group = _groups.get(name)
+    if group is None:
+        with _groups_lock:
+            group = _groups.get(name)
+            if group is None:
+                config = settings.SINGLEFLIGHT_GROUPS.get(name)
+                group = SingleFlight(
+                    name,
+                    max_waiters=int(config.get("max_waiters", 1000)) if config else 0,
+                    timeout=float(config.get("timeout", 5.0)) if config else 0.0,
+                    enabled=settings.SINGLEFLIGHT_ENABLED and config is not None,
+                )
+                _groups[name] = group
+    return group
+
+def singleflight_stats() -> Dict[str, Dict[str, int]]:
+    return {name: group.stats() for name, group in _groups.items()}
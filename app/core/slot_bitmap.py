@@ -0,0 +1,329 @@
+import math
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Header layout: magic, seqlock counter, epoch (minutes since 1970),
+# slot length in minutes, slots per device, max devices, ready flag.
+_MAGIC = b"SLOTBMP1"
+_HEADER = struct.Struct("<8sQqIIII")
+_HEADER_SIZE = 64
+_SEQ_OFFSET = 8
+_EPOCH_OFFSET = 16
+_READY_OFFSET = 36
+_UNIX_EPOCH = datetime(1970, 1, 1)
+# Reads that keep overlapping a write give up after this many tries and fall
+# back to the database (a rebuild holds the write lock for a while)
+_READ_RETRIES = 1000
+
+# Called with the horizon as (start, end); yields (device_id, time_slot) pairs
+Loader = Callable[[datetime, datetime], Iterable[Tuple[int, datetime]]]
+
+
+class SlotBitmap:
+    """
+    Slot-occupancy bitmap per device, stored in a memory-mapped file so that
+    every worker process shares one copy.
+
+    A bit is only kept for bookings whose time slot falls exactly on a slot
+    boundary inside the horizon; every other lookup returns None and callers
+    fall back to the database. Writers serialise on an exclusive file lock and
+    readers use a seqlock to get a consistent view without locking.
+    """
+
+    def __init__(self, path: str, slot_minutes: int, horizon_days: int, max_devices: int):
+        self.path = path
+        self.slot_minutes = slot_minutes
+        self.slots_per_device = horizon_days * 24 * 60 // slot_minutes
+        self.max_devices = max_devices
+        self.row_bytes = (self.slots_per_device + 7) // 8
+        self.size = _HEADER_SIZE + self.max_devices * self.row_bytes
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != self.size:
+                os.ftruncate(fd, self.size)
+            self._mm = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+        self._member_lock = open(f"{path}.lock", "a+b")
+        self._write_lock = open(f"{path}.wlock", "a+b")
+        self._thread_lock = threading.Lock()
+
+    def close(self) -> None:
+        self._mm.close()
+        self._member_lock.close()
+        self._write_lock.close()
+
+    # Lifecycle
+
+    def attach(self, loader: Loader) -> bool:
+        """
+        Join the set of processes sharing the bitmap. The first live process
+        becomes the leader and rebuilds it from ``loader``; everyone else
+        waits until the leader is done. Returns True if this process built
+        the bitmap.
+        """
+        try:
+            fcntl.flock(self._member_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fcntl.flock(self._member_lock, fcntl.LOCK_SH)
+            self._load_header()
+            return False
+
+        try:
+            self.rebuild(loader)
+        finally:
+            fcntl.flock(self._member_lock, fcntl.LOCK_SH)
+        return True
+
+    def rebuild(self, loader: Loader) -> None:
+        """
+        Start the horizon today and refill the bitmap from ``loader``.
+        """
+        with self._writing():
+            self._fill(loader)
+
+    def roll(self, loader: Loader) -> bool:
+        """
+        Move the horizon to today once the day has rolled over, refilling the
+        bitmap from ``loader``. Any process may call it; the first one after
+        midnight rebuilds and the rest see the new epoch. Returns True if this
+        call rebuilt the bitmap.
+        """
+        if self.epoch_minutes >= _today_minutes():
+            return False
+        with self._writing():
+            # Another process may have rolled it while we waited for the lock
+            if self.epoch_minutes >= _today_minutes():
+                return False
+            self._fill(loader)
+        return True
+
+    def _fill(self, loader: Loader) -> None:
+        # Runs under the write lock, so the seq counter is odd here: readers
+        # retry until the header and rows are all rewritten
+        epoch = _today_minutes()
+        _HEADER.pack_into(
+            self._mm, 0, _MAGIC, self._seq(), epoch,
+            self.slot_minutes, self.slots_per_device, self.max_devices, 0,
+        )
+        self._mm[_HEADER_SIZE:self.size] = bytes(self.size - _HEADER_SIZE)
+        start = _UNIX_EPOCH + timedelta(minutes=epoch)
+        end = start + timedelta(minutes=self.slots_per_device * self.slot_minutes)
+        try:
+            for device_id, time_slot in loader(start, end):
+                self._set(device_id, time_slot, True)
+        except BaseException:
+            # Left not ready, with an epoch the next roll() will replace
+            struct.pack_into("<q", self._mm, _EPOCH_OFFSET, 0)
+            raise
+        struct.pack_into("<I", self._mm, _READY_OFFSET, 1)
+
+    def _load_header(self) -> None:
+        magic, _, _, slot_minutes, slots, max_devices, _ = _HEADER.unpack_from(self._mm, 0)
+        if (magic, slot_minutes, slots, max_devices) != (
+            _MAGIC, self.slot_minutes, self.slots_per_device, self.max_devices
+        ):
+            raise RuntimeError(f"Slot bitmap at {self.path} has an incompatible layout")
+
+    # Reads
+
+    def is_booked(self, device_id: int, time_slot: datetime) -> Optional[bool]:
+        """
+        Return whether the slot is booked, or None if the bitmap can't tell.
+        """
+        for _ in range(_READ_RETRIES):
+            seq = self._seq()
+            if seq & 1:
+                continue
+            # The epoch is part of the snapshot: another process may roll it
+            position = self._position(device_id, time_slot)
+            ready = struct.unpack_from("<I", self._mm, _READY_OFFSET)[0]
+            booked = position is not None and bool(self._mm[position[0]] & position[1])
+            if self._seq() == seq:
+                return booked if ready and position is not None else None
+        return None
+
+    def booked_slots(self, device_id: int, start: datetime, end: datetime) -> Optional[List[datetime]]:
+        """
+        Return the booked slot boundaries in ``[start, end)`` from one
+        consistent snapshot, or None if the range isn't covered.
+        """
+        if not 0 <= device_id < self.max_devices:
+            return None
+        row = _HEADER_SIZE + device_id * self.row_bytes
+        for _ in range(_READ_RETRIES):
+            seq = self._seq()
+            if seq & 1:
+                continue
+            epoch = self.epoch_minutes
+            ready = struct.unpack_from("<I", self._mm, _READY_OFFSET)[0]
+            data = self._mm[row:row + self.row_bytes]
+            if self._seq() == seq:
+                break
+        else:
+            return None
+        first = math.ceil(self._offset(start, epoch) / self.slot_minutes)
+        last = math.ceil(self._offset(end, epoch) / self.slot_minutes) - 1
+        if not ready or first < 0 or last >= self.slots_per_device:
+            return None
+        return [
+            self._slot_time(index, epoch)
+            for index in range(first, last + 1)
+            if data[index >> 3] & (1 << (index & 7))
+        ]
+
+    # Writes
+
+    def mark(self, device_id: int, time_slot: datetime) -> None:
+        with self._writing():
+            self._set(device_id, time_slot, True)
+
+    def clear(self, device_id: int, time_slot: datetime) -> None:
+        with self._writing():
+            self._set(device_id, time_slot, False)
+
+    def clear_device(self, device_id: int) -> None:
+        if not 0 <= device_id < self.max_devices:
+            return
+        row = _HEADER_SIZE + device_id * self.row_bytes
+        with self._writing():
+            self._mm[row:row + self.row_bytes] = bytes(self.row_bytes)
+
+    def _set(self, device_id: int, time_slot: datetime, booked: bool) -> None:
+        position = self._position(device_id, time_slot)
+        if position is None:
+            return
+        byte, mask = position
+        if booked:
+            self._mm[byte] |= mask
+        else:
+            self._mm[byte] &= ~mask & 0xFF
+
+    def _writing(self):
+        return _SeqlockWriter(self)
+
+    # Helpers
+
+    def _seq(self) -> int:
+        return struct.unpack_from("<Q", self._mm, _SEQ_OFFSET)[0]
+
+    @property
+    def epoch_minutes(self) -> int:
+        # Read from the shared header, never cached: whoever rolls the horizon
+        # moves it for every process
+        return struct.unpack_from("<q", self._mm, _EPOCH_OFFSET)[0]
+
+    def _offset(self, time_slot: datetime, epoch: Optional[int] = None) -> float:
+        if time_slot.tzinfo is not None:
+            time_slot = time_slot.replace(tzinfo=None)
+        return (time_slot - _UNIX_EPOCH).total_seconds() / 60 - (self.epoch_minutes if epoch is None else epoch)
+
+    def _index(self, device_id: int, time_slot: datetime) -> Optional[int]:
+        if not 0 <= device_id < self.max_devices:
+            return None
+        offset = self._offset(time_slot)
+        if offset % self.slot_minutes:
+            return None
+        index = int(offset // self.slot_minutes)
+        if not 0 <= index < self.slots_per_device:
+            return None
+        return index
+
+    def _position(self, device_id: int, time_slot: datetime) -> Optional[Tuple[int, int]]:
+        index = self._index(device_id, time_slot)
+        if index is None:
+            return None
+        return _HEADER_SIZE + device_id * self.row_bytes + (index >> 3), 1 << (index & 7)
+
+    def _slot_time(self, index: int, epoch: int) -> datetime:
+        return _UNIX_EPOCH + timedelta(minutes=epoch + index * self.slot_minutes)
+
+
+class _SeqlockWriter:
+    def __init__(self, bitmap: SlotBitmap):
+        self.bitmap = bitmap
+
+    def __enter__(self):
+        self.bitmap._thread_lock.acquire()
+        fcntl.flock(self.bitmap._write_lock, fcntl.LOCK_EX)
+        # Always make it odd: a writer that died mid-write left it odd already,
+        # and __exit__ must end on an even value for readers to get through
+        struct.pack_into("<Q", self.bitmap._mm, _SEQ_OFFSET, (self.bitmap._seq() + 1) | 1)
+
+    def __exit__(self, exc_type, exc, tb):
+        struct.pack_into("<Q", self.bitmap._mm, _SEQ_OFFSET, self.bitmap._seq() + 1)
+        fcntl.flock(self.bitmap._write_lock, fcntl.LOCK_UN)
+        self.bitmap._thread_lock.release()
+
+
+def _to_minutes(value: datetime) -> int:
+    return int((value - _UNIX_EPOCH).total_seconds()) // 60
+
+
+def _today_minutes() -> int:
+    return _to_minutes(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
+
+
+_slot_bitmap: Optional[SlotBitmap] = None
+_slot_bitmap_lock = threading.Lock()
+
+
+def get_slot_bitmap(db: Session) -> Optional[SlotBitmap]:
+    """
+    Return the process-wide slot bitmap, attaching to (or building) it on
+    first use. Returns None when the bitmap is disabled in settings.
+    """
+    global _slot_bitmap
+    if not settings.SLOT_BITMAP_ENABLED or fcntl is None:
+        return None
+
+    def loader(start: datetime, end: datetime):
+        from app.models.booking import Booking
+
+        # Streamed, so a large bookings table isn't held in memory at once
+        return db.execute(
+            select(Booking.device_id, Booking.time_slot)
+            .where(Booking.time_slot >= start, Booking.time_slot < end)
+            .execution_options(yield_per=1000)
+        )
+
+    if _slot_bitmap is None:
+        with _slot_bitmap_lock:
+            if _slot_bitmap is None:
+                bitmap = SlotBitmap(
+                    settings.SLOT_BITMAP_PATH,
+                    settings.SLOT_BITMAP_SLOT_MINUTES,
+                    settings.SLOT_BITMAP_HORIZON_DAYS,
+                    settings.SLOT_BITMAP_MAX_DEVICES,
+                )
+                bitmap.attach(loader)
+                _slot_bitmap = bitmap
+                return bitmap
+    _slot_bitmap.roll(loader)
+    return _slot_bitmap
+
+
+def reset_slot_bitmap() -> None:
+    """
+    Detach from the shared bitmap, e.g. between tests.
+    """
+    global _slot_bitmap
+    with _slot_bitmap_lock:
+        if _slot_bitmap is not None:
+            _slot_bitmap.close()
+        _slot_bitmap = None
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+_REPOSITORIES_DIR = os.sep + os.path.join("app", "repositories") + os.sep
+_MAX_FINGERPRINTS = 1024
+
+def fingerprint(statement: str) -> str:
+    """
+    Identify a statement independently of its literals and IN-list lengths
+    """
+    normalized = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    normalized = re.sub(r"\b\d+(\.\d+)?\b", "?", normalized)
+    normalized = re.sub(r"\(\s*\?(\s*,\s*\?)*\s*\)", "(?)", normalized)
+    normalized = " ".join(normalized.split()).upper()
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+def redact(parameters: Any) -> Any:
+    """
+    Keep numbers, dates and NULLs (useful for reproducing a plan); replace
+    strings and blobs, which may hold emails or password hashes
+    """
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    if isinstance(parameters, (datetime, date)):
+        return parameters.isoformat()
+    if parameters is None or isinstance(parameters, (bool, int, float)):
+        return parameters
+    if isinstance(parameters, (str, bytes)):
+        return f"<redacted {type(parameters).__name__}({len(parameters)})>"
+    return f"<redacted {type(parameters).__name__}>"
+
+def calling_method() -> Optional[str]:
+    """
+    The repository method called from outside the repositories (or, failing
+    that, the innermost app frame) that ran the statement
+    """
+    frame = sys._getframe(1)
+    repository_frame = fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if _REPOSITORIES_DIR in filename:
+            repository_frame = frame
+        elif repository_frame is not None:
+            break
+        elif fallback is None and os.sep + "app" + os.sep in filename and "slow_query" not in filename:
+            fallback = frame
+        frame = frame.f_back
+    frame = repository_frame or fallback
+    return _describe(frame) if frame is not None else None
+
+def _describe(frame) -> str:
+    owner = frame.f_locals.get("self")
+    name = frame.f_code.co_name
+    if owner is not None:
+        name = f"{type(owner).__name__}.{name}"
+    return f"{name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+
+class SlowQueryLog:
+    """
+    Log statements slower than SLOW_QUERY_THRESHOLD_MS with redacted
+    parameters, the calling repository method and, for a sample of them,
+    SQLite's EXPLAIN QUERY PLAN. A plan is captured at most once per
+    fingerprint every SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS.
+    """
+    def __init__(self):
+        self._explained_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+            conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("slow_query_started")
+        if not started:
+            return
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1e3
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is None or elapsed_ms < threshold:
+            return
+
+        key = fingerprint(statement)
+        plan = None
+        if conn.dialect.name == "sqlite" and self._should_explain(key, statement):
+            plan = self._explain(cursor.connection, statement, parameters[0] if executemany and parameters else parameters)
+        params = redact(parameters[0] if executemany and parameters else parameters)
+        caller = calling_method()
+        logger.warning(
+            "Slow query %.1f ms [%s] in %s: %s params=%s%s%s",
+            elapsed_ms, key, caller, " ".join(statement.split()), params,
+            f" (executemany x{len(parameters)})" if executemany else "",
+            "\n" + "\n".join(plan) if plan else "",
+            extra={
+                "fingerprint": key,
+                "duration_ms": round(elapsed_ms, 2),
+                "statement": statement,
+                "params": params,
+                "caller": caller,
+                "plan": plan,
+            }
+        )
+
+    def _error(self, exception_context):
+        # A failed statement never reaches _after; drop its start time so the
+        # next statement on this connection isn't timed from it
+        conn = exception_context.connection
+        started = conn.info.get("slow_query_started") if conn is not None else None
+        if started:
+            started.pop()
+
+    def _should_explain(self, key: str, statement: str) -> bool:
+        if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return False
+        if random.random() >= settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(key)
+            if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+                return False
+            if len(self._explained_at) >= _MAX_FINGERPRINTS:
+                self._explained_at.clear()
+            self._explained_at[key] = now
+        return True
+
+    def _explain(self, dbapi_connection, statement: str, parameters: Any) -> Optional[List[str]]:
+        # A raw cursor, so the EXPLAIN itself doesn't go through these events
+        try:
+            cursor = dbapi_connection.cursor()
+            try:
+                rows = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+            finally:
+                cursor.close()
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+        depth = {0: 0}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, 0) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._explained_at.clear()
+
+slow_query_log = SlowQueryLog()
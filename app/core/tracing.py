@@ -0,0 +1,263 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+import types
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import Settings, settings
+from app.core.metrics import route_template
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "thread_id", "attributes")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        # list.append is atomic, so spans can finish on any thread
+        self.trace.spans.append(self)
+
+class Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Child span of the current one. Outside a sampled trace this is a no-op
+    that yields None, so instrumented code costs one contextvar lookup.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator wrapping a function in a span named after it
+    """
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with start_span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def traced_methods(cls):
+    """
+    Class decorator tracing every public method, for services and repositories
+    """
+    for attr, value in list(vars(cls).items()):
+        if isinstance(value, types.FunctionType) and not attr.startswith("_"):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+# SQL statements become spans of whatever is current when they run
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is not None:
+        span = Span(parent.trace, "sql", parent.span_id, {"db.statement": statement, "db.executemany": executemany})
+        conn.info.setdefault("tracing_spans", []).append(span)
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("tracing_spans")
+    if spans:
+        spans.pop().end()
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute: end its span
+    # here, or it (and its whole trace) stays on the pooled connection
+    conn = exception_context.connection
+    spans = conn.info.get("tracing_spans") if conn is not None else None
+    if spans:
+        span = spans.pop()
+        span.attributes["error"] = type(exception_context.original_exception).__name__
+        span.end()
+
+# --- Export ---
+
+def to_otlp(trace: Trace) -> Dict:
+    """
+    OTLP/JSON (ExportTraceServiceRequest), as accepted by an OTLP/HTTP collector
+    """
+    def value(v):
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": settings.PROJECT_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": "app.core.tracing"},
+            "spans": [
+                {
+                    "traceId": trace.trace_id,
+                    "spanId": span.span_id,
+                    **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                    "name": span.name,
+                    "kind": 2 if span.parent_id is None else 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [{"key": k, "value": value(v)} for k, v in span.attributes.items()],
+                    # STATUS_CODE_ERROR
+                    **({"status": {"code": 2, "message": span.attributes["error"]}} if "error" in span.attributes else {}),
+                }
+                for span in trace.spans
+            ],
+        }],
+    }]}
+
+def to_chrome(trace: Trace) -> List[Dict]:
+    """
+    Chrome trace events (about:tracing, Perfetto, speedscope), one row per thread
+    """
+    return [
+        {
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": span.thread_id,
+            "args": {"trace_id": trace.trace_id, **{k: str(v) for k, v in span.attributes.items()}},
+        }
+        for span in sorted(trace.spans, key=lambda span: span.start_ns)
+    ]
+
+class TraceExporter:
+    """
+    Keeps the last TRACING_BUFFER_SIZE traces in memory and, with
+    TRACING_FILE set, appends each one to that file: one OTLP/JSON document
+    per line, or Chrome trace events in the JSON array format (whose closing
+    bracket is optional, so the file stays loadable while it grows).
+    """
+    def __init__(self, buffer_size: int, path: Optional[str], format: str):
+        self.traces: Deque[Trace] = deque(maxlen=buffer_size)
+        self.path = path
+        self.format = format
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        self.traces.append(trace)
+        if not self.path:
+            return
+        with self._lock:
+            with open(self.path, "a") as f:
+                if self.format == "chrome":
+                    if f.tell() == 0:
+                        f.write("[\n")
+                    for trace_event in to_chrome(trace):
+                        f.write(json.dumps(trace_event) + ",\n")
+                else:
+                    f.write(json.dumps(to_otlp(trace)) + "\n")
+
+    def render(self, format: str) -> Any:
+        traces = list(self.traces)
+        if format == "chrome":
+            return {"traceEvents": [trace_event for trace in traces for trace_event in to_chrome(trace)]}
+        return [to_otlp(trace) for trace in traces]
+
+_exporter: Optional[TraceExporter] = None
+_exporter_lock = threading.Lock()
+
+def get_trace_exporter() -> TraceExporter:
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = TraceExporter(settings.TRACING_BUFFER_SIZE, settings.TRACING_FILE, settings.TRACING_FORMAT)
+    return _exporter
+
+def reset_trace_exporter() -> None:
+    global _exporter
+    with _exporter_lock:
+        _exporter = None
+
+def _incoming_trace_id(scope) -> Optional[str]:
+    # W3C traceparent: version-traceid-parentid-flags; join sampled upstream traces
+    for name, value in scope["headers"]:
+        if name == b"traceparent":
+            parts = value.decode("latin-1").split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and parts[3] in ("01", "03"):
+                return parts[1]
+    return None
+
+class TracingMiddleware:
+    """
+    Start a root span for a TRACING_SAMPLE_RATE sample of requests (and for
+    requests whose W3C traceparent is sampled) and export the finished trace.
+    Unsampled requests run with no current span, so every layer below skips
+    its tracing work.
+    """
+    def __init__(self, app, app_settings: Settings = settings):
+        self.app = app
+        self.settings = app_settings
+
+    async def __call__(self, scope, receive, send):
+        if not self.settings.TRACING_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace_id = _incoming_trace_id(scope)
+        if trace_id is None and random.random() >= self.settings.TRACING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(Trace(trace_id), f"{scope['method']} {scope['path']}", None, {"http.method": scope["method"]})
+        token = _current_span.set(root)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_span.reset(token)
+            root.name = f"{scope['method']} {route_template(scope)}"
+            root.attributes["http.route"] = route_template(scope)
+            root.end()
+            get_trace_exporter().export(root.trace)
@@ -1,52 +1,133 @@
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-
-from app.core.config import settings
-from app.core.database import engine, Base, get_db
-from app.api.endpoints import users, auth, devices, bookings
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION,
-    description="FastAPI Backend Application",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
-
-# Set up CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins in development
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"]
-)
-
-# Include routers
-app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
-app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
-app.include_router(devices.router, prefix=f"{settings.API_V1_STR}/devices", tags=["devices"])
-app.include_router(bookings.router, prefix=f"{settings.API_V1_STR}/bookings", tags=["bookings"])
-
-@app.get("/")
-async def root():
-    return {"message": "Welcome to FastAPI Backend Application"}
-
-@app.get("/db-test")
-def test_db(db: Session = Depends(get_db)):
+
+from app.core.config import Settings, settings
+
+def create_app(app_settings: Optional[Settings] = None) -> FastAPI:
     """
-    Test endpoint to verify database connection
+    Build the application. Routers, models and their dependencies (passlib,
+    jose, email-validator, SQLAlchemy) are imported here rather than when
+    this module is imported, and the schema is brought up to date in the
+    lifespan. Run with ``uvicorn --factory app.main:create_app``.
+
+    ``app_settings`` applies to this app: its database (engine, sessions,
+    migrations and readiness check, kept in app.state), the middlewares
+    (admission, metrics, query stats, profiler and tracing switches and
+    limits), the profile store, the routes and OpenAPI, and the backup
+    schedule. What is shared by the whole process still comes from the
+    global ``settings`` (read from the environment and .env when
+    app.core.config is first imported): tokens and ADMIN_EMAILS for the API, the admission
+    classes, bulkheads, single-flight groups, idempotency, the device index,
+    the slot bitmap, the trace exporter, the metric buckets and the backup
+    manager, which backs up the global DATABASE_URL.
     """
-    try:
-        # Try to make a simple query using text()
-        db.execute(text("SELECT 1"))
-        db.commit()
-        return {"message": "Database connection successful"}
-    except Exception as e:
-        db.rollback()
-        return {"message": f"Database connection failed: {str(e)}"} 
\ No newline at end of file
+    from sqlalchemy.orm import Session, sessionmaker
+    from sqlalchemy import text
+
+    from app.core.admission import AdmissionMiddleware
+    from app.core.backup import BackupScheduler, get_backup_manager
+    from app.core.database import SessionLocal, engine, get_db, init_db, make_engine
+    from app.core.health import database_health_check
+    from app.core.metrics import MetricsMiddleware, instrument_engine
+    from app.core.openapi import install_openapi_cache
+    from app.core.profiler import ProfilerMiddleware
+    from app.core.query_stats import QueryStatsMiddleware
+    from app.core.tracing import TracingMiddleware
+    from app.api.endpoints import users, auth, devices, bookings, monitoring, admin
+
+    app_settings = app_settings or settings
+    if app_settings.DATABASE_URL == settings.DATABASE_URL:
+        app_engine, session_factory = engine, SessionLocal
+    else:
+        app_engine = make_engine(app_settings.DATABASE_URL)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=app_engine)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if app_settings.DATABASE_INIT_ON_STARTUP:
+            init_db(app_engine)
+        scheduler = None
+        if app_settings.BACKUP_INTERVAL_SECONDS:
+            scheduler = BackupScheduler(
+                get_backup_manager(),
+                app_settings.BACKUP_INTERVAL_SECONDS,
+                app_settings.BACKUP_METHOD,
+                app_settings.BACKUP_COMPRESS
+            )
+            scheduler.start()
+        yield
+        if scheduler is not None:
+            scheduler.stop()
+        if app_engine is not engine:
+            app_engine.dispose()
+
+    app = FastAPI(
+        title=app_settings.PROJECT_NAME,
+        version=app_settings.VERSION,
+        description="FastAPI Backend Application",
+        openapi_url=f"{app_settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan
+    )
+    app.state.settings = app_settings
+    app.state.engine = app_engine
+    app.state.session_factory = session_factory
+    app.state.health = database_health_check(app_engine, app_settings.HEALTH_CHECK_INTERVAL_SECONDS)
+
+    # Innermost of the middlewares, so CORS and metrics also see shed requests
+    app.add_middleware(AdmissionMiddleware, app_settings=app_settings)
+    # Set up CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allow all origins in development
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["*"]
+    )
+    app.add_middleware(TracingMiddleware, app_settings=app_settings)
+    app.add_middleware(ProfilerMiddleware, app_settings=app_settings)
+    app.add_middleware(QueryStatsMiddleware, app_settings=app_settings)
+    app.add_middleware(MetricsMiddleware, app_settings=app_settings)
+    instrument_engine(app_engine)
+
+    # Include routers
+    app.include_router(users.router, prefix=f"{app_settings.API_V1_STR}/users", tags=["users"])
+    app.include_router(auth.router, prefix=f"{app_settings.API_V1_STR}/auth", tags=["auth"])
+    app.include_router(devices.router, prefix=f"{app_settings.API_V1_STR}/devices", tags=["devices"])
+    app.include_router(bookings.router, prefix=f"{app_settings.API_V1_STR}/bookings", tags=["bookings"])
+    app.include_router(admin.router, prefix=f"{app_settings.API_V1_STR}/admin", tags=["admin"])
+    app.include_router(monitoring.router, tags=["monitoring"])
+    install_openapi_cache(app, app_settings.OPENAPI_CACHE_PATH)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Welcome to FastAPI Backend Application"}
+
+    @app.get("/db-test")
+    def test_db(db: Session = Depends(get_db)):
+        """
+        Test endpoint to verify database connection
+        """
+        try:
+            # Try to make a simple query using text()
+            db.execute(text("SELECT 1"))
+            db.commit()
+            return {"message": "Database connection successful"}
+        except Exception as e:
+            db.rollback()
+            return {"message": f"Database connection failed: {str(e)}"}
+
+    return app
+
+_app: Optional[FastAPI] = None
+
+def __getattr__(name: str):
+    # ``app.main:app`` keeps working, but the app is only built when asked for
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint, DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,7 +6,7 @@ from app.core.database import Base
 class Booking(Base):
     __tablename__ = "bookings"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     description = Column(String, nullable=False)
@@ -14,6 +14,8 @@ class Booking(Base):
     address = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped by every update (see BookingRepository); ETags and If-Match use it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Relationships
     device = relationship("Device", back_populates="bookings")
@@ -22,4 +24,45 @@ class Booking(Base):
     # Ensure no double booking for the same time slot
     __table_args__ = (
         UniqueConstraint('device_id', 'time_slot', name='unique_device_time_slot'),
-    ) 
\ No newline at end of file
+        # A user's bookings, and owner-filtered search
+        Index('ix_bookings_user_id_time_slot', 'user_id', 'time_slot'),
+    )
+
+# Full-text index over description and address (SQLite FTS5). It is an
+# external-content table, so it stores only the index; triggers keep it in
+# sync with every insert, update and delete on bookings.
+BOOKINGS_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS bookings_fts USING fts5(
+        description, address, content='bookings', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookings_fts_insert AFTER INSERT ON bookings BEGIN
+        INSERT INTO bookings_fts(rowid, description, address)
+        VALUES (new.id, new.description, new.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookings_fts_delete AFTER DELETE ON bookings BEGIN
+        INSERT INTO bookings_fts(bookings_fts, rowid, description, address)
+        VALUES ('delete', old.id, old.description, old.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookings_fts_update AFTER UPDATE OF description, address ON bookings BEGIN
+        INSERT INTO bookings_fts(bookings_fts, rowid, description, address)
+        VALUES ('delete', old.id, old.description, old.address);
+        INSERT INTO bookings_fts(rowid, description, address)
+        VALUES (new.id, new.description, new.address);
+    END
+    """,
+    # Index rows that existed before the table was created
+    "INSERT INTO bookings_fts(bookings_fts) VALUES ('rebuild')",
+]
+
+for statement in BOOKINGS_FTS_DDL:
+    event.listen(Booking.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Booking.__table__, "before_drop", DDL("DROP TABLE IF EXISTS bookings_fts").execute_if(dialect="sqlite")
+)
\ No newline at end of file
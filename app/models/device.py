@@ -8,5 +8,6 @@ class Device(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     
-    # Add relationship to bookings
-    bookings = relationship("Booking", back_populates="device", cascade="all, delete-orphan") 
\ No newline at end of file
+    # Add relationship to bookings. Deletes cascade in the database (ondelete="CASCADE"
+    # on the foreign key), so the ORM never loads the bookings just to delete them.
+    bookings = relationship("Booking", back_populates="device", cascade="all, delete-orphan", passive_deletes=True) 
\ No newline at end of file
@@ -11,5 +11,6 @@ class User(Base):
     password = Column(String, nullable=False)
     address = Column(String, nullable=True)
     
-    # Add relationship to bookings
-    bookings = relationship("Booking", back_populates="user", cascade="all, delete-orphan") 
\ No newline at end of file
+    # Add relationship to bookings. Deletes cascade in the database (ondelete="CASCADE"
+    # on the foreign key), so the ORM never loads the bookings just to delete them.
+    bookings = relationship("Booking", back_populates="user", cascade="all, delete-orphan", passive_deletes=True) 
\ No newline at end of file
@@ -1,10 +1,19 @@
+from sqlalchemy import DateTime, select, text, update, delete
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from typing import List, Optional
+from app.core.metrics import cache_lookups
+from app.core.slot_bitmap import get_slot_bitmap
 from app.models.booking import Booking
+from app.repositories.records import BookingRecord
 from app.schemas.booking import BookingCreate, BookingUpdate
+from app.core.tracing import traced_methods
 
+_BOOKING_RECORD_COLUMNS = [getattr(Booking, field) for field in BookingRecord._fields]
+
+@traced_methods
 class BookingRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -21,11 +30,46 @@ class BookingRepository:
             self.db.add(db_booking)
             self.db.commit()
             self.db.refresh(db_booking)
-            return db_booking
         except IntegrityError:
             self.db.rollback()
             raise ValueError("This time slot is already booked for the selected device")
 
+        slot_bitmap = get_slot_bitmap(self.db)
+        if slot_bitmap is not None:
+            slot_bitmap.mark(db_booking.device_id, db_booking.time_slot)
+        return db_booking
+
+    def create_bookings(self, bookings: List[BookingCreate], user_id: int) -> List[Booking]:
+        """
+        Insert all bookings in one transaction; either all are created or none.
+        """
+        db_bookings = [
+            Booking(
+                device_id=booking.device_id,
+                user_id=user_id,
+                description=booking.description,
+                time_slot=booking.time_slot,
+                address=booking.address
+            )
+            for booking in bookings
+        ]
+        try:
+            self.db.add_all(db_bookings)
+            self.db.flush()
+            # Everything is loaded by the flush; detach so the commit doesn't expire it
+            for db_booking in db_bookings:
+                self.db.expunge(db_booking)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError("This time slot is already booked for the selected device")
+
+        slot_bitmap = get_slot_bitmap(self.db)
+        if slot_bitmap is not None:
+            for db_booking in db_bookings:
+                slot_bitmap.mark(db_booking.device_id, db_booking.time_slot)
+        return db_bookings
+
     def get_booking(self, booking_id: int) -> Optional[Booking]:
         return self.db.query(Booking).filter(Booking.id == booking_id).first()
 
@@ -35,6 +79,40 @@ class BookingRepository:
     def get_device_bookings(self, device_id: int) -> List[Booking]:
         return self.db.query(Booking).filter(Booking.device_id == device_id).all()
 
+    def get_user_booking_records(self, user_id: int) -> List[BookingRecord]:
+        return self._booking_records(Booking.user_id == user_id)
+
+    def get_device_booking_records(self, device_id: int) -> List[BookingRecord]:
+        return self._booking_records(Booking.device_id == device_id)
+
+    def _booking_records(self, *criteria) -> List[BookingRecord]:
+        # Column-projected select: plain tuples, no ORM instances
+        rows = self.db.execute(select(*_BOOKING_RECORD_COLUMNS).where(*criteria))
+        return list(map(BookingRecord._make, rows))
+
+    def search_bookings(self, query: str, user_id: Optional[int], limit: int, offset: int) -> List[Row]:
+        """
+        Full-text search over description and address, best BM25 match first.
+        ``query`` is an FTS5 MATCH expression; ``user_id`` restricts the
+        results to one user's bookings.
+        """
+        owner_filter = "AND b.user_id = :user_id" if user_id is not None else ""
+        rows = self.db.execute(
+            text(f"""
+                SELECT b.id, b.device_id, b.user_id, b.description, b.time_slot, b.address,
+                       b.created_at, b.updated_at, b.version,
+                       snippet(bookings_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+                       bm25(bookings_fts) AS rank
+                FROM bookings_fts
+                JOIN bookings AS b ON b.id = bookings_fts.rowid
+                WHERE bookings_fts MATCH :query {owner_filter}
+                ORDER BY rank
+                LIMIT :limit OFFSET :offset
+            """).columns(time_slot=DateTime, created_at=DateTime, updated_at=DateTime),
+            {"query": query, "user_id": user_id, "limit": limit, "offset": offset}
+        )
+        return rows.all()
+
     def update_booking(self, booking_id: int, booking_update: BookingUpdate) -> Optional[Booking]:
         db_booking = self.get_booking(booking_id)
         if not db_booking:
@@ -52,27 +130,105 @@ class BookingRepository:
             if existing_booking:
                 raise ValueError("This time slot is already booked for the selected device")
 
+        previous_time_slot = db_booking.time_slot
         for key, value in update_data.items():
             setattr(db_booking, key, value)
+        if self.db.is_modified(db_booking):
+            # Last writer wins here; If-Match requests use update_booking_if_version
+            db_booking.version = Booking.version + 1
 
         try:
             self.db.commit()
             self.db.refresh(db_booking)
-            return db_booking
         except IntegrityError:
             self.db.rollback()
             raise ValueError("Failed to update booking")
 
+        slot_bitmap = get_slot_bitmap(self.db)
+        if slot_bitmap is not None and db_booking.time_slot != previous_time_slot:
+            slot_bitmap.clear(db_booking.device_id, previous_time_slot)
+            slot_bitmap.mark(db_booking.device_id, db_booking.time_slot)
+        return db_booking
+
+    def update_booking_if_version(
+        self, booking_id: int, user_id: int, version: int, booking_update: BookingUpdate
+    ) -> Optional[Booking]:
+        """
+        Apply the update in a single UPDATE whose WHERE clause checks the owner
+        and the expected version. Returns None if no row matched.
+        """
+        update_data = booking_update.model_dump(exclude_unset=True)
+
+        previous = None
+        slot_bitmap = get_slot_bitmap(self.db)
+        if slot_bitmap is not None and 'time_slot' in update_data:
+            previous = self.db.execute(
+                select(Booking.device_id, Booking.time_slot).where(Booking.id == booking_id)
+            ).first()
+
+        stmt = (
+            update(Booking)
+            .where(Booking.id == booking_id, Booking.user_id == user_id, Booking.version == version)
+            .values(**update_data, version=Booking.version + 1, updated_at=datetime.utcnow())
+            .returning(Booking)
+        )
+        try:
+            db_booking = self.db.execute(stmt).scalar_one_or_none()
+            if db_booking is not None:
+                # Keep the returned values; committing would otherwise expire them
+                self.db.expunge(db_booking)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError("This time slot is already booked for the selected device")
+
+        if db_booking is not None and previous is not None and previous.time_slot != db_booking.time_slot:
+            slot_bitmap.clear(previous.device_id, previous.time_slot)
+            slot_bitmap.mark(db_booking.device_id, db_booking.time_slot)
+        return db_booking
+
     def delete_booking(self, booking_id: int) -> bool:
         db_booking = self.get_booking(booking_id)
         if not db_booking:
             return False
         
+        device_id, time_slot = db_booking.device_id, db_booking.time_slot
         self.db.delete(db_booking)
         self.db.commit()
+
+        slot_bitmap = get_slot_bitmap(self.db)
+        if slot_bitmap is not None:
+            slot_bitmap.clear(device_id, time_slot)
+        return True
+
+    def delete_booking_if_version(self, booking_id: int, user_id: int, version: int) -> bool:
+        """
+        Delete the booking in a single DELETE whose WHERE clause checks the owner
+        and the expected version. Returns False if no row matched.
+        """
+        deleted = self.db.execute(
+            delete(Booking)
+            .where(Booking.id == booking_id, Booking.user_id == user_id, Booking.version == version)
+            .returning(Booking.device_id, Booking.time_slot)
+        ).first()
+        self.db.commit()
+        if deleted is None:
+            return False
+
+        slot_bitmap = get_slot_bitmap(self.db)
+        if slot_bitmap is not None:
+            slot_bitmap.clear(deleted.device_id, deleted.time_slot)
         return True
 
     def check_time_slot_availability(self, device_id: int, time_slot: datetime) -> bool:
+        slot_bitmap = get_slot_bitmap(self.db)
+        if slot_bitmap is not None:
+            booked = slot_bitmap.is_booked(device_id, time_slot)
+            if booked is not None:
+                cache_lookups.labels("slot_bitmap", "hit").inc()
+                return not booked
+            cache_lookups.labels("slot_bitmap", "miss").inc()
+
         existing_booking = self.db.query(Booking).filter(
             Booking.device_id == device_id,
             Booking.time_slot == time_slot
@@ -1,8 +1,15 @@
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from app.core.slot_bitmap import get_slot_bitmap
 from app.models.device import Device
+from app.repositories.records import DeviceRecord
 from app.schemas.device import DeviceCreate
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set
+from app.core.tracing import traced_methods
 
+@traced_methods
 class DeviceRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -10,12 +17,75 @@ class DeviceRepository:
     def get_device(self, device_id: int) -> Optional[Device]:
         return self.db.query(Device).filter(Device.id == device_id).first()
 
+    def get_existing_device_ids(self, device_ids: Iterable[int]) -> Set[int]:
+        return set(self.db.scalars(select(Device.id).where(Device.id.in_(set(device_ids)))))
+
     def get_all_devices(self) -> List[Device]:
         return self.db.query(Device).all()
 
+    def get_all_device_records(self) -> List[DeviceRecord]:
+        rows = self.db.execute(select(Device.id, Device.name))
+        return list(map(DeviceRecord._make, rows))
+
+    def get_device_records_page(self, after_id: int, limit: int) -> List[DeviceRecord]:
+        """
+        Keyset pagination: the next ``limit`` devices by id after ``after_id``
+        """
+        rows = self.db.execute(
+            select(Device.id, Device.name).where(Device.id > after_id).order_by(Device.id).limit(limit)
+        )
+        return list(map(DeviceRecord._make, rows))
+
+    def get_device_records_after(self, after_id: int) -> List[DeviceRecord]:
+        rows = self.db.execute(select(Device.id, Device.name).where(Device.id > after_id))
+        return list(map(DeviceRecord._make, rows))
+
+    def get_device_records_by_ids(self, device_ids: Iterable[int]) -> Dict[int, DeviceRecord]:
+        rows = self.db.execute(select(Device.id, Device.name).where(Device.id.in_(set(device_ids))))
+        return {row.id: DeviceRecord._make(row) for row in rows}
+
     def create_device(self, device: DeviceCreate) -> Device:
         db_device = Device(name=device.name)
         self.db.add(db_device)
         self.db.commit()
         self.db.refresh(db_device)
-        return db_device 
\ No newline at end of file
+        return db_device 
+
+    def upsert_devices(self, devices: List[dict]) -> int:
+        """
+        Write one batch of devices with executemany and commit it. Rows with
+        an ``id`` are upserted on it, rows without one are inserted. On a
+        database error the whole batch is rolled back and the error re-raised.
+        """
+        with_id = [device for device in devices if device.get("id") is not None]
+        without_id = [{"name": device["name"]} for device in devices if device.get("id") is None]
+        try:
+            if with_id:
+                stmt = sqlite_insert(Device.__table__)
+                self.db.execute(
+                    stmt.on_conflict_do_update(index_elements=["id"], set_={"name": stmt.excluded.name}),
+                    with_id
+                )
+            if without_id:
+                self.db.execute(Device.__table__.insert(), without_id)
+            self.db.commit()
+        except SQLAlchemyError:
+            # Nothing of the batch is kept
+            self.db.rollback()
+            raise
+        return len(devices)
+
+    def delete_device(self, device_id: int) -> bool:
+        """
+        Delete a device with one statement; its bookings are removed by the
+        database's ON DELETE CASCADE without being loaded.
+        """
+        result = self.db.execute(delete(Device).where(Device.id == device_id))
+        self.db.commit()
+        if not result.rowcount:
+            return False
+
+        slot_bitmap = get_slot_bitmap(self.db)
+        if slot_bitmap is not None:
+            slot_bitmap.clear_device(device_id)
+        return True
\ No newline at end of file
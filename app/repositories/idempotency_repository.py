@@ -0,0 +1,128 @@
+from contextlib import contextmanager
+from sqlalchemy import delete, event, insert, literal_column, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+from app.models.idempotency_key import IdempotencyKey
+from app.core.tracing import traced_methods
+
+# status_code of a record whose attempt has committed its work but whose
+# response isn't recorded yet
+COMMITTED = 0
+
+@traced_methods
+class IdempotencyRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, user_id: int, key: str) -> Optional[Row]:
+        # Plain rows rather than ORM instances: records are re-inserted by key,
+        # which would clash with instances kept in the identity map
+        return self.db.execute(
+            select(
+                IdempotencyKey.fingerprint,
+                IdempotencyKey.status_code,
+                IdempotencyKey.response_body,
+                IdempotencyKey.expires_at
+            ).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at > datetime.utcnow()
+            )
+        ).first()
+
+    def try_begin(self, user_id: int, key: str, fingerprint: str, ttl: timedelta, stale_after: timedelta) -> bool:
+        """
+        Claim the key by inserting a pending record. Expired records and
+        pending records abandoned for longer than ``stale_after`` are replaced.
+        Returns False if someone else holds the key.
+        """
+        now = datetime.utcnow()
+        self.db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expires_at <= now,
+                    (IdempotencyKey.status_code.is_(None)) & (IdempotencyKey.created_at <= now - stale_after)
+                )
+            )
+        )
+        try:
+            self.db.execute(
+                insert(IdempotencyKey).values(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                    expires_at=now + ttl
+                )
+            )
+            self.db.commit()
+            return True
+        except IntegrityError:
+            self.db.rollback()
+            return False
+
+    @contextmanager
+    def marking_commits(self, user_id: int, key: str) -> Iterator[None]:
+        """
+        While the block runs, every commit of this session also marks the
+        pending record COMMITTED, in the same transaction. The work done under
+        the key is then never repeated, even if recording its response fails.
+        """
+        def mark(session):
+            session.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.status_code.is_(None)
+                )
+                .values(status_code=COMMITTED)
+            )
+
+        event.listen(self.db, "before_commit", mark)
+        try:
+            yield
+        finally:
+            event.remove(self.db, "before_commit", mark)
+
+    def complete(self, user_id: int, key: str, status_code: int, response_body: str) -> None:
+        try:
+            self.db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                .values(status_code=status_code, response_body=response_body)
+            )
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+
+    def release(self, user_id: int, key: str) -> None:
+        self.db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status_code.is_(None)
+            )
+        )
+        self.db.commit()
+
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        """
+        Delete expired records, at most ``limit`` of them (oldest first)
+        """
+        expired = select(literal_column("rowid")).where(IdempotencyKey.expires_at <= datetime.utcnow())
+        if limit is not None:
+            expired = expired.order_by(IdempotencyKey.expires_at).limit(limit)
+        try:
+            result = self.db.execute(delete(IdempotencyKey).where(literal_column("rowid").in_(expired)))
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        return result.rowcount
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+# Lightweight read models for list endpoints. They're built straight from
+# column-projected Core rows, so they never enter the session's identity map
+# and carry no ORM instrumentation or change tracking.
+
+class BookingRecord(NamedTuple):
+    id: int
+    device_id: int
+    user_id: int
+    description: str
+    time_slot: datetime
+    address: str
+    created_at: datetime
+    updated_at: datetime
+    version: int
+
+class DeviceRecord(NamedTuple):
+    id: int
+    name: str
+
+class UserRecord(NamedTuple):
+    id: int
+    name: str
+    email: str
+    address: Optional[str]
@@ -1,10 +1,15 @@
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
+from typing import Dict, Iterable
+from app.core.slot_bitmap import get_slot_bitmap
+from app.models.booking import Booking
 from app.models.user import User
+from app.repositories.records import UserRecord
 from app.schemas.user import UserCreate
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.security import get_password_hash
+from app.core.tracing import traced_methods
 
+@traced_methods
 class UserRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -12,8 +17,14 @@ class UserRepository:
     def get_user_by_email(self, email: str) -> User | None:
         return self.db.query(User).filter(User.email == email).first()
 
+    def get_user_records_by_ids(self, user_ids: Iterable[int]) -> Dict[int, UserRecord]:
+        rows = self.db.execute(
+            select(User.id, User.name, User.email, User.address).where(User.id.in_(set(user_ids)))
+        )
+        return {row.id: UserRecord._make(row) for row in rows}
+
     def create_user(self, user: UserCreate) -> User:
-        hashed_password = pwd_context.hash(user.password)
+        hashed_password = get_password_hash(user.password)
         db_user = User(
             name=user.name,
             email=user.email,
@@ -23,4 +34,25 @@ class UserRepository:
         self.db.add(db_user)
         self.db.commit()
         self.db.refresh(db_user)
-        return db_user 
\ No newline at end of file
+        return db_user 
+
+    def delete_user(self, user_id: int) -> bool:
+        """
+        Delete a user with one statement; their bookings are removed by the
+        database's ON DELETE CASCADE without being loaded.
+        """
+        slot_bitmap = get_slot_bitmap(self.db)
+        slots = []
+        if slot_bitmap is not None:
+            slots = self.db.execute(
+                select(Booking.device_id, Booking.time_slot).where(Booking.user_id == user_id)
+            ).all()
+
+        result = self.db.execute(delete(User).where(User.id == user_id))
+        self.db.commit()
+        if not result.rowcount:
+            return False
+
+        for device_id, time_slot in slots:
+            slot_bitmap.clear(device_id, time_slot)
+        return True
\ No newline at end of file
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from app.schemas.device import DeviceResponse
+from app.schemas.user import UserResponse
 
 class BookingBase(BaseModel):
     device_id: int
@@ -8,14 +10,16 @@ class BookingBase(BaseModel):
     time_slot: datetime
     address: str = Field(..., min_length=1)
 
+class BookingCreate(BookingBase):
+    # Only new bookings must be in the future; responses include past ones
     @field_validator('time_slot')
     def validate_time_slot(cls, v):
         if v < datetime.now():
             raise ValueError("Cannot book a time slot in the past")
         return v
 
-class BookingCreate(BookingBase):
-    pass
+class BookingBatchCreate(BaseModel):
+    bookings: List[BookingCreate] = Field(..., min_length=1, max_length=100)
 
 class BookingUpdate(BaseModel):
     description: Optional[str] = Field(None, min_length=1)
@@ -33,6 +37,18 @@ class BookingResponse(BookingBase):
     user_id: int
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class BookingExpandedResponse(BookingResponse):
+    # Only present when requested with ?expand=device / ?expand=user
+    device: Optional[DeviceResponse] = None
+    user: Optional[UserResponse] = None
+
+class BookingSearchResult(BookingResponse):
+    # Matching text with hits wrapped in <mark></mark>
+    snippet: str
+    # BM25 score; lower is a better match
+    rank: float
\ No newline at end of file
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class DeviceBase(BaseModel):
     name: str = Field(..., min_length=1)
@@ -10,4 +11,19 @@ class DeviceResponse(DeviceBase):
     id: int
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class DeviceImportError(BaseModel):
+    line: int
+    error: str
+
+class DeviceImportResult(BaseModel):
+    processed: int
+    imported: int
+    failed: int
+    # Only the first errors are kept so memory stays bounded
+    errors: List[DeviceImportError]
+    # Why the import stopped before the end of the file; batches written until then are kept
+    aborted: Optional[str] = None
+    elapsed_seconds: float
+    rows_per_second: float
\ No newline at end of file
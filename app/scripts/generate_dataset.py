@@ -0,0 +1,266 @@
+"""
+Fill a database with a synthetic, production-sized dataset.
+
+Usage:
+    python -m app.scripts.generate_dataset --users 1000000 --devices 20000 --bookings 5000000
+    python -m app.scripts.generate_dataset --database /tmp/big.db --seed 7 --reset
+    python -m app.scripts.generate_dataset --start today --days 30
+
+The distributions are skewed the way real traffic is: a few hot devices take
+most of the bookings, bookings cluster in weekday working hours, and most
+users book rarely while a long tail books a lot. The same seed and --start
+always produce the same rows, whatever day the script runs.
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.database import Base
+from app.core.migrations import upgrade_database
+from app.core.security import get_password_hash
+from app.models.booking import BOOKINGS_FTS_DDL, Booking
+from app.models.device import Device
+from app.models.idempotency_key import IdempotencyKey  # noqa: F401 - registers the table
+from app.models.user import User
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carla", "Dmitri", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonas",
+    "Kemal", "Lena", "Marco", "Nadia", "Omar", "Priya", "Quentin", "Rosa", "Sven", "Tara",
+]
+LAST_NAMES = [
+    "Smith", "Garcia", "Ivanova", "Kim", "Müller", "Rossi", "Nguyen", "Okafor", "Silva", "Tanaka",
+    "Cohen", "Larsen", "Haddad", "Novak", "Dubois", "Patel", "Jensen", "Kowalski", "Moreau", "Sato",
+]
+STREETS = [
+    "Main St", "Oak Ave", "Elm St", "Harbour Rd", "Station Sq", "Mill Lane", "Park Blvd",
+    "Church St", "King St", "Market Pl", "River Rd", "Hill Crescent",
+]
+DEVICE_MODELS = [
+    "MacBook Pro 16-inch", "MacBook Air", "iPhone 15 Pro", "iPad Pro", "Dell XPS 15", "ThinkPad X1 Carbon",
+    "Samsung Galaxy S24", "Google Pixel 8", "Surface Laptop 5", "HP Spectre x360", "Sony WH-1000XM5",
+    "Apple Watch Series 9", "Canon EOS R6", "DJI Mini 4 Pro", "Oculus Quest 3", "Kindle Paperwhite",
+]
+DESCRIPTIONS = [
+    "Screen repair", "Battery replacement", "Keyboard not responding", "Water damage inspection",
+    "Software reinstall", "Data recovery", "Charging port repair", "Camera calibration",
+    "Speaker crackling", "Annual maintenance", "Overheating under load", "Cracked back glass",
+]
+# Relative booking volume per hour of day: closed at night, peaks late morning and mid-afternoon
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 3, 8, 12, 14, 11, 6, 9, 12, 13, 10, 6, 3, 2, 1, 0, 0, 0]
+# Monday..Sunday
+WEEKDAY_WEIGHTS = [10, 10, 10, 10, 9, 4, 2]
+# First booking day unless told otherwise: a fixed date, so a seed gives the same
+# rows on any day (and, being in the future, bookings pass the API's validation)
+DEFAULT_START = date(2030, 1, 1)
+
+def zipf_weights(n: int, s: float) -> List[float]:
+    """
+    Cumulative weights of a Zipf distribution over ``n`` ranks, for random.choices
+    """
+    return list(itertools.accumulate(1.0 / rank ** s for rank in range(1, n + 1)))
+
+def weighted_picker(rng: random.Random, items: List, cum_weights: List[float]) -> Callable[[], Any]:
+    """
+    Draw one item at a time by cumulative weight; cheaper than random.choices per call
+    """
+    total = cum_weights[-1]
+    return lambda: items[bisect.bisect(cum_weights, rng.random() * total)]
+
+def generate_users(rng: random.Random, first_id: int, count: int, password_hash: str) -> Iterator[Dict]:
+    for user_id in range(first_id, first_id + count):
+        yield {
+            "id": user_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"user{user_id}@example.com",
+            "password": password_hash,
+            "address": f"{rng.randint(1, 999)} {rng.choice(STREETS)}" if rng.random() < 0.8 else None,
+        }
+
+def generate_devices(rng: random.Random, first_id: int, count: int) -> Iterator[Dict]:
+    for device_id in range(first_id, first_id + count):
+        yield {"id": device_id, "name": f"{rng.choice(DEVICE_MODELS)} #{device_id}"}
+
+def generate_bookings(
+    rng: random.Random,
+    first_id: int,
+    count: int,
+    user_ids: List[int],
+    device_ids: List[int],
+    start: datetime,
+    days: int
+) -> Iterator[Dict]:
+    # Shuffle ranks so popularity isn't correlated with id
+    user_ids, device_ids = user_ids[:], device_ids[:]
+    rng.shuffle(user_ids)
+    rng.shuffle(device_ids)
+    pick_user = weighted_picker(rng, user_ids, zipf_weights(len(user_ids), 0.8))
+    pick_device = weighted_picker(rng, device_ids, zipf_weights(len(device_ids), 1.1))
+
+    # Candidate slots, weighted by weekday and hour
+    slots = [
+        day * 24 + hour
+        for day in range(days) for hour in range(24)
+        if HOUR_WEIGHTS[hour] and WEEKDAY_WEIGHTS[(start + timedelta(days=day)).weekday()]
+    ]
+    pick_slot = weighted_picker(rng, slots, list(itertools.accumulate(
+        HOUR_WEIGHTS[slot % 24] * WEEKDAY_WEIGHTS[(start + timedelta(days=slot // 24)).weekday()]
+        for slot in slots
+    )))
+    if count > len(slots) * len(device_ids):
+        raise ValueError(f"{count} bookings don't fit in {len(slots)} slots on {len(device_ids)} devices")
+
+    # (device, slot) pairs already taken, packed into one int each
+    taken = set()
+    stride = days * 24
+    booked = dict.fromkeys(device_ids, 0)
+    today = start + timedelta(days=days // 2)
+    for booking_id in range(first_id, first_id + count):
+        device_id = pick_device()
+        # A fully booked hot device spills over to a uniformly chosen one
+        while booked[device_id] >= len(slots):
+            device_id = rng.choice(device_ids)
+        slot = pick_slot()
+        while device_id * stride + slot in taken:
+            # Busy hours fill up first on hot devices; fall back to any free hour
+            slot = pick_slot() if rng.random() < 0.5 else rng.choice(slots)
+        taken.add(device_id * stride + slot)
+        booked[device_id] += 1
+
+        time_slot = start + timedelta(hours=slot)
+        created_at = min(time_slot, today) - timedelta(minutes=rng.randint(10, 60 * 24 * 30))
+        yield {
+            "id": booking_id,
+            "device_id": device_id,
+            "user_id": pick_user(),
+            "description": rng.choice(DESCRIPTIONS),
+            "time_slot": time_slot,
+            "address": f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+            "created_at": created_at,
+            "updated_at": created_at,
+            "version": 1,
+        }
+
+def insert_batches(engine: Engine, table, rows: Iterator[Dict], batch_size: int, label: str) -> int:
+    """
+    Insert rows with one executemany per batch, each in its own transaction
+    """
+    started = time.perf_counter()
+    total = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        with engine.begin() as connection:
+            connection.execute(table.insert(), batch)
+        total += len(batch)
+        print(f"\r{label}: {total}", end="", flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"\r{label}: {total} in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s)")
+    return total
+
+def generate_dataset(
+    database_url: str,
+    users: int,
+    devices: int,
+    bookings: int,
+    seed: int = 0,
+    days: int = 90,
+    batch_size: int = 10000,
+    password: str = "password123",
+    reset: bool = False,
+    start: Optional[date] = None
+) -> Dict[str, int]:
+    """
+    Generate the dataset into ``database_url`` and return the row counts.
+    Bookings span ``days`` days from ``start`` (DEFAULT_START if not given);
+    creation times treat the middle day as today.
+    """
+    engine = create_engine(database_url)
+    try:
+        if reset:
+            Base.metadata.drop_all(engine)
+            with engine.begin() as connection:
+                connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        upgrade_database(engine)
+
+        with engine.connect() as connection:
+            if connection.execute(select(func.count()).select_from(Booking.__table__)).scalar():
+                raise SystemExit("Database already has bookings; pass --reset to replace them")
+            first_user = (connection.execute(select(func.max(User.__table__.c.id))).scalar() or 0) + 1
+            first_device = (connection.execute(select(func.max(Device.__table__.c.id))).scalar() or 0) + 1
+
+        rng = random.Random(seed)
+        # One bcrypt hash for everyone: hashing millions of passwords would take hours
+        password_hash = get_password_hash(password)
+        start = datetime.combine(start or DEFAULT_START, datetime.min.time())
+
+        with engine.begin() as connection:
+            # Keeping the full-text index in sync row by row is the slowest part of
+            # the load; drop the triggers and rebuild the index once at the end
+            for trigger in ("bookings_fts_insert", "bookings_fts_delete", "bookings_fts_update"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        try:
+            insert_batches(
+                engine, User.__table__, generate_users(rng, first_user, users, password_hash), batch_size, "users"
+            )
+            insert_batches(engine, Device.__table__, generate_devices(rng, first_device, devices), batch_size, "devices")
+            insert_batches(
+                engine,
+                Booking.__table__,
+                generate_bookings(
+                    rng, 1, bookings,
+                    list(range(first_user, first_user + users)),
+                    list(range(first_device, first_device + devices)),
+                    start, days
+                ),
+                batch_size,
+                "bookings"
+            )
+        finally:
+            with engine.begin() as connection:
+                for statement in BOOKINGS_FTS_DDL:
+                    connection.execute(text(statement))
+
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+        return {"users": users, "devices": devices, "bookings": bookings}
+    finally:
+        engine.dispose()
+
+def database_url(value: str) -> str:
+    return value if "://" in value else f"sqlite:///{os.path.abspath(value)}"
+
+def start_date(value: str) -> Optional[date]:
+    # None stands for "today", resolved once --days is known
+    return None if value == "today" else date.fromisoformat(value)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic production-scale dataset")
+    parser.add_argument("--database", type=database_url, default=settings.DATABASE_URL,
+                        help="SQLite file or database URL (default: the app database)")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--bookings", type=int, default=500000)
+    parser.add_argument("--days", type=int, default=90, help="Days the bookings span")
+    parser.add_argument("--start", type=start_date, default=DEFAULT_START,
+                        help=f"First booking day, YYYY-MM-DD (default {DEFAULT_START}), or 'today' to centre "
+                             "the bookings on today's local date")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--password", default="password123", help="Password shared by every generated user")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    args = parser.parse_args()
+    # Local, not UTC: booking time slots are naive local times (see the validators in app/schemas/booking.py)
+    start = args.start or date.today() - timedelta(days=args.days // 2)
+    generate_dataset(
+        args.database, args.users, args.devices, args.bookings,
+        seed=args.seed, days=args.days, batch_size=args.batch_size, password=args.password, reset=args.reset,
+        start=start
+    )
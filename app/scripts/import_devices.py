@@ -0,0 +1,31 @@
+import argparse
+import os
+from app.core.database import SessionLocal
+from app.services.device_import_service import DeviceImportService, SUPPORTED_FORMATS
+
+def import_devices(path: str, format: str = None, batch_size: int = None):
+    format = format or os.path.splitext(path)[1].lstrip(".").lower()
+    if format not in SUPPORTED_FORMATS:
+        raise SystemExit(f"Cannot infer the format of {path}; pass --format csv or --format jsonl")
+
+    db = SessionLocal()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            result = DeviceImportService(db).import_devices(stream, format, batch_size)
+    finally:
+        db.close()
+
+    print(
+        f"Processed {result.processed} rows in {result.elapsed_seconds}s "
+        f"({result.rows_per_second} rows/s): {result.imported} imported, {result.failed} failed"
+    )
+    for error in result.errors:
+        print(f"  line {error.line}: {error.error}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import devices from a CSV or JSONL file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS)
+    parser.add_argument("--batch-size", type=int)
+    args = parser.parse_args()
+    import_devices(args.path, args.format, args.batch_size)
@@ -5,7 +5,9 @@ from app.core.security import verify_password, create_access_token
 from app.services.user_service import UserService
 from app.schemas.auth import LoginRequest, Token
 from app.core.config import settings
+from app.core.tracing import traced_methods
 
+@traced_methods
 class AuthService:
     def __init__(self, db: Session):
         self.user_service = UserService(db)
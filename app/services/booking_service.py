@@ -1,13 +1,21 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 from app.repositories.booking_repository import BookingRepository
-from app.schemas.booking import BookingCreate, BookingUpdate, BookingResponse
+from app.schemas.booking import BookingCreate, BookingUpdate, BookingResponse, BookingExpandedResponse, BookingSearchResult
 from app.repositories.device_repository import DeviceRepository
+from app.repositories.records import BookingRecord
+from app.repositories.user_repository import UserRepository
+from app.core.exceptions import PreconditionFailedError
+from app.core.serialization import validate_list
+from app.core.singleflight import get_singleflight
+from app.core.tracing import traced_methods
 
+@traced_methods
 class BookingService:
     def __init__(self, db: Session):
         self.booking_repository = BookingRepository(db)
         self.device_repository = DeviceRepository(db)
+        self.user_repository = UserRepository(db)
 
     def create_booking(self, booking: BookingCreate, user_id: int) -> BookingResponse:
         # Verify device exists
@@ -22,21 +30,87 @@ class BookingService:
         db_booking = self.booking_repository.create_booking(booking, user_id)
         return BookingResponse.model_validate(db_booking)
 
+    def create_bookings(self, bookings: List[BookingCreate], user_id: int) -> List[BookingResponse]:
+        # Verify all devices exist with one query
+        missing = {b.device_id for b in bookings} - self.device_repository.get_existing_device_ids(
+            b.device_id for b in bookings
+        )
+        if missing:
+            raise ValueError("Device not found")
+
+        slots = [(b.device_id, b.time_slot) for b in bookings]
+        if len(set(slots)) != len(slots):
+            raise ValueError("This time slot is already booked for the selected device")
+
+        db_bookings = self.booking_repository.create_bookings(bookings, user_id)
+        return validate_list(BookingResponse, db_bookings)
+
     def get_booking(self, booking_id: int) -> Optional[BookingResponse]:
         db_booking = self.booking_repository.get_booking(booking_id)
         if not db_booking:
             return None
         return BookingResponse.model_validate(db_booking)
 
-    def get_user_bookings(self, user_id: int) -> List[BookingResponse]:
-        bookings = self.booking_repository.get_user_bookings(user_id)
-        return [BookingResponse.model_validate(booking) for booking in bookings]
+    def get_user_bookings(self, user_id: int, expand: FrozenSet[str] = frozenset()) -> List[BookingResponse]:
+        # Concurrent identical reads share one query and one validated result
+        return get_singleflight("user_bookings").do(
+            (user_id, expand),
+            lambda: self._expand(self.booking_repository.get_user_booking_records(user_id), expand)
+        )
+
+    def get_device_bookings(self, device_id: int, expand: FrozenSet[str] = frozenset()) -> List[BookingResponse]:
+        return get_singleflight("device_bookings").do(
+            (device_id, expand),
+            lambda: self._expand(self.booking_repository.get_device_booking_records(device_id), expand)
+        )
+
+    def _expand(self, bookings: List[BookingRecord], expand: FrozenSet[str]) -> List[BookingResponse]:
+        """
+        Attach related devices/users, loading each expanded relationship with
+        a single IN query whatever the number of bookings
+        """
+        if not expand:
+            return validate_list(BookingResponse, bookings)
+
+        devices = {}
+        if "device" in expand:
+            devices = self.device_repository.get_device_records_by_ids({b.device_id for b in bookings})
+        users = {}
+        if "user" in expand:
+            users = self.user_repository.get_user_records_by_ids({b.user_id for b in bookings})
+
+        return validate_list(BookingExpandedResponse, [
+            {**booking._asdict(), "device": devices.get(booking.device_id), "user": users.get(booking.user_id)}
+            for booking in bookings
+        ])
 
-    def get_device_bookings(self, device_id: int) -> List[BookingResponse]:
-        bookings = self.booking_repository.get_device_bookings(device_id)
-        return [BookingResponse.model_validate(booking) for booking in bookings]
+    def search_bookings(self, query: str, user_id: Optional[int], limit: int, offset: int) -> List[BookingSearchResult]:
+        """
+        Rank bookings by how well their description and address match ``query``.
+        Every whitespace-separated term must match (as a word prefix for the
+        last term); ``user_id`` limits results to that user's bookings.
+        """
+        match = _fts_match_expression(query)
+        if match is None:
+            return []
+        rows = self.booking_repository.search_bookings(match, user_id, limit, offset)
+        return validate_list(BookingSearchResult, rows)
+
+    def update_booking(
+        self,
+        booking_id: int,
+        booking_update: BookingUpdate,
+        user_id: int,
+        expected_version: Optional[int] = None
+    ) -> Optional[BookingResponse]:
+        if expected_version is not None:
+            updated_booking = self.booking_repository.update_booking_if_version(
+                booking_id, user_id, expected_version, booking_update
+            )
+            if not updated_booking:
+                return self._conditional_failure(booking_id, user_id, "update")
+            return BookingResponse.model_validate(updated_booking)
 
-    def update_booking(self, booking_id: int, booking_update: BookingUpdate, user_id: int) -> Optional[BookingResponse]:
         # Verify booking exists and belongs to user
         db_booking = self.booking_repository.get_booking(booking_id)
         if not db_booking:
@@ -49,7 +123,12 @@ class BookingService:
             return None
         return BookingResponse.model_validate(updated_booking)
 
-    def delete_booking(self, booking_id: int, user_id: int) -> bool:
+    def delete_booking(self, booking_id: int, user_id: int, expected_version: Optional[int] = None) -> bool:
+        if expected_version is not None:
+            if self.booking_repository.delete_booking_if_version(booking_id, user_id, expected_version):
+                return True
+            return bool(self._conditional_failure(booking_id, user_id, "delete"))
+
         # Verify booking exists and belongs to user
         db_booking = self.booking_repository.get_booking(booking_id)
         if not db_booking:
@@ -57,4 +136,21 @@ class BookingService:
         if db_booking.user_id != user_id:
             raise ValueError("Not authorized to delete this booking")
 
-        return self.booking_repository.delete_booking(booking_id) 
\ No newline at end of file
+        return self.booking_repository.delete_booking(booking_id) 
+
+    def _conditional_failure(self, booking_id: int, user_id: int, action: str) -> None:
+        # A conditional write matched no row: work out why, off the hot path
+        db_booking = self.booking_repository.get_booking(booking_id)
+        if not db_booking:
+            return None
+        if db_booking.user_id != user_id:
+            raise ValueError(f"Not authorized to {action} this booking")
+        raise PreconditionFailedError("Booking has been modified")
+
+def _fts_match_expression(query: str) -> Optional[str]:
+    # Quote every term so user input can't be parsed as FTS5 syntax
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    if not terms:
+        return None
+    terms[-1] += "*"
+    return " ".join(terms)
\ No newline at end of file
@@ -0,0 +1,155 @@
+import csv
+import json
+import logging
+import time
+from typing import Callable, Iterator, List, Optional, TextIO, Tuple
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.device_index import get_device_index
+from app.repositories.device_repository import DeviceRepository
+from app.schemas.device import DeviceCreate, DeviceImportError, DeviceImportResult
+from app.core.tracing import traced_methods
+
+SUPPORTED_FORMATS = ("csv", "jsonl")
+# Largest SQLite INTEGER
+_MAX_ID = 2 ** 63 - 1
+
+logger = logging.getLogger(__name__)
+
+@traced_methods
+class DeviceImportService:
+    def __init__(self, db: Session):
+        self.device_repository = DeviceRepository(db)
+
+    def import_devices(self, stream: TextIO, format: str, batch_size: Optional[int] = None) -> DeviceImportResult:
+        """
+        Stream-parse devices from CSV (with a ``name`` and optional ``id``
+        column) or JSONL, validate each row with DeviceCreate and upsert them
+        in batches. Rows that fail, in validation or in the database, are
+        reported by line and skipped; memory use doesn't depend on the file
+        size. A database failure other than a rejected row stops the import,
+        keeping the batches already written (see ``aborted``).
+        """
+        batch_size = batch_size or settings.DEVICE_IMPORT_BATCH_SIZE
+        started = time.perf_counter()
+        processed = imported = failed = 0
+        errors: List[DeviceImportError] = []
+        batch: List[Tuple[int, dict]] = []
+        aborted = None
+
+        def fail(line: int, error: str) -> None:
+            nonlocal failed
+            failed += 1
+            if len(errors) < settings.DEVICE_IMPORT_MAX_ERRORS:
+                errors.append(DeviceImportError(line=line, error=error))
+
+        for line, row, error in _parse(stream, format):
+            processed += 1
+            if error is None:
+                row, error = _validate(row)
+            if error is not None:
+                fail(line, error)
+                continue
+
+            batch.append((line, row))
+            if len(batch) >= batch_size:
+                written, aborted = self._write_batch(batch, fail)
+                imported += written
+                batch = []
+                if aborted is not None:
+                    break
+        if batch:
+            written, aborted = self._write_batch(batch, fail)
+            imported += written
+
+        if imported:
+            get_device_index().invalidate()
+
+        elapsed = time.perf_counter() - started
+        return DeviceImportResult(
+            processed=processed,
+            imported=imported,
+            failed=failed,
+            errors=errors,
+            aborted=aborted,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(processed / elapsed, 1) if elapsed else 0.0
+        )
+
+    def _write_batch(self, batch: List[Tuple[int, dict]], fail: Callable[[int, str], None]) -> Tuple[int, Optional[str]]:
+        """
+        Write a batch; returns the rows written and, if the database failed
+        so that the import can't go on, why. Rows the database rejects (a
+        constraint) are found by retrying the batch one row at a time and
+        reported by line.
+        """
+        try:
+            return self.device_repository.upsert_devices([row for _, row in batch]), None
+        except IntegrityError:
+            pass
+        except SQLAlchemyError as e:
+            return 0, self._abort(batch, e, fail)
+
+        written = 0
+        for position, (line, row) in enumerate(batch):
+            try:
+                written += self.device_repository.upsert_devices([row])
+            except IntegrityError as e:
+                fail(line, _database_error(e))
+            except SQLAlchemyError as e:
+                return written, self._abort(batch[position:], e, fail)
+        return written, None
+
+    def _abort(self, batch: List[Tuple[int, dict]], e: SQLAlchemyError, fail: Callable[[int, str], None]) -> str:
+        # The database itself failed (locked, disk full, ...): report the rows
+        # that weren't written and stop reading the file
+        error = _database_error(e)
+        for line, _ in batch:
+            fail(line, error)
+        logger.warning("Device import stopped at line %d: %s", batch[0][0], error)
+        return f"Stopped at line {batch[0][0]}: {error}"
+
+def _database_error(e: SQLAlchemyError) -> str:
+    return f"Database error: {getattr(e, 'orig', None) or e}"
+
+def _parse(stream: TextIO, format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+    elif format == "jsonl":
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as e:
+                yield line, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line, None, "Expected a JSON object"
+                continue
+            yield line, row, None
+    else:
+        raise ValueError(f"Unsupported format {format!r}; expected one of {', '.join(SUPPORTED_FORMATS)}")
+
+def _validate(row: dict) -> Tuple[Optional[dict], Optional[str]]:
+    try:
+        device = DeviceCreate.model_validate(row)
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+    device_id = row.get("id")
+    if device_id in (None, ""):
+        return {"id": None, "name": device.name}, None
+    try:
+        device_id = int(device_id)
+    except (TypeError, ValueError):
+        return None, "id: must be an integer"
+    if device_id <= 0:
+        return None, "id: must be positive"
+    if device_id > _MAX_ID:
+        return None, "id: too large"
+    return {"id": device_id, "name": device.name}, None
@@ -1,8 +1,13 @@
 from sqlalchemy.orm import Session
 from app.repositories.device_repository import DeviceRepository
 from app.schemas.device import DeviceCreate, DeviceResponse
-from typing import List
+from app.core.device_index import get_device_index
+from app.core.serialization import validate_list
+from app.core.singleflight import get_singleflight
+from typing import List, Optional, Tuple
+from app.core.tracing import traced_methods
 
+@traced_methods
 class DeviceService:
     def __init__(self, db: Session):
         self.device_repository = DeviceRepository(db)
@@ -11,12 +16,45 @@ class DeviceService:
         """
         Get all devices
         """
-        devices = self.device_repository.get_all_devices()
-        return [DeviceResponse(id=device.id, name=device.name) for device in devices]
+        return get_singleflight("devices").do(None, self._load_all_devices)
+
+    def _load_all_devices(self) -> List[DeviceResponse]:
+        devices = self.device_repository.get_all_device_records()
+        return validate_list(DeviceResponse, devices)
+
+    def list_devices(self, limit: int, cursor: Optional[int] = None) -> Tuple[List[DeviceResponse], Optional[int]]:
+        """
+        List devices by id, one keyset page at a time.
+        Returns the page and the cursor for the next one (None on the last page).
+        """
+        def load():
+            devices = self.device_repository.get_device_records_page(cursor or 0, limit + 1)
+            next_cursor = devices[limit - 1].id if len(devices) > limit else None
+            return validate_list(DeviceResponse, devices[:limit]), next_cursor
+
+        return get_singleflight("devices").do((cursor, limit), load)
+
+    def search_devices(self, prefix: str, limit: int) -> List[DeviceResponse]:
+        """
+        Autocomplete devices whose name has a word starting with ``prefix``
+        """
+        index = get_device_index()
+        index.sync(self.device_repository.get_all_device_records, self.device_repository.get_device_records_after)
+        return validate_list(DeviceResponse, index.search(prefix, limit))
 
     def create_device(self, device_data: DeviceCreate) -> DeviceResponse:
         """
         Create a new device
         """
         db_device = self.device_repository.create_device(device_data)
-        return DeviceResponse(id=db_device.id, name=db_device.name) 
\ No newline at end of file
+        get_device_index().add(db_device.id, db_device.name)
+        return DeviceResponse.model_validate(db_device) 
+
+    def delete_device(self, device_id: int) -> bool:
+        """
+        Delete a device and, through the database cascade, its bookings
+        """
+        if not self.device_repository.delete_device(device_id):
+            return False
+        get_device_index().remove(device_id)
+        return True
\ No newline at end of file
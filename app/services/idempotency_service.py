@@ -0,0 +1,226 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import cache_lookups
+from app.core.serialization import dumps
+from app.repositories.idempotency_repository import COMMITTED, IdempotencyRepository
+from app.core.tracing import traced_methods
+
+logger = logging.getLogger(__name__)
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    body: str
+    expires_at: datetime
+
+class _LRUCache:
+    """
+    Small thread-safe LRU in front of the idempotency table
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[int, str], StoredResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[int, str]) -> Optional[StoredResponse]:
+        with self._lock:
+            stored = self._data.get(key)
+            if stored is None:
+                return None
+            if stored.expires_at <= datetime.utcnow():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return stored
+
+    def put(self, key: Tuple[int, str], stored: StoredResponse) -> None:
+        with self._lock:
+            self._data[key] = stored
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+_response_cache = _LRUCache(settings.IDEMPOTENCY_CACHE_SIZE)
+# Attempts currently running in this process, so duplicates wait instead of polling the DB
+_in_flight: Dict[Tuple[int, str], threading.Event] = {}
+_in_flight_lock = threading.Lock()
+# When this process next purges expired keys (time.monotonic())
+_next_purge = 0.0
+_purge_lock = threading.Lock()
+
+def request_fingerprint(scope: str, payload: Any) -> str:
+    """
+    Hash of the operation and its payload, used to reject a key reused for a different request
+    """
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{scope}:{body}".encode()).hexdigest()
+
+@traced_methods
+class IdempotencyService:
+    def __init__(self, db: Session):
+        self.idempotency_repository = IdempotencyRepository(db)
+
+    def execute(
+        self,
+        user_id: int,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Any],
+        status_code: int = status.HTTP_200_OK
+    ) -> Any:
+        """
+        Run ``handler`` at most once per (user, Idempotency-Key).
+
+        The first attempt's result (or HTTPException) is recorded and replayed
+        to every retry as a ready-made Response. Concurrent duplicates wait for the
+        attempt in progress instead of redoing the work. ``handler`` should
+        commit through this service's session, so that its commit also marks
+        the key as used.
+        """
+        if len(key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key is longer than {settings.IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            )
+        cache_key = (user_id, key)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            stored = self._lookup(cache_key)
+            if stored is not None and stored.status_code != COMMITTED:
+                return self._replay(stored, fingerprint)
+
+            if stored is None:
+                with _in_flight_lock:
+                    event = _in_flight.get(cache_key)
+                    owner = event is None
+                    if owner:
+                        event = _in_flight[cache_key] = threading.Event()
+
+                if not owner:
+                    if not event.wait(max(0.0, deadline - time.monotonic())):
+                        raise self._in_progress()
+                    continue
+
+                try:
+                    self._purge_expired()
+                    claimed = self.idempotency_repository.try_begin(
+                        user_id,
+                        key,
+                        fingerprint,
+                        timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+                        timedelta(seconds=settings.IDEMPOTENCY_PENDING_TTL_SECONDS)
+                    )
+                    if claimed:
+                        return self._run(cache_key, fingerprint, handler, status_code)
+                finally:
+                    with _in_flight_lock:
+                        _in_flight.pop(cache_key, None)
+                    event.set()
+
+            # Another worker process holds the key (or committed under it and is
+            # about to record its response): poll until it completes
+            if time.monotonic() >= deadline:
+                raise self._in_progress(unrecorded=stored is not None)
+            time.sleep(0.05)
+
+    def _purge_expired(self) -> None:
+        # Expired records are only replaced when their key comes back; without
+        # this the table would keep every key ever used
+        global _next_purge
+        with _purge_lock:
+            now = time.monotonic()
+            if now < _next_purge:
+                return
+            _next_purge = now + settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS
+        try:
+            self.idempotency_repository.purge_expired(settings.IDEMPOTENCY_PURGE_BATCH_SIZE)
+        except SQLAlchemyError:
+            # Housekeeping: never fail the request over it, the next purge catches up
+            logger.warning("Purging expired idempotency keys failed", exc_info=True)
+
+    def _lookup(self, cache_key: Tuple[int, str]) -> Optional[StoredResponse]:
+        stored = _response_cache.get(cache_key)
+        if stored is not None:
+            cache_lookups.labels("idempotency", "hit").inc()
+            return stored
+        cache_lookups.labels("idempotency", "miss").inc()
+        row = self.idempotency_repository.get(*cache_key)
+        if row is None or row.status_code is None:
+            return None
+        stored = StoredResponse(row.fingerprint, row.status_code, row.response_body, row.expires_at)
+        if stored.status_code != COMMITTED:
+            _response_cache.put(cache_key, stored)
+        return stored
+
+    def _run(self, cache_key: Tuple[int, str], fingerprint: str, handler: Callable[[], Any], status_code: int) -> Any:
+        # After a failure that follows the handler's commit, release() leaves
+        # the COMMITTED record alone, so retries don't run the handler again
+        try:
+            with self.idempotency_repository.marking_commits(*cache_key):
+                result = handler()
+        except HTTPException as e:
+            if e.status_code >= 500:
+                self.idempotency_repository.release(*cache_key)
+            else:
+                self._record(cache_key, fingerprint, e.status_code, {"detail": e.detail})
+            raise
+        except Exception:
+            self.idempotency_repository.release(*cache_key)
+            raise
+        self._record(cache_key, fingerprint, status_code, result)
+        return result
+
+    def _record(self, cache_key: Tuple[int, str], fingerprint: str, status_code: int, content: Any) -> None:
+        body = dumps(content).decode()
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+        _response_cache.put(cache_key, StoredResponse(fingerprint, status_code, body, expires_at))
+        try:
+            self.idempotency_repository.complete(*cache_key, status_code, body)
+        except SQLAlchemyError:
+            # The attempt's outcome stands (its work is committed, and marked so):
+            # this process replays it from the cache, other processes answer 409
+            logger.error("Recording the response for Idempotency-Key %r failed", cache_key[1], exc_info=True)
+
+    def _replay(self, stored: StoredResponse, fingerprint: str) -> Response:
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    def _in_progress(self, unrecorded: bool = False) -> HTTPException:
+        if unrecorded:
+            return HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key was processed, but its response wasn't recorded"
+            )
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
@@ -3,7 +3,9 @@ from fastapi import HTTPException, status
 from app.repositories.user_repository import UserRepository
 from app.schemas.user import UserCreate, UserResponse
 from app.models.user import User
+from app.core.tracing import traced_methods
 
+@traced_methods
 class UserService:
     def __init__(self, db: Session):
         self.user_repository = UserRepository(db)
@@ -29,15 +31,16 @@ class UserService:
         # Create user in database
         db_user = self.user_repository.create_user(user_data)
         
-        return UserResponse(
-            id=db_user.id,
-            name=db_user.name,
-            email=db_user.email,
-            address=db_user.address
-        )
+        return UserResponse.model_validate(db_user)
 
     def get_user_by_email(self, email: str) -> User | None:
         """
         Get user by email
         """
-        return self.user_repository.get_user_by_email(email) 
\ No newline at end of file
+        return self.user_repository.get_user_by_email(email) 
+
+    def delete_user(self, user_id: int) -> bool:
+        """
+        Delete a user and, through the database cascade, their bookings
+        """
+        return self.user_repository.delete_user(user_id)
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Write latency while the database is backed up online.
+
+Builds a database of ``--size-mb`` (booking schema plus a padding table) or
+uses a copy of ``--database``, then keeps a writer committing bookings every
+``--write-interval`` ms while it runs, in turn: nothing (the baseline), the
+stepped backup API and VACUUM INTO. Each phase reports the writer's commit
+latency percentiles next to the backup's duration, steps and restarts.
+
+Usage:
+    python -m benchmarks.bench_backup --size-mb 2048
+    python -m benchmarks.bench_backup --database app.db --pages 4096 --sleep 0.005
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import create_engine
+from app.core.backup import BackupManager
+from app.core.migrations import upgrade_database
+
+PADDING_ROW_BYTES = 4000
+
+def build(path: str, size_mb: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    upgrade_database(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE padding (id INTEGER PRIMARY KEY, data BLOB)")
+    rows = size_mb * 1024 * 1024 // PADDING_ROW_BYTES
+    for start in range(0, rows, 10_000):
+        conn.execute(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+            "INSERT INTO padding (data) SELECT randomblob(?) FROM n",
+            (min(10_000, rows - start), PADDING_ROW_BYTES)
+        )
+        conn.commit()
+    conn.close()
+
+class Writer:
+    """
+    Commits one booking every ``interval`` seconds and records each commit's
+    latency under the current phase
+    """
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self.phase = "idle"
+        self.latencies: Dict[str, List[float]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="writer")
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.path, timeout=60)
+        conn.execute("INSERT OR IGNORE INTO users (id, name, email, password) VALUES (1, 'Bench', 'bench@example.com', 'x')")
+        conn.execute("INSERT OR IGNORE INTO devices (id, name) VALUES (1, 'Bench device')")
+        conn.commit()
+        slot = datetime(2100, 1, 1)
+        while not self._stop.wait(self.interval):
+            slot += timedelta(hours=1)
+            started = time.perf_counter()
+            conn.execute(
+                "INSERT INTO bookings (device_id, user_id, description, time_slot, address) VALUES (1, 1, 'bench', ?, 'Lab')",
+                (slot.isoformat(sep=" "),)
+            )
+            conn.commit()
+            self.latencies.setdefault(self.phase, []).append(time.perf_counter() - started)
+        conn.execute("DELETE FROM bookings WHERE description = 'bench' AND time_slot >= '2100-01-01'")
+        conn.commit()
+        conn.close()
+
+def summarize(samples: List[float]) -> str:
+    if len(samples) < 2:
+        return f"{len(samples):6} writes"
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return (
+        f"{len(samples):6} writes  p50 {cuts[49] * 1e3:7.2f} ms  p99 {cuts[98] * 1e3:8.2f} ms"
+        f"  max {max(samples) * 1e3:8.2f} ms"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write latency during online backups")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the generated database")
+    parser.add_argument("--database", help="Benchmark a copy of this SQLite file instead")
+    parser.add_argument("--pages", type=int, default=1024, help="Pages per backup step")
+    parser.add_argument("--sleep", type=float, default=0.01, help="Sleep between backup steps, seconds")
+    parser.add_argument("--max-restarts", type=int, default=3)
+    parser.add_argument("--write-interval", type=float, default=5.0, help="Between the writer's commits, ms")
+    parser.add_argument("--idle", type=float, default=5.0, help="Baseline phase length, seconds")
+    parser.add_argument("--compress", action="store_true", help="Gzip the backups (after the copy)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/bench.db"
+        if args.database:
+            shutil.copyfile(args.database, path)
+        else:
+            build(path, args.size_mb)
+        print(f"database: {os.path.getsize(path) / 2 ** 20:.0f} MiB")
+
+        manager = BackupManager(path, f"{directory}/backups", 1, args.pages, args.sleep, args.max_restarts)
+        writer = Writer(path, args.write_interval / 1e3)
+        writer.start()
+        reports = {}
+        try:
+            time.sleep(args.idle)
+            for method in ("backup", "vacuum"):
+                writer.phase = method
+                reports[method] = manager.backup(method, args.compress)
+                writer.phase = "idle"
+        finally:
+            writer.stop()
+
+    print(f"{'idle':8} {summarize(writer.latencies.get('idle', []))}")
+    for method, report in reports.items():
+        print(f"{method:8} {summarize(writer.latencies.get(method, []))}")
+        print(
+            f"{'':8} copy {report['copy_seconds']:.2f}s  total {report['total_seconds']:.2f}s"
+            f"  steps {report['steps']}  restarts {report['restarts']}  journal {report['journal_mode']}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark for device autocomplete lookups on a large catalogue.
+
+Builds the in-memory DeviceNameIndex over a synthetic catalogue and times
+prefix searches of different selectivity.
+
+Usage:
+    python -m benchmarks.bench_device_index
+"""
+import random
+import time
+from app.core.device_index import DeviceNameIndex
+from app.repositories.records import DeviceRecord
+
+BRANDS = ["Apple", "Samsung", "Google", "Dell", "HP", "Lenovo", "Sony", "Microsoft", "Asus", "Acer"]
+KINDS = ["Phone", "Laptop", "Tablet", "Watch", "Headphones", "Monitor", "Camera", "Console"]
+PREFIXES = ["a", "sam", "samsung lap", "pro", "x9", "headphones 12"]
+
+def catalogue(size: int):
+    rng = random.Random(42)
+    for device_id in range(1, size + 1):
+        yield DeviceRecord(device_id, f"{rng.choice(BRANDS)} {rng.choice(KINDS)} {rng.choice('XPSGZ')}{rng.randint(1, 999)}")
+
+def main(size: int = 100_000, limit: int = 10, repeat: int = 2_000) -> None:
+    index = DeviceNameIndex()
+    start = time.perf_counter()
+    index.rebuild(catalogue(size))
+    print(f"built index over {size} devices in {time.perf_counter() - start:.2f}s")
+
+    for prefix in PREFIXES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            index.search(prefix, limit)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"q={prefix!r:16} {elapsed * 1e6:8.1f} µs/lookup")
+
+    start = time.perf_counter()
+    for device_id in range(size + 1, size + 1001):
+        index.add(device_id, f"New Device {device_id}")
+    print(f"incremental add: {(time.perf_counter() - start) / 1000 * 1e6:.1f} µs/device")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark for list reads: ORM entities vs column-projected records.
+
+Loads every booking of one device through BookingRepository.get_device_bookings
+(full ORM instances in the identity map) and through
+get_device_booking_records (Core select into NamedTuples), then validates the
+result into BookingResponse models as the service does. Reports wall time and
+peak traced memory per request.
+
+Usage:
+    python -m benchmarks.bench_read_models
+"""
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.core.serialization import validate_list
+from app.models.booking import Booking
+from app.models.device import Device
+from app.models.user import User
+from app.repositories.booking_repository import BookingRepository
+from app.schemas.booking import BookingResponse
+
+SIZES = (1_000, 10_000, 50_000)
+
+def make_session(rows: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2030, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "name": "Bench", "email": "bench@example.com", "password": "x"}])
+        conn.execute(insert(Device), [{"id": 1, "name": "Bench Device"}])
+        conn.execute(insert(Booking), [
+            {
+                "device_id": 1,
+                "user_id": 1,
+                "description": "Cracked screen, battery drains fast",
+                "time_slot": start + timedelta(minutes=30 * i),
+                "address": f"{i} Example Street",
+                "created_at": start,
+                "updated_at": start,
+                "version": 1,
+            }
+            for i in range(rows)
+        ])
+    return sessionmaker(bind=engine, autoflush=False)
+
+def measure(session_factory, load, repeat: int = 3):
+    best_time, peak = float("inf"), 0
+    for _ in range(repeat):
+        db = session_factory()
+        tracemalloc.start()
+        start = time.perf_counter()
+        validate_list(BookingResponse, load(BookingRepository(db)))
+        elapsed = time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        db.close()
+        best_time = min(best_time, elapsed)
+    return best_time, peak
+
+def main() -> None:
+    print(f"{'rows':>8} {'orm ms':>9} {'orm MiB':>9} {'records ms':>11} {'records MiB':>12}")
+    for size in SIZES:
+        session_factory = make_session(size)
+        orm_time, orm_peak = measure(session_factory, lambda repo: repo.get_device_bookings(1))
+        rec_time, rec_peak = measure(session_factory, lambda repo: repo.get_device_booking_records(1))
+        print(
+            f"{size:>8} {orm_time * 1e3:>9.1f} {orm_peak / 2**20:>9.1f}"
+            f" {rec_time * 1e3:>11.1f} {rec_peak / 2**20:>12.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
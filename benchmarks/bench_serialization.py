@@ -0,0 +1,73 @@
+"""
+Microbenchmark for booking list serialization.
+
+Compares the previous path (per-row model_validate, FastAPI re-validating
+against response_model, stdlib json) with the fast path (one cached
+TypeAdapter validation, FastJSONResponse rendering with orjson).
+
+Usage:
+    python -m benchmarks.bench_serialization
+"""
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+from app.core.serialization import FastJSONResponse, validate_list
+from app.models.booking import Booking
+from app.models.device import Device  # noqa: F401 - registers the relationship targets
+from app.models.user import User  # noqa: F401
+from app.schemas.booking import BookingResponse
+
+SIZES = (10, 1_000, 10_000)
+
+def make_bookings(count: int) -> List[Booking]:
+    now = datetime(2030, 1, 1)
+    return [
+        Booking(
+            id=i,
+            device_id=i % 50,
+            user_id=i % 500,
+            description="Cracked screen, battery drains fast",
+            time_slot=now + timedelta(hours=i),
+            address=f"{i} Example Street",
+            created_at=now,
+            updated_at=now,
+            version=1
+        )
+        for i in range(count)
+    ]
+
+_response_adapter = TypeAdapter(List[BookingResponse])
+
+def previous_path(rows: List[Booking]) -> bytes:
+    items = [BookingResponse.model_validate(row) for row in rows]
+    # What FastAPI does with response_model=List[BookingResponse] and a JSONResponse
+    validated = _response_adapter.validate_python(items)
+    content = _response_adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+def fast_path(rows: List[Booking]) -> bytes:
+    return FastJSONResponse(validate_list(BookingResponse, rows)).body
+
+def per_row_cost(fn, rows: List[Booking], min_time: float = 0.5) -> float:
+    fn(rows)
+    iterations, elapsed = 0, 0.0
+    while elapsed < min_time:
+        start = time.perf_counter()
+        fn(rows)
+        elapsed += time.perf_counter() - start
+        iterations += 1
+    return elapsed / iterations / len(rows)
+
+def main() -> None:
+    print(f"{'rows':>8} {'previous µs/row':>16} {'fast µs/row':>12} {'speedup':>8}")
+    for size in SIZES:
+        rows = make_bookings(size)
+        assert json.loads(previous_path(rows)) == json.loads(fast_path(rows))
+        previous = per_row_cost(previous_path, rows) * 1e6
+        fast = per_row_cost(fast_path, rows) * 1e6
+        print(f"{size:>8} {previous:>16.2f} {fast:>12.2f} {previous / fast:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
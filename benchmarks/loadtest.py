@@ -0,0 +1,294 @@
+"""
+In-process load generator for booking workloads.
+
+Drives the ASGI app from app.main through httpx.AsyncClient (no sockets, no
+server), so sync endpoints still run concurrently in the threadpool against
+a real SQLite file. Two scenarios are built in:
+
+    journey   register -> login -> list devices -> device bookings ->
+              create -> patch -> delete, each journey as a new user
+    hot-slot  pre-registered users all race to book the same device and
+              slot; the winner patches and releases it, and the race repeats
+
+Journeys start either as fast as ``--concurrency`` allows (closed loop) or
+at ``--rate`` journeys per second (open loop, Poisson arrivals), still capped
+at ``--concurrency`` in flight. The report gives per-step throughput, latency
+percentiles, error, conflict (400 double booking, 409, 412) and shed (503
+from admission control) rates, and SQLite lock waits: statements that
+stalled longer than ``--lock-threshold`` ms, which on SQLite means waiting
+on another connection's lock.
+
+Usage:
+    python -m benchmarks.loadtest --scenario journey --concurrency 20 --duration 30
+    python -m benchmarks.loadtest --scenario hot-slot --concurrency 50 --rate 200 --json report.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import httpx
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.device import Device
+
+API = "/api/v1"
+PASSWORD = "loadtest-password"
+
+class LockMonitor:
+    """
+    Times every statement on an engine and records the ones slower than
+    ``threshold`` seconds as lock waits
+    """
+    def __init__(self, engine, threshold: float):
+        self.threshold = threshold
+        self.waits = 0
+        self.wait_time = 0.0
+        self.locked_errors = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["loadtest_started"] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("loadtest_started", time.perf_counter())
+        if elapsed >= self.threshold:
+            with self._lock:
+                self.waits += 1
+                self.wait_time += elapsed
+
+    def _error(self, context):
+        if "database is locked" in str(context.original_exception):
+            with self._lock:
+                self.locked_errors += 1
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client: httpx.AsyncClient, step: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.samples[step].append(time.perf_counter() - started)
+            self.statuses[step]["exception"] += 1
+            return None
+        self.samples[step].append(time.perf_counter() - started)
+        self.statuses[step][classify(response)] += 1
+        return response
+
+def classify(response: httpx.Response) -> str:
+    if response.status_code < 400:
+        return "ok"
+    if response.status_code in (409, 412) or (
+        response.status_code == 400 and "already booked" in response.text
+    ):
+        return "conflict"
+    if response.status_code == 503 and "retry-after" in response.headers:
+        return "shed"
+    if response.status_code >= 500:
+        return "error"
+    return "rejected"
+
+def future_slot(rng: random.Random) -> str:
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return (start + timedelta(hours=rng.randrange(24 * 365 * 5))).isoformat()
+
+async def register_and_login(client: httpx.AsyncClient, recorder: Recorder, email: str) -> Optional[Dict[str, str]]:
+    user = {"email": email, "password": PASSWORD, "name": "Load Test", "address": "1 Load St"}
+    await recorder.call(client, "register", "POST", f"{API}/users/register", json=user)
+    response = await recorder.call(
+        client, "login", "POST", f"{API}/auth/login", json={"email": email, "password": PASSWORD}
+    )
+    if response is None or response.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def journey(client, recorder: Recorder, rng: random.Random, run_id: str, number: int, device_ids, **_):
+    headers = await register_and_login(client, recorder, f"journey-{run_id}-{number}@example.com")
+    if headers is None:
+        return
+    await recorder.call(client, "list devices", "GET", f"{API}/devices/", params={"limit": 100})
+    device_id = rng.choice(device_ids)
+    await recorder.call(client, "device bookings", "GET", f"{API}/bookings/device/{device_id}", headers=headers)
+    await book_patch_delete(client, recorder, headers, {
+        "device_id": device_id,
+        "description": "Screen repair",
+        "time_slot": future_slot(rng),
+        "address": "1 Load St",
+    })
+
+async def hot_slot(client, recorder: Recorder, rng: random.Random, number: int, tokens, hot_booking, **_):
+    await book_patch_delete(client, recorder, rng.choice(tokens), hot_booking)
+
+async def book_patch_delete(client, recorder: Recorder, headers: Dict[str, str], booking: Dict) -> None:
+    response = await recorder.call(client, "create booking", "POST", f"{API}/bookings/", json=booking, headers=headers)
+    if response is None or response.status_code != 201:
+        return
+    created = response.json()
+    booking_id = created["id"]
+    response = await recorder.call(
+        client, "patch booking", "PATCH", f"{API}/bookings/{booking_id}",
+        json={"description": "Battery replacement"},
+        headers={**headers, "If-Match": f'"{booking_id}-{created["version"]}"'}
+    )
+    etag = response.headers.get("ETag") if response is not None and response.status_code == 200 else None
+    await recorder.call(
+        client, "delete booking", "DELETE", f"{API}/bookings/{booking_id}",
+        headers={**headers, "If-Match": etag} if etag else headers
+    )
+
+async def run(args) -> Dict:
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.database or f"sqlite:///{os.path.join(directory, 'loadtest.db')}"
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(insert(Device), [{"name": f"Load Device {i}"} for i in range(args.devices)])
+            device_ids = [row.id for row in connection.execute(Device.__table__.select())]
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            return await drive(args, engine, device_ids)
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            engine.dispose()
+
+async def drive(args, engine, device_ids: List[int]) -> Dict:
+    rng = random.Random(args.seed)
+    run_id = f"{os.getpid()}-{int(time.time())}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+        context = {"rng": rng, "run_id": run_id, "device_ids": device_ids}
+        scenario = journey
+        if args.scenario == "hot-slot":
+            scenario = hot_slot
+            # Logins happen up front so the race measures booking, not bcrypt
+            setup = Recorder()
+            tokens = await asyncio.gather(*(
+                register_and_login(client, setup, f"hot-{run_id}-{i}@example.com") for i in range(args.users)
+            ))
+            context["tokens"] = [headers for headers in tokens if headers]
+            context["hot_booking"] = {
+                "device_id": device_ids[0],
+                "description": "Hot slot",
+                "time_slot": future_slot(rng),
+                "address": "1 Load St",
+            }
+
+        recorder = Recorder()
+        monitor = LockMonitor(engine, args.lock_threshold / 1e3)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        tasks = set()
+        completed = 0
+
+        async def one(number: int) -> None:
+            nonlocal completed
+            try:
+                await scenario(client, recorder, number=number, **context)
+                completed += 1
+            finally:
+                semaphore.release()
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        for number in itertools.count():
+            if args.rate:
+                await asyncio.sleep(rng.expovariate(args.rate))
+            await semaphore.acquire()
+            if time.perf_counter() >= deadline:
+                semaphore.release()
+                break
+            task = asyncio.create_task(one(number))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return report(recorder, monitor, completed, elapsed)
+
+def report(recorder: Recorder, monitor: LockMonitor, journeys: int, elapsed: float) -> Dict:
+    steps = {}
+    for step, samples in recorder.samples.items():
+        cuts = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+        statuses = recorder.statuses[step]
+        steps[step] = {
+            "requests": len(samples),
+            "rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(cuts[49] * 1e3, 2),
+            "p95_ms": round(cuts[94] * 1e3, 2),
+            "p99_ms": round(cuts[98] * 1e3, 2),
+            "error_rate": round((statuses["error"] + statuses["exception"]) / len(samples), 4),
+            "conflict_rate": round(statuses["conflict"] / len(samples), 4),
+            "shed_rate": round(statuses["shed"] / len(samples), 4),
+            "statuses": dict(statuses),
+        }
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "journeys": journeys,
+        "journeys_per_sec": round(journeys / elapsed, 1),
+        "steps": steps,
+        "lock_waits": {
+            "count": monitor.waits,
+            "total_ms": round(monitor.wait_time * 1e3, 1),
+            "locked_errors": monitor.locked_errors,
+        },
+    }
+
+def print_report(result: Dict) -> None:
+    print(f"{result['journeys']} journeys in {result['elapsed_seconds']}s ({result['journeys_per_sec']}/s)")
+    print(f"{'step':<18} {'requests':>8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'conflicts':>9} {'shed':>7}")
+    for step, stats in result["steps"].items():
+        print(
+            f"{step:<18} {stats['requests']:>8} {stats['rps']:>8} {stats['p50_ms']:>8} {stats['p95_ms']:>8}"
+            f" {stats['p99_ms']:>8} {stats['error_rate']:>7.1%} {stats['conflict_rate']:>9.1%} {stats['shed_rate']:>7.1%}"
+        )
+    locks = result["lock_waits"]
+    print(f"lock waits: {locks['count']} ({locks['total_ms']} ms), 'database is locked' errors: {locks['locked_errors']}")
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="In-process load test of the booking API")
+    parser.add_argument("--scenario", choices=("journey", "hot-slot"), default="journey")
+    parser.add_argument("--concurrency", type=int, default=20, help="Journeys in flight at most")
+    parser.add_argument("--rate", type=float, help="Journeys started per second (default: closed loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to keep starting journeys")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20, help="Pre-registered users for hot-slot")
+    parser.add_argument("--lock-threshold", type=float, default=20.0, help="Statement stall counted as a lock wait, ms")
+    parser.add_argument("--database", help="Database URL (default: a temporary SQLite file)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return result
+
+if __name__ == "__main__":
+    main()
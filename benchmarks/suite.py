@@ -0,0 +1,222 @@
+"""
+Benchmark suite for the hot paths, with a regression gate.
+
+Generates a dataset per size with app.scripts.generate_dataset, then times
+BookingRepository reads and availability checks, BookingService.create_booking,
+get_current_user, login (bcrypt included) and full HTTP round-trips through
+the ASGI app. Each case reports ops/s, p50 and p99.
+
+Results are compared against a JSON baseline; the run fails (exit status 1)
+when a case's p50 or throughput is worse than the baseline by more than the
+threshold. Baselines are machine-specific, so record one before making a
+change and compare after it on the same machine.
+
+Usage:
+    python -m benchmarks.suite --save                 # record benchmarks/baseline.json
+    python -m benchmarks.suite                        # compare against it
+    python -m benchmarks.suite --sizes small,medium,large --threshold 0.10
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.main import create_app
+from app.repositories.booking_repository import BookingRepository
+from app.schemas.auth import LoginRequest
+from app.schemas.booking import BookingCreate
+from app.scripts.generate_dataset import generate_dataset
+from app.services.auth_service import AuthService
+from app.services.booking_service import BookingService
+
+# users, devices, bookings
+SIZES = {
+    "small": (1_000, 100, 10_000),
+    "medium": (10_000, 500, 100_000),
+    "large": (100_000, 2_000, 1_000_000),
+}
+PASSWORD = "password123"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def measure(fn: Callable[[], object], min_time: float, max_ops: int) -> Dict[str, float]:
+    """
+    Call ``fn`` repeatedly for at least ``min_time`` seconds (or ``max_ops`` calls)
+    and summarise the per-call latencies
+    """
+    fn()  # warm up caches and connections
+    samples: List[float] = []
+    started = time.perf_counter()
+    while len(samples) < max_ops and (len(samples) < 5 or time.perf_counter() - started < min_time):
+        call_started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - call_started)
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "ops": len(samples),
+        "ops_per_sec": round(len(samples) / sum(samples), 1),
+        "p50_ms": round(cuts[49] * 1e3, 3),
+        "p99_ms": round(cuts[98] * 1e3, 3),
+    }
+
+def run_size(size: str, min_time: float, max_ops: int, seed: int) -> Dict[str, Dict[str, float]]:
+    users, devices, bookings = SIZES[size]
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_dataset(url, users, devices, bookings, seed=seed, password=PASSWORD)
+
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        try:
+            return run_cases(engine, Session, min_time, max_ops, seed)
+        finally:
+            engine.dispose()
+
+def run_cases(engine, Session, min_time: float, max_ops: int, seed: int) -> Dict[str, Dict[str, float]]:
+    rng = random.Random(seed)
+    with engine.connect() as connection:
+        hot_user, email = connection.execute(text(
+            "SELECT users.id, users.email FROM bookings JOIN users ON users.id = bookings.user_id "
+            "GROUP BY users.id ORDER BY count(*) DESC LIMIT 1"
+        )).one()
+        hot_device = connection.execute(text(
+            "SELECT device_id FROM bookings GROUP BY device_id ORDER BY count(*) DESC LIMIT 1"
+        )).scalar()
+        booking_ids = connection.execute(text("SELECT id FROM bookings")).scalars().all()
+        device_ids = connection.execute(text("SELECT id FROM devices")).scalars().all()
+        slots = connection.execute(
+            text("SELECT time_slot FROM bookings WHERE device_id = :id LIMIT 1000"), {"id": hot_device}
+        ).scalars().all()
+
+    # New bookings go far past the generated range so they never conflict
+    free_slots = (datetime(2100, 1, 1) + timedelta(hours=i) for i in itertools.count())
+    token = create_access_token(email)
+    headers = {"Authorization": f"Bearer {token}"}
+    loop = asyncio.new_event_loop()
+    db = Session()
+    repo = BookingRepository(db)
+    service = BookingService(db)
+    results = {}
+
+    def case(name: str, fn: Callable[[], object], ops: int = max_ops) -> None:
+        results[name] = measure(fn, min_time, ops)
+        print(f"  {name:<40} {results[name]['ops_per_sec']:>10.1f} ops/s"
+              f" p50 {results[name]['p50_ms']:>8.3f} ms p99 {results[name]['p99_ms']:>8.3f} ms")
+
+    def expire(fn):
+        # Time the query, not the identity map handing back the same objects
+        def run():
+            db.expire_all()
+            return fn()
+        return run
+
+    try:
+        case("repository.get_booking", expire(lambda: repo.get_booking(rng.choice(booking_ids))))
+        case("repository.get_user_booking_records", lambda: repo.get_user_booking_records(hot_user))
+        case("repository.get_device_booking_records", lambda: repo.get_device_booking_records(hot_device))
+        case("repository.check_time_slot_availability",
+             lambda: repo.check_time_slot_availability(hot_device, datetime.fromisoformat(str(rng.choice(slots)))))
+        case("repository.search_bookings", lambda: repo.search_bookings("battery", hot_user, 20, 0))
+        case("service.create_booking", lambda: service.create_booking(
+            BookingCreate(
+                device_id=rng.choice(device_ids),
+                description="Benchmark booking",
+                time_slot=next(free_slots),
+                address="1 Bench St"
+            ),
+            hot_user
+        ))
+        case("auth.get_current_user", expire(lambda: loop.run_until_complete(get_current_user(token, db))))
+        # bcrypt dominates login, so a handful of calls is enough
+        case("auth.login", lambda: AuthService(db).authenticate_user(
+            LoginRequest(email=email, password=PASSWORD)
+        ), ops=min(max_ops, 20))
+
+        # The app's own engine on the benchmark database; the lifespan must
+        # not migrate whatever the global DATABASE_URL points at
+        app = create_app(settings.model_copy(update={
+            "DATABASE_URL": engine.url.render_as_string(hide_password=False),
+            "DATABASE_INIT_ON_STARTUP": False,
+        }))
+        with TestClient(app) as client:
+            case("http.GET /bookings/user/me",
+                 lambda: client.get("/api/v1/bookings/user/me", headers=headers).raise_for_status())
+            case("http.GET /devices/",
+                 lambda: client.get("/api/v1/devices/", params={"limit": 100}).raise_for_status())
+            case("http.POST /bookings/", lambda: client.post("/api/v1/bookings/", headers=headers, json={
+                "device_id": rng.choice(device_ids),
+                "description": "Benchmark booking",
+                "time_slot": next(free_slots).isoformat(),
+                "address": "1 Bench St",
+            }).raise_for_status())
+    finally:
+        db.close()
+        loop.close()
+    return results
+
+def compare(baseline: Dict, results: Dict, threshold: float) -> List[str]:
+    """
+    Return a line per case that regressed beyond ``threshold`` (0.2 = 20%)
+    """
+    regressions = []
+    for size, cases in results.items():
+        for name, current in cases.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            if current["p50_ms"] > previous["p50_ms"] * (1 + threshold):
+                regressions.append(f"{size} {name}: p50 {previous['p50_ms']} -> {current['p50_ms']} ms")
+            if current["ops_per_sec"] < previous["ops_per_sec"] / (1 + threshold):
+                regressions.append(
+                    f"{size} {name}: {previous['ops_per_sec']} -> {current['ops_per_sec']} ops/s"
+                )
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths and gate on regressions")
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to run each case")
+    parser.add_argument("--max-ops", type=int, default=2000, help="Upper bound on calls per case")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes.split(","):
+        print(f"{size} ({'/'.join(map(str, SIZES[size]))} users/devices/bookings)")
+        results[size] = run_size(size, args.min_time, args.max_ops, args.seed)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save first")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(json.load(f), results, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
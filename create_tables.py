@@ -1,5 +1,4 @@
-from app.core.database import engine, Base
-from app.models.device import Device  # Import all models here
+from app.core.database import init_db
 from app.core.config import settings
 import os
 
@@ -12,10 +11,10 @@ def create_tables():
     if db_path and not os.path.exists(db_path):
         os.makedirs(db_path)
     
-    print("Creating database tables...")
+    print("Migrating database tables...")
     try:
-        Base.metadata.create_all(bind=engine)
-        print("Database tables created successfully!")
+        init_db()
+        print("Database tables migrated successfully!")
         
         # Verify the database file exists and has content
         db_file = settings.DATABASE_URL.replace('sqlite:///', '')
@@ -4,6 +4,8 @@ from fastapi import status
 from app.core.security import get_password_hash
 from app.models.user import User
 from app.models.device import Device
+from app.core.config import settings
+from app.services.idempotency_service import _response_cache
 
 @pytest.fixture
 def test_device(db_session):
@@ -36,26 +38,6 @@ def test_booking_data(test_device):
         "address": "123 Test St"
     }
 
-@pytest.fixture
-def auth_headers(client, test_user_data):
-    # Register user first
-    client.post(
-        "/api/v1/users/register",
-        json=test_user_data
-    )
-    
-    # Login to get token
-    response = client.post(
-        "/api/v1/auth/login",
-        json={
-            "email": test_user_data["email"],
-            "password": test_user_data["password"]
-        }
-    )
-    assert response.status_code == status.HTTP_200_OK
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
-
 def test_create_booking_success(client, auth_headers, test_booking_data):
     response = client.post(
         "/api/v1/bookings/",
@@ -360,4 +342,284 @@ def test_delete_booking_unauthorized(client, auth_headers, test_booking_data):
         headers=other_headers
     )
     assert response.status_code == status.HTTP_400_BAD_REQUEST
-    assert "Not authorized" in response.json()["detail"] 
\ No newline at end of file
+    assert "Not authorized" in response.json()["detail"] 
+
+def test_get_booking_etag_not_modified(client, auth_headers, test_booking_data):
+    create_response = client.post(
+        "/api/v1/bookings/",
+        json=test_booking_data,
+        headers=auth_headers
+    )
+    booking_id = create_response.json()["id"]
+
+    response = client.get(f"/api/v1/bookings/{booking_id}", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+
+    # Same version: no body
+    response = client.get(
+        f"/api/v1/bookings/{booking_id}",
+        headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+
+    # After an update the ETag changes and the full body comes back
+    client.patch(
+        f"/api/v1/bookings/{booking_id}",
+        json={"description": "Updated description"},
+        headers=auth_headers
+    )
+    response = client.get(
+        f"/api/v1/bookings/{booking_id}",
+        headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+def test_get_user_bookings_etag_not_modified(client, auth_headers, test_booking_data):
+    client.post("/api/v1/bookings/", json=test_booking_data, headers=auth_headers)
+
+    response = client.get("/api/v1/bookings/user/me", headers=auth_headers)
+    etag = response.headers["ETag"]
+    response = client.get(
+        "/api/v1/bookings/user/me",
+        headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+def test_update_booking_if_match(client, auth_headers, test_booking_data):
+    create_response = client.post(
+        "/api/v1/bookings/",
+        json=test_booking_data,
+        headers=auth_headers
+    )
+    booking_id = create_response.json()["id"]
+    assert create_response.json()["version"] == 1
+    etag = client.get(f"/api/v1/bookings/{booking_id}", headers=auth_headers).headers["ETag"]
+
+    response = client.patch(
+        f"/api/v1/bookings/{booking_id}",
+        json={"description": "First writer"},
+        headers={**auth_headers, "If-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["description"] == "First writer"
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] != etag
+
+    # A second writer holding the old ETag loses
+    response = client.patch(
+        f"/api/v1/bookings/{booking_id}",
+        json={"description": "Second writer"},
+        headers={**auth_headers, "If-Match": etag}
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    get_response = client.get(f"/api/v1/bookings/{booking_id}", headers=auth_headers)
+    assert get_response.json()["description"] == "First writer"
+
+def test_update_booking_if_match_not_found(client, auth_headers):
+    response = client.patch(
+        "/api/v1/bookings/999",
+        json={"description": "Updated description"},
+        headers={**auth_headers, "If-Match": '"999-1"'}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_delete_booking_if_match(client, auth_headers, test_booking_data):
+    create_response = client.post(
+        "/api/v1/bookings/",
+        json=test_booking_data,
+        headers=auth_headers
+    )
+    booking_id = create_response.json()["id"]
+
+    response = client.delete(
+        f"/api/v1/bookings/{booking_id}",
+        headers={**auth_headers, "If-Match": f'"{booking_id}-7"'}
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    response = client.delete(
+        f"/api/v1/bookings/{booking_id}",
+        headers={**auth_headers, "If-Match": f'"{booking_id}-1"'}
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+@pytest.fixture
+def clear_idempotency_cache():
+    _response_cache.clear()
+    yield
+    _response_cache.clear()
+
+def test_create_booking_idempotency_key_replays(client, auth_headers, test_booking_data, clear_idempotency_cache):
+    headers = {**auth_headers, "Idempotency-Key": "create-1"}
+    first = client.post("/api/v1/bookings/", json=test_booking_data, headers=headers)
+    assert first.status_code == status.HTTP_201_CREATED
+
+    # The retry gets the original booking instead of "already booked"
+    retry = client.post("/api/v1/bookings/", json=test_booking_data, headers=headers)
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    # Also after the in-memory front is gone
+    _response_cache.clear()
+    retry = client.post("/api/v1/bookings/", json=test_booking_data, headers=headers)
+    assert retry.json() == first.json()
+
+    response = client.get("/api/v1/bookings/user/me", headers=auth_headers)
+    assert len(response.json()) == 1
+
+def test_create_booking_idempotency_key_reused_for_other_request(client, auth_headers, test_booking_data, clear_idempotency_cache):
+    headers = {**auth_headers, "Idempotency-Key": "create-2"}
+    client.post("/api/v1/bookings/", json=test_booking_data, headers=headers)
+
+    response = client.post(
+        "/api/v1/bookings/",
+        json={**test_booking_data, "description": "Something else"},
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_create_booking_idempotency_key_too_long(client, auth_headers, test_booking_data, clear_idempotency_cache):
+    headers = {**auth_headers, "Idempotency-Key": "k" * 256}
+    response = client.post("/api/v1/bookings/", json=test_booking_data, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/api/v1/bookings/user/me", headers=auth_headers).json() == []
+
+def test_create_bookings_batch(client, auth_headers, test_booking_data, clear_idempotency_cache):
+    second_time = (datetime.now() + timedelta(days=2)).isoformat()
+    batch = {"bookings": [test_booking_data, {**test_booking_data, "time_slot": second_time}]}
+    headers = {**auth_headers, "Idempotency-Key": "batch-1"}
+
+    response = client.post("/api/v1/bookings/batch", json=batch, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.json()) == 2
+
+    retry = client.post("/api/v1/bookings/batch", json=batch, headers=headers)
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert retry.json() == response.json()
+
+def test_create_bookings_batch_all_or_nothing(client, auth_headers, test_booking_data):
+    client.post("/api/v1/bookings/", json=test_booking_data, headers=auth_headers)
+    other_time = (datetime.now() + timedelta(days=2)).isoformat()
+    batch = {"bookings": [{**test_booking_data, "time_slot": other_time}, test_booking_data]}
+
+    response = client.post("/api/v1/bookings/batch", json=batch, headers=auth_headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "time slot is already booked" in response.json()["detail"]
+
+    response = client.get("/api/v1/bookings/user/me", headers=auth_headers)
+    assert len(response.json()) == 1
+
+def test_get_device_bookings_expand_device(client, auth_headers, test_booking_data):
+    client.post("/api/v1/bookings/", json=test_booking_data, headers=auth_headers)
+
+    response = client.get(
+        f"/api/v1/bookings/device/{test_booking_data['device_id']}?expand=device",
+        headers=auth_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0]["device"] == {"id": test_booking_data["device_id"], "name": "Test Device"}
+
+    # Plain and expanded lists are different representations
+    plain = client.get(f"/api/v1/bookings/device/{test_booking_data['device_id']}", headers=auth_headers)
+    assert "device" not in plain.json()[0]
+    assert plain.headers["ETag"] != response.headers["ETag"]
+
+def test_get_user_bookings_expand_user_requires_admin(client, auth_headers, test_booking_data, test_user_data, monkeypatch):
+    client.post("/api/v1/bookings/", json=test_booking_data, headers=auth_headers)
+
+    response = client.get("/api/v1/bookings/user/me?expand=user", headers=auth_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user_data["email"]])
+    response = client.get("/api/v1/bookings/user/me?expand=user&expand=device", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    booking = response.json()[0]
+    assert booking["user"]["email"] == test_user_data["email"]
+    assert booking["device"]["name"] == "Test Device"
+
+def test_get_device_bookings_expand_invalid(client, auth_headers, test_booking_data):
+    response = client.get(
+        f"/api/v1/bookings/device/{test_booking_data['device_id']}?expand=owner",
+        headers=auth_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_search_bookings(client, auth_headers, test_booking_data):
+    client.post(
+        "/api/v1/bookings/",
+        json={**test_booking_data, "description": "Cracked screen after a drop"},
+        headers=auth_headers
+    )
+    client.post(
+        "/api/v1/bookings/",
+        json={
+            **test_booking_data,
+            "description": "Battery drains fast",
+            "address": "42 Screen Street",
+            "time_slot": (datetime.now() + timedelta(days=2)).isoformat()
+        },
+        headers=auth_headers
+    )
+
+    response = client.get("/api/v1/bookings/search?q=cracked screen", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["description"] == "Cracked screen after a drop"
+    assert "<mark>" in data[0]["snippet"]
+
+    # Matches the address too; last term is a prefix
+    response = client.get("/api/v1/bookings/search?q=scr", headers=auth_headers)
+    assert len(response.json()) == 2
+
+    response = client.get("/api/v1/bookings/search?q=scr&limit=1&offset=1", headers=auth_headers)
+    assert len(response.json()) == 1
+
+    # FTS syntax in the input is treated as text
+    response = client.get('/api/v1/bookings/search?q="AND (', headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+
+def test_search_bookings_only_own(client, auth_headers, test_booking_data):
+    client.post(
+        "/api/v1/bookings/",
+        json={**test_booking_data, "description": "Cracked screen"},
+        headers=auth_headers
+    )
+    other_user = {
+        "email": "other@example.com",
+        "password": "testpass123",
+        "name": "Other User",
+        "address": "456 Other St"
+    }
+    client.post("/api/v1/users/register", json=other_user)
+    login_response = client.post(
+        "/api/v1/auth/login",
+        json={"email": other_user["email"], "password": other_user["password"]}
+    )
+    other_headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    response = client.get("/api/v1/bookings/search?q=cracked", headers=other_headers)
+    assert response.json() == []
+
+def test_search_bookings_follows_updates(client, auth_headers, test_booking_data):
+    booking_id = client.post(
+        "/api/v1/bookings/",
+        json={**test_booking_data, "description": "Cracked screen"},
+        headers=auth_headers
+    ).json()["id"]
+    client.patch(
+        f"/api/v1/bookings/{booking_id}",
+        json={"description": "Broken hinge"},
+        headers=auth_headers
+    )
+
+    assert client.get("/api/v1/bookings/search?q=cracked", headers=auth_headers).json() == []
+    assert len(client.get("/api/v1/bookings/search?q=hinge", headers=auth_headers).json()) == 1
+
+    client.delete(f"/api/v1/bookings/{booking_id}", headers=auth_headers)
+    assert client.get("/api/v1/bookings/search?q=hinge", headers=auth_headers).json() == []
@@ -1,4 +1,7 @@
 import pytest
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.models.device import Device
 
 def test_list_devices_empty(client):
     response = client.get("/api/v1/devices/")
@@ -23,4 +26,101 @@ def test_create_and_list_devices(client):
     list_resp = client.get("/api/v1/devices/")
     assert list_resp.status_code == 200
     names = {d["name"] for d in list_resp.json()}
-    assert names == {"API Device", "API Device 2"} 
\ No newline at end of file
+    assert names == {"API Device", "API Device 2"} 
+
+def login(client, user_data):
+    client.post("/api/v1/users/register", json=user_data)
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"email": user_data["email"], "password": user_data["password"]}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_delete_device_admin_only(client, test_user_data, monkeypatch):
+    device_id = client.post("/api/v1/devices/", json={"name": "API Device"}).json()["id"]
+    headers = login(client, test_user_data)
+
+    response = client.delete(f"/api/v1/devices/{device_id}", headers=headers)
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user_data["email"]])
+    booking = {
+        "device_id": device_id,
+        "description": "Test booking",
+        "time_slot": (datetime.now() + timedelta(days=1)).isoformat(),
+        "address": "123 Test St"
+    }
+    assert client.post("/api/v1/bookings/", json=booking, headers=headers).status_code == 201
+
+    response = client.delete(f"/api/v1/devices/{device_id}", headers=headers)
+    assert response.status_code == 204
+    assert client.get("/api/v1/devices/").json() == []
+    assert client.get("/api/v1/bookings/user/me", headers=headers).json() == []
+
+    response = client.delete(f"/api/v1/devices/{device_id}", headers=headers)
+    assert response.status_code == 404
+
+def test_list_devices_keyset_pagination(client):
+    ids = [client.post("/api/v1/devices/", json={"name": f"Device {i}"}).json()["id"] for i in range(5)]
+
+    first = client.get("/api/v1/devices/?limit=2")
+    assert [d["id"] for d in first.json()] == ids[:2]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(f"/api/v1/devices/?limit=2&cursor={cursor}")
+    assert [d["id"] for d in second.json()] == ids[2:4]
+
+    last = client.get(f"/api/v1/devices/?limit=2&cursor={second.headers['X-Next-Cursor']}")
+    assert [d["id"] for d in last.json()] == ids[4:]
+    assert "X-Next-Cursor" not in last.headers
+
+def test_list_devices_without_paging_returns_all(client, db_session):
+    db_session.add_all([Device(name=f"Device {i}") for i in range(150)])
+    db_session.commit()
+
+    response = client.get("/api/v1/devices/")
+    assert len(response.json()) == 150
+    assert "X-Next-Cursor" not in response.headers
+
+    # A cursor alone pages with the default page size
+    response = client.get("/api/v1/devices/?cursor=0")
+    assert len(response.json()) == 100
+    assert response.headers["X-Next-Cursor"] == str(response.json()[-1]["id"])
+
+def test_search_devices_by_prefix(client):
+    client.post("/api/v1/devices/", json={"name": "MacBook Pro 16-inch"})
+    client.post("/api/v1/devices/", json={"name": "iPhone 15 Pro"})
+
+    response = client.get("/api/v1/devices/?q=mac")
+    assert [d["name"] for d in response.json()] == ["MacBook Pro 16-inch"]
+
+    # Devices created after the index was built are found too
+    client.post("/api/v1/devices/", json={"name": "Macintosh Classic"})
+    response = client.get("/api/v1/devices/?q=mac")
+    assert {d["name"] for d in response.json()} == {"MacBook Pro 16-inch", "Macintosh Classic"}
+
+    # A blank query would match every device
+    assert client.get("/api/v1/devices/", params={"q": "  "}).status_code == 422
+
+def test_bulk_import_devices(client, test_user_data, monkeypatch):
+    headers = login(client, test_user_data)
+    upload = {"file": ("devices.csv", b"id,name\n,Pixel 8\n,\n7,MacBook Pro\n", "text/csv")}
+
+    response = client.post("/api/v1/devices/bulk", files=upload, headers=headers)
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user_data["email"]])
+    response = client.post("/api/v1/devices/bulk", files=upload, headers=headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["processed"], result["imported"], result["failed"]) == (3, 2, 1)
+    assert result["errors"][0]["line"] == 3
+
+    names = {d["name"] for d in client.get("/api/v1/devices/").json()}
+    assert names == {"Pixel 8", "MacBook Pro"}
+    assert [d["name"] for d in client.get("/api/v1/devices/", params={"q": "mac"}).json()] == ["MacBook Pro"]
+
+    upload = {"file": ("devices.txt", b'{"name": "iPad"}\n', "text/plain")}
+    assert client.post("/api/v1/devices/bulk", files=upload, headers=headers).status_code == 400
+    response = client.post("/api/v1/devices/bulk", params={"format": "jsonl"}, files=upload, headers=headers)
+    assert response.json()["imported"] == 1
@@ -39,4 +39,19 @@ def test_register_user_missing_fields(client):
     errors = response.json()["detail"]
     assert any(error["loc"][1] == "email" for error in errors)
     assert any(error["loc"][1] == "password" for error in errors)
-    assert any(error["loc"][1] == "name" for error in errors) 
\ No newline at end of file
+    assert any(error["loc"][1] == "name" for error in errors) 
+
+def test_delete_current_user(client, test_user_data):
+    client.post("/api/v1/users/register", json=test_user_data)
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"email": test_user_data["email"], "password": test_user_data["password"]}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = client.delete("/api/v1/users/me", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    # The token no longer maps to a user
+    response = client.get("/api/v1/bookings/user/me", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
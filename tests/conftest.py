@@ -1,4 +1,5 @@
 import pytest
+from fastapi import status
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -7,6 +8,7 @@ from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.core.database import Base, get_db
 from app.core.config import settings
+from app.core.device_index import reset_device_index
 
 # Create test database engine
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -26,9 +28,16 @@ def db_session():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        # In-process caches outlive the per-test database
+        reset_device_index()
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(db_session, monkeypatch):
+    # Fail any API test whose request runs one statement over and over (an N+1)
+    monkeypatch.setattr(settings, "QUERY_STATS_MAX_REPEATS", 3)
+    # Tests run against the in-memory database, not the migrated app.db
+    monkeypatch.setattr(settings, "DATABASE_INIT_ON_STARTUP", False)
+
     def override_get_db():
         try:
             yield db_session
@@ -47,4 +56,24 @@ def test_user_data():
         "password": "testpassword123",
         "name": "Test User",
         "address": "123 Test St"
-    } 
\ No newline at end of file
+    } 
+
+@pytest.fixture
+def auth_headers(client, test_user_data):
+    # Register user first
+    client.post(
+        "/api/v1/users/register",
+        json=test_user_data
+    )
+    
+    # Login to get token
+    response = client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        }
+    )
+    assert response.status_code == status.HTTP_200_OK
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
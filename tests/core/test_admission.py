@@ -0,0 +1,78 @@
+import anyio
+import pytest
+from app.core.admission import AdmissionClass, classify, get_admission_classes, reset_admission_classes
+from app.core.config import settings
+
+@pytest.fixture
+def admission():
+    reset_admission_classes()
+    yield get_admission_classes()
+    reset_admission_classes()
+
+def test_classify_routes():
+    assert classify("POST", "/api/v1/auth/login") == "auth"
+    assert classify("POST", "/api/v1/users/register") == "auth"
+    assert classify("GET", "/api/v1/bookings/me") == "read"
+    assert classify("PATCH", "/api/v1/bookings/1") == "write"
+    assert classify("GET", "/health/ready") == "exempt"
+
+    # Prefixes follow API_V1_STR
+    v2 = settings.model_copy(update={"API_V1_STR": "/api/v2"})
+    assert classify("POST", "/api/v2/auth/login", v2) == "auth"
+    assert classify("GET", "/api/v2/admin/profiles", v2) == "exempt"
+    assert classify("POST", "/api/v1/auth/login", v2) == "write"
+
+def test_queue_hands_over_slots_and_sheds():
+    async def scenario():
+        admission_class = AdmissionClass("read", limit=1, queue=1)
+        assert await admission_class.acquire(budget=1.0) is None
+        admitted = []
+
+        async def queued():
+            admitted.append(await admission_class.acquire(budget=1.0))
+
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(queued)
+            await anyio.sleep(0.01)
+            assert admission_class.queued == 1
+            # The queue is full
+            assert await admission_class.acquire(budget=1.0) == "queue_full"
+            admission_class.release(service_time=0.5)
+        assert admitted == [None]
+        assert admission_class.in_flight == 1
+        assert admission_class.service_time == pytest.approx(0.1)
+
+        # One slot, busy for ~10 s per request: a 1 s budget can't be met
+        admission_class.service_time = 10.0
+        assert admission_class.expected_wait() == pytest.approx(10.0)
+        assert await admission_class.acquire(budget=1.0) == "deadline"
+        # A queued request that isn't served within its budget gives up
+        admission_class.service_time = 0.0
+        assert await admission_class.acquire(budget=0.01) == "timeout"
+        assert admission_class.queued == 0
+        assert admission_class.shed == {"queue_full": 1, "deadline": 1, "timeout": 1}
+
+    anyio.run(scenario)
+
+def test_overloaded_class_gets_fast_503(client, admission, monkeypatch):
+    reads = admission["read"]
+    reads.in_flight = reads.limit
+    reads.service_time = 5.0 * reads.limit
+
+    response = client.get("/api/v1/devices/", headers={"X-Request-Timeout": "1"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    assert response.json()["reason"] == "deadline"
+
+    # Other classes and exempt routes are unaffected
+    assert client.get("/health/live").status_code == 200
+    assert client.post("/api/v1/auth/login", json={"email": "a@example.com", "password": "x"}).status_code != 503
+    metrics = client.get("/metrics").text
+    assert 'admission_requests_total{class="read",outcome="shed_deadline"} 1' in metrics
+    assert 'admission{class="read",state="queued"} 0' in metrics
+
+    reads.in_flight = 0
+    assert client.get("/api/v1/devices/").status_code == 200
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", False)
+    reads.in_flight = reads.limit
+    assert client.get("/api/v1/devices/").status_code == 200
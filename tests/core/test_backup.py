@@ -0,0 +1,110 @@
+import gzip
+import sqlite3
+import time
+import pytest
+from app.core.backup import BackupInProgress, BackupManager, reset_backup_manager
+from app.core.config import settings
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "app.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE bookings (id INTEGER PRIMARY KEY, description TEXT)")
+    conn.executemany("INSERT INTO bookings (description) VALUES (?)", [("x" * 500,)] * 2000)
+    conn.commit()
+    conn.close()
+    return path
+
+def manager(database, directory, **kwargs):
+    options = {"retention": 2, "pages_per_step": 50, "step_sleep": 0.0, "max_restarts": 3, **kwargs}
+    return BackupManager(database, str(directory), **options)
+
+def restore(path, tmp_path):
+    restored = tmp_path / "restored.db"
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            restored.write_bytes(f.read())
+    else:
+        restored.write_bytes(open(path, "rb").read())
+    conn = sqlite3.connect(restored)
+    try:
+        assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        return conn.execute("SELECT count(*) FROM bookings").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_stepped_backup_is_compressed_and_pruned(database, tmp_path):
+    backups = manager(database, tmp_path / "backups")
+    results = [backups.backup() for _ in range(3)]
+
+    assert results[0]["steps"] > 1
+    assert results[0]["restarts"] == 0
+    assert results[0]["name"].endswith(".db.gz")
+    assert results[2]["removed"] == [results[0]["name"]]
+    assert [backup["name"] for backup in backups.list()] == [results[2]["name"], results[1]["name"]]
+    assert restore(str(tmp_path / "backups" / results[2]["name"]), tmp_path) == 2000
+
+def test_vacuum_into_snapshot(database, tmp_path):
+    result = manager(database, tmp_path / "backups").backup("vacuum", compress=False)
+    assert result["name"].endswith(".db")
+    assert restore(str(tmp_path / "backups" / result["name"]), tmp_path) == 2000
+
+def test_concurrent_writes_finish_in_one_step(database, tmp_path, monkeypatch):
+    connect = sqlite3.connect
+    writer = connect(database)
+
+    class WrittenBetweenSteps:
+        """
+        Source connection whose database another connection writes to after every backup step
+        """
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+        def backup(self, target, pages=-1, progress=None, sleep=0.25):
+            def step(*args):
+                writer.execute("INSERT INTO bookings (description) VALUES ('concurrent')")
+                writer.commit()
+                if progress is not None:
+                    progress(*args)
+            return self.conn.backup(target, pages=pages, progress=step, sleep=sleep)
+
+    def connect_source(path, *args, **kwargs):
+        conn = connect(path, *args, **kwargs)
+        return WrittenBetweenSteps(conn) if path == database else conn
+    monkeypatch.setattr("app.core.backup.sqlite3.connect", connect_source)
+
+    result = manager(database, tmp_path / "backups", max_restarts=2).backup(compress=False)
+    writer.close()
+
+    assert result["restarts"] == 3
+    assert restore(str(tmp_path / "backups" / result["name"]), tmp_path) > 2000
+
+def test_one_backup_at_a_time(database, tmp_path):
+    backups = manager(database, tmp_path / "backups")
+    backups._lock.acquire()
+    with pytest.raises(BackupInProgress):
+        backups.backup()
+    with pytest.raises(BackupInProgress):
+        backups.start()
+    backups._lock.release()
+
+def test_admin_starts_backup(client, test_user_data, auth_headers, database, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{database}")
+    monkeypatch.setattr(settings, "BACKUP_DIR", str(tmp_path / "backups"))
+    reset_backup_manager()
+    assert client.post("/api/v1/admin/backups", headers=auth_headers).status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user_data["email"]])
+    response = client.post("/api/v1/admin/backups?method=vacuum", headers=auth_headers)
+    assert response.status_code == 202
+    deadline = time.monotonic() + 10
+    while (status := client.get("/api/v1/admin/backups", headers=auth_headers).json())["running"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert status["last"]["method"] == "vacuum"
+    assert [backup["name"] for backup in status["backups"]] == [status["last"]["name"]]
+    reset_backup_manager()
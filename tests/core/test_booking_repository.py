@@ -1,9 +1,22 @@
 import pytest
 from datetime import datetime, timedelta
+from sqlalchemy import event, update
 from sqlalchemy.exc import IntegrityError
 from app.repositories.booking_repository import BookingRepository
 from app.schemas.booking import BookingCreate, BookingUpdate
 from app.models.booking import Booking
+from app.models.device import Device
+from app.models.user import User
+
+@pytest.fixture(autouse=True)
+def referenced_rows(db_session):
+    # Bookings reference these devices and users; foreign keys are enforced
+    db_session.add_all([Device(id=1, name="Device 1"), Device(id=2, name="Device 2")])
+    db_session.add_all([
+        User(id=user_id, name=f"User {user_id}", email=f"user{user_id}@example.com", password="hashed")
+        for user_id in (1, 2)
+    ])
+    db_session.commit()
 
 @pytest.fixture
 def booking_repo(db_session):
@@ -136,6 +149,25 @@ def test_delete_booking(booking_repo, test_booking_data):
     # Try to delete non-existent booking
     assert booking_repo.delete_booking(999) is False
 
+def test_writes_after_concurrent_update(booking_repo, test_booking_data, db_session):
+    booking = booking_repo.create_booking(BookingCreate(**test_booking_data), user_id=1)
+
+    def concurrent_update(session, flush_context, instances):
+        # Another request bumps the row after the repository loaded it
+        bookings = Booking.__table__
+        session.connection().execute(
+            update(bookings).where(bookings.c.id == booking.id).values(version=bookings.c.version + 1)
+        )
+
+    # Without If-Match the last writer wins
+    event.listen(db_session, "before_flush", concurrent_update, once=True)
+    updated_booking = booking_repo.update_booking(booking.id, BookingUpdate(description="Last writer"))
+    assert updated_booking.description == "Last writer"
+    assert updated_booking.version == 3
+
+    event.listen(db_session, "before_flush", concurrent_update, once=True)
+    assert booking_repo.delete_booking(booking.id) is True
+
 def test_check_time_slot_availability(booking_repo, test_booking_data):
     # Create a booking
     booking_create = BookingCreate(**test_booking_data)
@@ -152,4 +184,23 @@ def test_check_time_slot_availability(booking_repo, test_booking_data):
     assert booking_repo.check_time_slot_availability(
         test_booking_data["device_id"],
         other_time
-    ) 
\ No newline at end of file
+    ) 
+
+def test_booking_records(booking_repo, test_booking_data, db_session):
+    booking_create1 = BookingCreate(**test_booking_data)
+    booking_create2 = BookingCreate(**{**test_booking_data, "time_slot": test_booking_data["time_slot"] + timedelta(hours=1)})
+    booking_id = booking_repo.create_booking(booking_create1, user_id=1).id
+    booking_repo.create_booking(booking_create2, user_id=2)
+    db_session.expunge_all()
+
+    user_records = booking_repo.get_user_booking_records(user_id=1)
+    assert len(user_records) == 1
+    assert user_records[0].id == booking_id
+    assert user_records[0].time_slot == test_booking_data["time_slot"]
+    assert user_records[0].version == 1
+
+    device_records = booking_repo.get_device_booking_records(device_id=1)
+    assert len(device_records) == 2
+
+    # Records never populate the identity map
+    assert len(db_session.identity_map) == 0
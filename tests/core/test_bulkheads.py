@@ -0,0 +1,54 @@
+import threading
+import anyio
+import pytest
+from app.core.bulkhead import Bulkhead, bulkhead, bulkhead_stats, reset_bulkheads
+from app.core.config import settings
+
+@pytest.fixture
+def bulkheads():
+    reset_bulkheads()
+    yield
+    reset_bulkheads()
+
+def test_saturated_pool_does_not_starve_another():
+    async def scenario():
+        auth = Bulkhead("auth", 1)
+        reads = Bulkhead("db_read", 1)
+        release = threading.Event()
+
+        async with anyio.create_task_group() as tasks:
+            # Two slow hashes: one holds auth's only thread, one waits for it
+            tasks.start_soon(auth.run, release.wait)
+            tasks.start_soon(auth.run, release.wait)
+            await anyio.sleep(0.05)
+            assert auth.stats()["busy"] == 1
+            assert auth.stats()["waiting"] == 1
+
+            with anyio.fail_after(1):
+                assert await reads.run(lambda booking_id: booking_id, 42) == 42
+            release.set()
+        assert auth.stats() == {"size": 1, "busy": 0, "waiting": 0, "completed": 2}
+
+    anyio.run(scenario)
+
+def test_unknown_bulkhead():
+    with pytest.raises(ValueError):
+        bulkhead("reports")
+
+def test_endpoints_run_in_their_bulkhead(client, test_user_data, bulkheads, monkeypatch):
+    client.post("/api/v1/users/register", json=test_user_data)
+    client.post("/api/v1/auth/login", json={"email": test_user_data["email"], "password": test_user_data["password"]})
+    client.get("/api/v1/devices/")
+
+    stats = bulkhead_stats()
+    assert stats["auth"]["completed"] == 2
+    assert stats["db_read"]["completed"] == 1
+    assert stats["db_write"]["completed"] == 0
+    metrics = client.get("/metrics").text
+    assert 'bulkhead_threads{pool="auth",state="size"} 4' in metrics
+    assert 'bulkhead_calls_total{pool="auth"} 2' in metrics
+    assert 'bulkhead_wait_seconds_count{pool="auth"}' in metrics
+
+    monkeypatch.setattr(settings, "BULKHEADS_ENABLED", False)
+    assert client.get("/api/v1/devices/").status_code == 200
+    assert bulkhead_stats()["db_read"]["completed"] == 1
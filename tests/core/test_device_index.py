@@ -0,0 +1,84 @@
+import threading
+import pytest
+from app.core.config import settings
+from app.core.device_index import DeviceNameIndex
+from app.repositories.records import DeviceRecord
+
+@pytest.fixture
+def index():
+    index = DeviceNameIndex()
+    index.rebuild([
+        DeviceRecord(1, "MacBook Pro 16-inch"),
+        DeviceRecord(2, "iPhone 15 Pro"),
+        DeviceRecord(3, "iPad Pro"),
+        DeviceRecord(4, "Dell XPS 15"),
+    ])
+    return index
+
+def test_search_matches_word_prefixes(index):
+    assert [d.id for d in index.search("mac", 10)] == [1]
+    assert {d.id for d in index.search("PRO", 10)} == {1, 2, 3}
+    assert {d.id for d in index.search("15", 10)} == {2, 4}
+    assert [d.id for d in index.search("ipad pro", 10)] == [3]
+    assert index.search("pixel", 10) == []
+
+def test_search_limit(index):
+    assert len(index.search("pro", 2)) == 2
+
+def test_add_and_remove(index):
+    index.add(5, "Google Pixel 8")
+    assert index.search("pix", 10) == [DeviceRecord(5, "Google Pixel 8")]
+
+    index.remove(5)
+    assert index.search("pix", 10) == []
+    assert len(index) == 4
+
+def test_sync_picks_up_new_devices(index, monkeypatch):
+    monkeypatch.setattr(settings, "DEVICE_INDEX_REFRESH_SECONDS", 0)
+    requested = []
+
+    def load_after(max_id):
+        requested.append(max_id)
+        return [DeviceRecord(7, "Surface Laptop")]
+
+    index.sync(lambda: [], load_after)
+    assert requested == [4]
+    assert [d.id for d in index.search("surface", 10)] == [7]
+
+def test_concurrent_syncs_rebuild_once(monkeypatch):
+    monkeypatch.setattr(settings, "DEVICE_INDEX_REFRESH_SECONDS", 60)
+    index = DeviceNameIndex()
+    loads = []
+    loading = threading.Event()
+    release = threading.Event()
+
+    def load_all():
+        loads.append(1)
+        loading.set()
+        release.wait(5)
+        return [DeviceRecord(1, "MacBook Pro")]
+
+    threads = [threading.Thread(target=index.sync, args=(load_all, lambda max_id: [])) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert loading.wait(5)
+    # Created while the rebuild was loading: not lost when it swaps in
+    index.add(2, "Google Pixel 8")
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(loads) == 1
+    assert {d.id for d in index.search("", 10)} == {1, 2}
+
+    # Once built, a due rebuild doesn't hold up the other callers
+    monkeypatch.setattr(settings, "DEVICE_INDEX_REBUILD_SECONDS", 0)
+    loading.clear()
+    release.clear()
+    rebuilding = threading.Thread(target=index.sync, args=(load_all, lambda max_id: []))
+    rebuilding.start()
+    assert loading.wait(5)
+    index.sync(load_all, lambda max_id: [])
+    assert len(loads) == 2
+    release.set()
+    rebuilding.join(5)
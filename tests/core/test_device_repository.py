@@ -1,5 +1,9 @@
 import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.models.booking import Booking
 from app.models.device import Device
+from app.models.user import User
 from app.repositories.device_repository import DeviceRepository
 from app.schemas.device import DeviceCreate
 
@@ -20,4 +24,41 @@ def test_create_and_get_all_devices(db_session):
     devices = repo.get_all_devices()
     assert len(devices) == 2
     names = {d.name for d in devices}
-    assert names == {"Test Device", "Another Device"} 
\ No newline at end of file
+    assert names == {"Test Device", "Another Device"} 
+
+def test_get_all_device_records(db_session):
+    repo = DeviceRepository(db_session)
+    device = repo.create_device(DeviceCreate(name="Test Device"))
+    db_session.expunge_all()
+
+    records = repo.get_all_device_records()
+    assert [(r.id, r.name) for r in records] == [(device.id, "Test Device")]
+    assert len(db_session.identity_map) == 0
+
+def test_delete_device_cascades_in_database(db_session):
+    repo = DeviceRepository(db_session)
+    device = repo.create_device(DeviceCreate(name="Test Device"))
+    user = User(name="User", email="user@example.com", password="hashed")
+    db_session.add(user)
+    db_session.commit()
+    for hours in range(3):
+        db_session.add(Booking(
+            device_id=device.id, user_id=user.id, description="Test booking",
+            time_slot=datetime(2030, 1, 1) + timedelta(hours=hours), address="123 Test St"
+        ))
+    db_session.commit()
+    device_id = device.id
+
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        assert repo.delete_device(device_id) is True
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+
+    # One DELETE; the bookings go through ON DELETE CASCADE
+    assert len(statements) == 1
+    assert db_session.query(Booking).count() == 0
+    assert repo.delete_device(device_id) is False
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from app.scripts import generate_dataset as generate_dataset_module
+from app.scripts.generate_dataset import DEFAULT_START, generate_dataset
+
+def dump(url):
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        rows = {
+            table: connection.execute(text(f"SELECT * FROM {table} ORDER BY id")).all()
+            for table in ("users", "devices", "bookings")
+        }
+        fts = connection.execute(text("SELECT count(*) FROM bookings_fts WHERE bookings_fts MATCH 'repair'")).scalar()
+    engine.dispose()
+    return rows, fts
+
+class Tomorrow(datetime):
+    """
+    The clock a day later, to check that the output doesn't depend on it
+    """
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(days=1)
+
+    @classmethod
+    def utcnow(cls):
+        return datetime.utcnow() + timedelta(days=1)
+
+def test_generate_dataset_is_reproducible(tmp_path, monkeypatch):
+    urls = [f"sqlite:///{tmp_path / name}" for name in ("a.db", "b.db")]
+    generate_dataset(urls[0], users=50, devices=5, bookings=400, seed=3, days=14, batch_size=64)
+    monkeypatch.setattr(generate_dataset_module, "datetime", Tomorrow)
+    generate_dataset(urls[1], users=50, devices=5, bookings=400, seed=3, days=14, batch_size=64)
+
+    rows, fts = dump(urls[0])
+    other = dump(urls[1])[0]
+    assert [table for table in rows if rows[table] != other[table]] == ["users"]
+    # Users differ only in the bcrypt salt
+    assert [user[:3] + user[4:] for user in rows["users"]] == [user[:3] + user[4:] for user in other["users"]]
+    assert [len(rows[table]) for table in ("users", "devices", "bookings")] == [50, 5, 400]
+    # All users share one precomputed hash
+    assert len({user.password for user in rows["users"]}) == 1
+    # No double bookings, and the full-text index was rebuilt after the load
+    assert len({(b.device_id, b.time_slot) for b in rows["bookings"]}) == 400
+    assert fts == sum("repair" in b.description.lower() for b in rows["bookings"])
+
+    # Bookings start on DEFAULT_START and span the given days
+    assert min(b.time_slot for b in rows["bookings"]).startswith(str(DEFAULT_START))
+    assert max(b.time_slot for b in rows["bookings"]) < str(DEFAULT_START + timedelta(days=14))
+
+    # Hot devices take a disproportionate share
+    per_device = sorted((sum(b.device_id == d.id for b in rows["bookings"]) for d in rows["devices"]), reverse=True)
+    assert per_device[0] > 2 * per_device[-1]
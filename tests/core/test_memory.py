@@ -0,0 +1,62 @@
+import tracemalloc
+import pytest
+from app.core.config import settings
+from app.core.memory import MemoryDiagnostics, TracemallocNotRunning, reset_memory_diagnostics
+
+@pytest.fixture
+def diagnostics():
+    reset_memory_diagnostics()
+    yield
+    tracemalloc.stop()
+    reset_memory_diagnostics()
+
+def test_diff_reports_growth_by_line(diagnostics):
+    memory = MemoryDiagnostics(max_snapshots=2)
+    with pytest.raises(TracemallocNotRunning):
+        memory.snapshot()
+
+    memory.start()
+    before = memory.snapshot()["id"]
+    retained = [bytearray(1024) for _ in range(200)]
+    after = memory.snapshot()["id"]
+
+    diff = memory.diff(before, after)
+    top = diff["top"][0]
+    assert top["location"].startswith(__file__ + ":")
+    assert top["size_diff"] >= 200 * 1024
+    assert top["count_diff"] >= 200
+    assert len(retained) == 200
+
+    # Only the newest snapshots are kept
+    memory.snapshot()
+    assert memory.diff(before, after) is None
+
+def test_memory_endpoints_are_admin_only(client, test_user_data, auth_headers, diagnostics, monkeypatch):
+    assert client.get("/api/v1/admin/memory", headers=auth_headers).status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user_data["email"]])
+    status = client.get("/api/v1/admin/memory", headers=auth_headers).json()
+    assert status["tracing"] is False
+    assert "idempotency_responses" in status["caches"]
+    assert status["identity_maps"]["sessions"] >= 1
+    assert client.post("/api/v1/admin/memory/snapshots", headers=auth_headers).status_code == 409
+
+    response = client.post("/api/v1/admin/memory/tracemalloc/start?frames=2", headers=auth_headers)
+    assert response.json()["tracing"] is True
+    assert response.json()["frames"] == 2
+    first = client.post("/api/v1/admin/memory/snapshots", headers=auth_headers).json()["id"]
+    client.get("/api/v1/devices/", headers=auth_headers)
+    second = client.post("/api/v1/admin/memory/snapshots", headers=auth_headers)
+    assert second.status_code == 201
+
+    response = client.get(
+        f"/api/v1/admin/memory/snapshots/{first}/diff/{second.json()['id']}?group_by=filename",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["from"] == first
+    assert client.get(f"/api/v1/admin/memory/snapshots/{first}/diff/999", headers=auth_headers).status_code == 404
+
+    response = client.post("/api/v1/admin/memory/tracemalloc/stop", headers=auth_headers)
+    assert response.json()["tracing"] is False
+    assert [snapshot["id"] for snapshot in response.json()["snapshots"]] == [first, second.json()["id"]]
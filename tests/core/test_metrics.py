@@ -0,0 +1,91 @@
+import threading
+from app.core.health import HealthCheck
+from app.core.metrics import Counter, Histogram, REGISTRY, render
+
+def test_counter_and_histogram_render():
+    counter = Counter("test_events_total", "Test events", ("kind",))
+    histogram = Histogram("test_latency_seconds", "Test latency", buckets=(0.1, 1.0))
+    try:
+        threads = [threading.Thread(target=lambda: [counter.labels("a").inc() for _ in range(1000)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for value in (0.05, 0.5, 5.0):
+            histogram.labels().observe(value)
+
+        text = render()
+        assert 'test_events_total{kind="a"} 4000' in text
+        assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+        assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "test_latency_seconds_count 3" in text
+        assert "test_latency_seconds_sum 5.55" in text
+    finally:
+        REGISTRY.remove(counter)
+        REGISTRY.remove(histogram)
+
+def test_exited_threads_are_folded_into_the_total():
+    counter = Counter("test_thread_events_total", "Test events")
+    try:
+        # Like anyio's worker threads, which exit when idle and are replaced
+        for _ in range(50):
+            thread = threading.Thread(target=counter.labels().inc)
+            thread.start()
+            thread.join()
+            assert len(counter.labels()._shards._all) <= 1
+        assert "test_thread_events_total 50" in render()
+        assert counter.labels()._shards._all == []
+    finally:
+        REGISTRY.remove(counter)
+
+def test_health_check_is_cached():
+    calls = []
+    health = HealthCheck(lambda: calls.append(1), interval=60)
+    assert health.status() is True
+    assert health.status() is True
+    assert len(calls) == 1
+
+    def failing():
+        raise RuntimeError("database is locked")
+    health = HealthCheck(failing, interval=0)
+    assert health.status() is False
+    assert health.error == "database is locked"
+
+def test_metrics_endpoint(client):
+    client.get("/api/v1/devices/")
+    client.get("/api/v1/bookings/123")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/api/v1/devices/",status="200"}' in response.text
+    # Labelled with the route template, not the raw path
+    assert 'route="/api/v1/bookings/{booking_id}",status="401"' in response.text
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert "threadpool_threads" in response.text
+
+def test_running_totals_are_counters(client):
+    text = client.get("/metrics").text
+    for name in ("singleflight_calls_total", "admission_requests_total", "bulkhead_calls_total"):
+        assert f"# TYPE {name} counter" in text
+    for name in ("singleflight_in_flight", "admission", "bulkhead_threads"):
+        assert f"# TYPE {name} gauge" in text
+    # Levels and totals don't share a series any more
+    assert 'state="admitted"' not in text
+    assert 'state="completed"' not in text
+
+def test_registration_and_login_time_bcrypt(client, test_user_data):
+    def count(operation):
+        text = client.get("/metrics").text
+        prefix = f'password_hash_duration_seconds_count{{operation="{operation}"}} '
+        return next((float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix)), 0.0)
+
+    hashes, verifies = count("hash"), count("verify")
+    client.post("/api/v1/users/register", json=test_user_data)
+    client.post("/api/v1/auth/login", json={"email": test_user_data["email"], "password": test_user_data["password"]})
+    assert (count("hash"), count("verify")) == (hashes + 1, verifies + 1)
+
+def test_readiness_endpoint(client):
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
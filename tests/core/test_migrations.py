@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from app.core import migrations
+from app.core.config import settings
+from app.core.database import Base
+from app.core.migrations import ALEMBIC_INI, batched_backfill, include_name, upgrade_database
+
+BASELINE_SCHEMA = [
+    """
+    CREATE TABLE users (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        email VARCHAR NOT NULL,
+        password VARCHAR NOT NULL,
+        address VARCHAR,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE INDEX ix_users_id ON users (id)",
+    """
+    CREATE TABLE devices (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX ix_devices_id ON devices (id)",
+    """
+    CREATE TABLE bookings (
+        id INTEGER NOT NULL,
+        device_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        description VARCHAR NOT NULL,
+        time_slot DATETIME NOT NULL,
+        address VARCHAR NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        CONSTRAINT unique_device_time_slot UNIQUE (device_id, time_slot),
+        FOREIGN KEY(device_id) REFERENCES devices (id) ON DELETE CASCADE,
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX ix_bookings_id ON bookings (id)",
+]
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    yield engine
+    engine.dispose()
+
+def migrate(engine, revision):
+    config = Config(ALEMBIC_INI)
+    with engine.connect() as conn:
+        config.attributes["connection"] = conn
+        if revision == "base":
+            command.downgrade(config, revision)
+        else:
+            command.upgrade(config, revision)
+        conn.commit()
+
+def seed(engine, bookings):
+    start = datetime(2030, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, name, email, password) VALUES (1, 'A', 'a@example.com', 'x')"))
+        conn.execute(text("INSERT INTO devices (id, name) VALUES (1, 'Scope')"))
+        conn.execute(
+            text(
+                "INSERT INTO bookings (id, device_id, user_id, description, time_slot, address) "
+                "VALUES (:id, 1, 1, :description, :time_slot, 'Lab')"
+            ),
+            [
+                {"id": i, "description": f"run {i}", "time_slot": start + timedelta(hours=i)}
+                for i in range(1, bookings + 1)
+            ]
+        )
+
+def search(engine, query):
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT rowid FROM bookings_fts WHERE bookings_fts MATCH :query ORDER BY rowid"), {"query": query}
+        ).scalars().all()
+
+def indexes(engine):
+    return {index["name"] for index in inspect(engine).get_indexes("bookings")}
+
+def test_migrations_match_models(engine):
+    upgrade_database(engine)
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={"include_name": include_name})
+        assert compare_metadata(context, Base.metadata) == []
+
+    seed(engine, 3)
+    assert search(engine, "run") == [1, 2, 3]
+
+    migrate(engine, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+
+def test_baseline_database_is_stamped_and_upgraded(engine):
+    # What create_all made before any of the later models (the original app.db)
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.exec_driver_sql(statement)
+    seed(engine, 3)
+
+    upgrade_database(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0005"
+        context = MigrationContext.configure(conn, opts={"include_name": include_name})
+        assert compare_metadata(context, Base.metadata) == []
+        assert conn.execute(text("SELECT DISTINCT version FROM bookings")).scalars().all() == [1]
+        assert conn.execute(text("SELECT count(*) FROM idempotency_keys")).scalar() == 0
+    assert indexes(engine) == {"ix_bookings_user_id_time_slot"}
+    # Existing bookings were indexed for search
+    assert search(engine, "run") == [1, 2, 3]
+
+def test_create_all_database_is_stamped_and_upgraded(engine):
+    Base.metadata.create_all(engine)
+    seed(engine, 3)
+
+    upgrade_database(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0005"
+        context = MigrationContext.configure(conn, opts={"include_name": include_name})
+        assert compare_metadata(context, Base.metadata) == []
+    assert search(engine, "run") == [1, 2, 3]
+
+def test_large_table_is_rebuilt_by_copy_and_swap(engine, monkeypatch):
+    migrate(engine, "0001")
+    seed(engine, 50)
+    monkeypatch.setattr(settings, "MIGRATION_ONLINE_MIN_ROWS", 10)
+    monkeypatch.setattr(settings, "MIGRATION_BATCH_SIZE", 7)
+
+    # Other writers get the lock between batches; their writes must survive the swap
+    writes = iter([
+        "UPDATE bookings SET description = 'recalibrate' WHERE id = 40",
+        "DELETE FROM bookings WHERE id = 45",
+        "INSERT INTO bookings (id, device_id, user_id, description, time_slot, address) "
+        "VALUES (51, 1, 1, 'late booking', '2031-01-01 00:00:00', 'Lab')",
+    ])
+    batches = []
+
+    def concurrent_write(seconds):
+        batches.append(seconds)
+        statement = next(writes, None)
+        if statement is not None:
+            with engine.begin() as conn:
+                conn.execute(text(statement))
+    monkeypatch.setattr(migrations.time, "sleep", concurrent_write)
+
+    migrate(engine, "head")
+
+    assert len(batches) == 8
+    with engine.connect() as conn:
+        ids = conn.execute(text("SELECT id FROM bookings ORDER BY id")).scalars().all()
+        assert conn.execute(text("SELECT description FROM bookings WHERE id = 40")).scalar() == "recalibrate"
+    assert ids == [i for i in range(1, 52) if i != 45]
+    assert indexes(engine) == {"ix_bookings_user_id_time_slot"}
+    assert inspect(engine).get_table_names().count("bookings__new") == 0
+
+    # The full-text index covers the rebuilt table and its triggers fire
+    assert search(engine, "recalibrate") == [40]
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE bookings SET description = 'overnight' WHERE id = 2"))
+    assert search(engine, "overnight") == [2]
+
+def test_batched_backfill(engine, monkeypatch):
+    upgrade_database(engine)
+    seed(engine, 25)
+    monkeypatch.setattr(migrations.time, "sleep", lambda seconds: None)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        updated = batched_backfill(conn, "bookings", "address = 'Lab 2'", where="id % 2 = 0", batch_size=4)
+
+    assert updated == 12
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM bookings WHERE address = 'Lab 2'")).scalar() == 12
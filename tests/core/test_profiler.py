@@ -0,0 +1,69 @@
+import pytest
+import sniffio
+from app.core.config import settings
+from app.core.profiler import ProfileStore
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILER_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILER_INTERVAL_MS", 1.0)
+
+def test_profile_store_is_bounded(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=3)
+    ids = [store.save("GET", "/api/v1/devices/", f"main;handler {i}\n") for i in range(5)]
+
+    assert [profile["id"] for profile in store.list()] == ids[:1:-1]
+    assert store.read(ids[-1]) == "main;handler 4\n"
+    assert store.read(ids[0]) is None
+    assert store.read("../../etc/passwd") is None
+
+    # Files that don't follow the naming scheme are left alone
+    for name in ("notes.collapsed", "x-GET-root.collapsed", "README"):
+        (tmp_path / name).write_text("")
+    store.save("GET", "/health/live", "main\n")
+    assert len(store.list()) == 3
+    assert (tmp_path / "notes.collapsed").exists()
+
+def test_admin_header_profiles_request(client, test_user_data, auth_headers, profiler, monkeypatch):
+    response = client.get("/api/v1/devices/", headers={**auth_headers, "X-Profile": "1"})
+    # Only admins can ask for a profile
+    assert "x-profile-id" not in response.headers
+    assert client.get("/api/v1/admin/profiles", headers=auth_headers).status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user_data["email"]])
+    response = client.get("/api/v1/devices/", headers={**auth_headers, "X-Profile": "1"})
+    profile_id = response.headers["x-profile-id"]
+    assert "GET-api_v1_devices" in profile_id
+
+    profiles = client.get("/api/v1/admin/profiles", headers=auth_headers).json()
+    assert [profile["id"] for profile in profiles] == [profile_id]
+    response = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get("/api/v1/admin/profiles/missing", headers=auth_headers).status_code == 404
+
+def test_sample_rate_profiles_any_request(client, profiler, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_SAMPLE_RATE", 1.0)
+    assert "x-profile-id" in client.get("/api/v1/devices/").headers
+
+def test_profile_is_saved_off_the_event_loop(client, profiler, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_SAMPLE_RATE", 1.0)
+    save = ProfileStore.save
+    on_loop = []
+
+    def recording_save(self, *args):
+        try:
+            sniffio.current_async_library()
+            on_loop.append(True)
+        except sniffio.AsyncLibraryNotFoundError:
+            on_loop.append(False)
+        return save(self, *args)
+    monkeypatch.setattr(ProfileStore, "save", recording_save)
+    assert "x-profile-id" in client.get("/api/v1/devices/").headers
+    assert on_loop == [False]
+
+def test_disabled_profiler_does_nothing(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILER_SAMPLE_RATE", 1.0)
+    assert "x-profile-id" not in client.get("/api/v1/devices/").headers
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.query_stats import QueryBudgetExceeded, count_queries
+from app.models.device import Device
+from app.repositories.device_repository import DeviceRepository
+
+def test_count_queries(db_session):
+    db_session.add_all([Device(name=f"Device {i}") for i in range(3)])
+    db_session.commit()
+    repo = DeviceRepository(db_session)
+
+    with count_queries() as stats:
+        repo.get_all_device_records()
+    assert stats.count == 1
+    assert stats.duration > 0
+
+def test_count_queries_detects_n_plus_one(db_session):
+    db_session.add_all([Device(name=f"Device {i}") for i in range(5)])
+    db_session.commit()
+    repo = DeviceRepository(db_session)
+
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+        with count_queries(max_repeats=2):
+            for device in repo.get_all_device_records():
+                db_session.expire_all()
+                repo.get_device(device.id)
+
+def test_failed_statement_leaves_no_start_time(db_session):
+    db_session.add(Device(id=1, name="Device 1"))
+    db_session.commit()
+
+    with count_queries():
+        db_session.add(Device(id=1, name="Duplicate"))
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+    assert db_session.connection().info.get("query_stats_started") == []
+
+def test_server_timing_header(client):
+    response = client.get("/api/v1/devices/")
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+
+def test_request_over_budget_fails(client, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_STATS_MAX_QUERIES", 0)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/api/v1/devices/")
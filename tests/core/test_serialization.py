@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from app.core.serialization import FastJSONResponse, dumps, list_adapter, validate_list
+from app.schemas.device import DeviceResponse
+from app.schemas.booking import BookingResponse
+
+class Row:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+def test_list_adapter_is_cached():
+    assert list_adapter(DeviceResponse) is list_adapter(DeviceResponse)
+
+def test_validate_list_from_attributes():
+    devices = validate_list(DeviceResponse, [Row(id=1, name="Phone"), Row(id=2, name="Laptop")])
+    assert devices == [DeviceResponse(id=1, name="Phone"), DeviceResponse(id=2, name="Laptop")]
+
+def test_dumps_matches_standard_encoding():
+    now = datetime(2030, 1, 1, 9, 30, 15, 123456)
+    booking = BookingResponse(
+        id=1, device_id=2, user_id=3, description="Cracked screen", time_slot=now,
+        address="1 Road", created_at=now, updated_at=now, version=1
+    )
+    assert json.loads(dumps([booking])) == jsonable_encoder([booking])
+    assert json.loads(dumps(booking)) == jsonable_encoder(booking)
+    assert json.loads(dumps([])) == []
+    assert json.loads(dumps({"detail": "Not found"})) == {"detail": "Not found"}
+
+def test_fast_json_response():
+    response = FastJSONResponse([DeviceResponse(id=1, name="Phone")], status_code=201)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == [{"id": 1, "name": "Phone"}]
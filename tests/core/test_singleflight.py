@@ -0,0 +1,88 @@
+import threading
+import pytest
+from app.core.singleflight import SingleFlight
+
+def run_concurrently(group, key, fn, count):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(group.do(key, fn))) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight("test", max_waiters=10, timeout=5)
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return ["booking"]
+
+    threads, results = run_concurrently(group, 1, fn, 5)
+    while group._calls.get(1) is None or group._calls[1].waiters < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(result is results[0] for result in results)
+    assert group.stats()["coalesced"] == 4
+    assert group.stats()["in_flight"] == 0
+
+def test_sequential_calls_are_not_cached():
+    group = SingleFlight("test")
+    calls = []
+    group.do(1, lambda: calls.append(1))
+    group.do(1, lambda: calls.append(1))
+    assert len(calls) == 2
+
+def test_errors_are_shared_with_waiters():
+    group = SingleFlight("test", max_waiters=10, timeout=5)
+    release = threading.Event()
+    errors = []
+
+    def fn():
+        release.wait(5)
+        raise ValueError("boom")
+
+    def call():
+        try:
+            group.do(1, fn)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while group._calls.get(1) is None or group._calls[1].waiters < 2:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3
+
+def test_waiters_over_the_cap_run_their_own_call():
+    group = SingleFlight("test", max_waiters=0, timeout=5)
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+
+    threads, _ = run_concurrently(group, 1, fn, 1)
+    while group._calls.get(1) is None:
+        pass
+    group.do(1, lambda: calls.append(1))
+    release.set()
+    threads[0].join(5)
+    assert len(calls) == 2
+    assert group.stats()["overflowed"] == 1
+
+def test_disabled_group_passes_through():
+    group = SingleFlight("test", enabled=False)
+    assert group.do(1, lambda: 42) == 42
+    assert group.stats()["executed"] == 0
@@ -0,0 +1,134 @@
+import pytest
+from datetime import datetime, timedelta
+from app.core import slot_bitmap as slot_bitmap_module
+from app.core.config import settings
+from app.core.slot_bitmap import SlotBitmap
+from app.models.device import Device
+from app.models.user import User
+from app.repositories.booking_repository import BookingRepository
+from app.schemas.booking import BookingCreate
+
+def next_slot(hours=1):
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    return now + timedelta(hours=hours)
+
+@pytest.fixture
+def bitmap_path(tmp_path):
+    return str(tmp_path / "slots")
+
+@pytest.fixture
+def bitmap(bitmap_path):
+    bitmap = SlotBitmap(bitmap_path, slot_minutes=60, horizon_days=7, max_devices=16)
+    bitmap.attach(lambda start, end: [])
+    yield bitmap
+    bitmap.close()
+
+def test_mark_and_clear(bitmap):
+    slot = next_slot()
+    assert bitmap.is_booked(1, slot) is False
+
+    bitmap.mark(1, slot)
+    assert bitmap.is_booked(1, slot) is True
+    assert bitmap.is_booked(2, slot) is False
+
+    bitmap.clear(1, slot)
+    assert bitmap.is_booked(1, slot) is False
+
+def test_unknown_slots_fall_back(bitmap):
+    # Unaligned slots, slots past the horizon and unknown devices can't be answered
+    assert bitmap.is_booked(1, next_slot() + timedelta(minutes=30)) is None
+    assert bitmap.is_booked(1, next_slot(hours=24 * 30)) is None
+    assert bitmap.is_booked(99, next_slot()) is None
+
+def test_booked_slots(bitmap):
+    bitmap.mark(1, next_slot(1))
+    bitmap.mark(1, next_slot(3))
+    bitmap.mark(2, next_slot(2))
+
+    assert bitmap.booked_slots(1, next_slot(1), next_slot(4)) == [next_slot(1), next_slot(3)]
+    assert bitmap.booked_slots(1, next_slot(1), next_slot(3)) == [next_slot(1)]
+
+def test_followers_share_leader_bitmap(bitmap_path):
+    slot = next_slot()
+    leader = SlotBitmap(bitmap_path, slot_minutes=60, horizon_days=7, max_devices=16)
+    assert leader.attach(lambda start, end: [(3, slot)]) is True
+
+    # A second handle behaves like another worker: it doesn't rebuild
+    follower = SlotBitmap(bitmap_path, slot_minutes=60, horizon_days=7, max_devices=16)
+    assert follower.attach(lambda start, end: []) is False
+    assert follower.is_booked(3, slot) is True
+
+    follower.mark(4, slot)
+    assert leader.is_booked(4, slot) is True
+
+    follower.close()
+    leader.close()
+
+def test_repository_uses_bitmap(db_session, bitmap_path, monkeypatch):
+    monkeypatch.setattr(settings, "SLOT_BITMAP_ENABLED", True)
+    monkeypatch.setattr(settings, "SLOT_BITMAP_PATH", bitmap_path)
+    slot_bitmap_module.reset_slot_bitmap()
+    db_session.add(Device(id=1, name="Device 1"))
+    db_session.add(User(id=1, name="User 1", email="user1@example.com", password="hashed"))
+    db_session.commit()
+    try:
+        repo = BookingRepository(db_session)
+        slot = next_slot()
+        booking = repo.create_booking(
+            BookingCreate(device_id=1, description="Test booking", time_slot=slot, address="123 Test St"),
+            user_id=1
+        )
+        bitmap = slot_bitmap_module.get_slot_bitmap(db_session)
+        assert bitmap.is_booked(1, slot) is True
+        assert not repo.check_time_slot_availability(1, slot)
+
+        repo.delete_booking(booking.id)
+        assert bitmap.is_booked(1, slot) is False
+        assert repo.check_time_slot_availability(1, slot)
+    finally:
+        slot_bitmap_module.reset_slot_bitmap()
+
+def test_recovers_from_a_writer_that_died(bitmap_path):
+    slot = next_slot()
+    crashed = SlotBitmap(bitmap_path, slot_minutes=60, horizon_days=7, max_devices=16)
+    crashed.attach(lambda start, end: [(1, slot)])
+    # A writer that dies mid-write leaves the seq counter odd
+    crashed._writing().__enter__()
+    assert crashed._seq() & 1
+    # Readers give up instead of spinning and the caller falls back to the database
+    assert crashed.is_booked(1, slot) is None
+    assert crashed.booked_slots(1, slot, slot + timedelta(hours=1)) is None
+    crashed._thread_lock.release()
+    crashed.close()
+
+    leader = SlotBitmap(bitmap_path, slot_minutes=60, horizon_days=7, max_devices=16)
+    assert leader.attach(lambda start, end: [(1, slot)]) is True
+    assert leader._seq() % 2 == 0
+    assert leader.is_booked(1, slot) is True
+    leader.close()
+
+def test_horizon_rolls_over_with_the_day(bitmap_path, monkeypatch):
+    leader = SlotBitmap(bitmap_path, slot_minutes=60, horizon_days=7, max_devices=16)
+    follower = SlotBitmap(bitmap_path, slot_minutes=60, horizon_days=7, max_devices=16)
+    loaded = []
+
+    def loader(start, end):
+        loaded.append((start, end))
+        return [(1, start + timedelta(days=6, hours=23))]
+
+    leader.attach(loader)
+    follower.attach(loader)
+    today = leader.epoch_minutes
+    assert leader.roll(loader) is False
+
+    monkeypatch.setattr(slot_bitmap_module, "_today_minutes", lambda: today + 24 * 60)
+    assert follower.roll(loader) is True
+    assert leader.roll(loader) is False
+    # Only the new horizon is loaded, and every process sees the new epoch
+    start, end = loaded[-1]
+    assert (end - start, len(loaded)) == (timedelta(days=7), 2)
+    assert leader.epoch_minutes == today + 24 * 60
+    assert leader.is_booked(1, start + timedelta(days=6, hours=23)) is True
+    assert leader.is_booked(1, start - timedelta(hours=1)) is None
+    follower.close()
+    leader.close()
@@ -0,0 +1,56 @@
+import logging
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.database import Base
+from app.core.slow_query import SlowQueryLog, fingerprint, redact
+from app.models.device import Device
+from app.models.user import User
+from app.repositories.booking_repository import BookingRepository
+
+def test_fingerprint_ignores_literals_and_in_lists():
+    assert fingerprint("SELECT * FROM devices WHERE id IN (?, ?, ?)") == fingerprint("select * from devices where id in (?)")
+    assert fingerprint("SELECT * FROM users WHERE email = 'a@b.c' LIMIT 1") == fingerprint("SELECT * FROM users WHERE email = 'x' LIMIT 5")
+    assert fingerprint("SELECT * FROM users") != fingerprint("SELECT * FROM devices")
+
+def test_redact_hides_strings():
+    assert redact((1, "secret@example.com", None, datetime(2030, 1, 1))) == [
+        1, "<redacted str(18)>", None, "2030-01-01T00:00:00"
+    ]
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    Base.metadata.create_all(bind=engine)
+    SlowQueryLog().install(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Device(id=1, name="Device 1"))
+    session.add(User(id=1, name="User 1", email="user1@example.com", password="hashed"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+def test_slow_queries_logged_with_caller_and_plan(slow_log, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.core.slow_query"):
+        BookingRepository(slow_log).get_user_booking_records(1)
+        BookingRepository(slow_log).get_user_booking_records(1)
+
+    records = [r for r in caplog.records if "FROM bookings" in r.statement]
+    assert len(records) == 2
+    assert records[0].caller.startswith("BookingRepository.get_user_booking_records")
+    assert records[0].params == [1]
+    assert any("bookings" in line for line in records[0].plan)
+    # The plan is captured once per fingerprint
+    assert records[1].plan is None
+
+def test_failed_statement_leaves_no_start_time(slow_log):
+    slow_log.add(Device(id=1, name="Duplicate"))
+    with pytest.raises(IntegrityError):
+        slow_log.commit()
+    slow_log.rollback()
+    assert slow_log.connection().info.get("slow_query_started") == []
@@ -0,0 +1,78 @@
+import json
+import sqlite3
+import subprocess
+import sys
+import pytest
+from fastapi.testclient import TestClient
+from app.core import openapi
+from app.core.config import settings
+from app.main import create_app
+
+# Cold start of an autoscaled worker: importing app.main must stay cheap
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+# Imported by create_app, not by importing app.main (email-validator is
+# left out: fastapi.openapi.models imports it)
+DEFERRED_MODULES = ["passlib", "jose", "sqlalchemy", "app.api.endpoints", "app.core.database"]
+
+def test_import_time_budget():
+    script = f"import sys, app.main; print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+    # import time: self [us] | cumulative [us] | package
+    cumulative = {
+        line.split("|")[2].strip(): int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.split("|")[1].strip().isdigit()
+    }
+    assert cumulative["app.main"] / 1e6 < IMPORT_TIME_BUDGET_SECONDS
+
+def test_create_app_applies_settings(tmp_path, test_user_data):
+    database = tmp_path / "staging.db"
+    custom = settings.model_copy(update={
+        "PROJECT_NAME": "Bookings Staging",
+        "API_V1_STR": "/api/v2",
+        "DATABASE_URL": f"sqlite:///{database}",
+        "DATABASE_INIT_ON_STARTUP": True,
+        "OPENAPI_CACHE_PATH": None,
+        "QUERY_STATS_ENABLED": False,
+    })
+    app = create_app(custom)
+    assert app.state.settings is custom
+    with TestClient(app) as client:
+        schema = client.get("/api/v2/openapi.json").json()
+        assert client.get("/health/ready").json() == {"status": "ready"}
+        response = client.post("/api/v2/users/register", json=test_user_data)
+    assert schema["info"]["title"] == "Bookings Staging"
+    assert "/api/v2/devices/" in schema["paths"]
+    # Migrated and written to the app's own database, not the global one
+    assert response.status_code == 201
+    conn = sqlite3.connect(database)
+    try:
+        assert conn.execute("SELECT email FROM users").fetchall() == [(test_user_data["email"],)]
+    finally:
+        conn.close()
+    # Middlewares follow the app's settings
+    assert "server-timing" not in response.headers
+
+def test_openapi_schema_is_cached_on_disk(tmp_path, monkeypatch):
+    path = tmp_path / "openapi.json"
+    custom = settings.model_copy(update={"DATABASE_INIT_ON_STARTUP": False, "OPENAPI_CACHE_PATH": str(path)})
+    with TestClient(create_app(custom)) as client:
+        generated = client.get("/api/v1/openapi.json").json()
+    assert json.loads(path.read_text())["schema"] == generated
+
+    # Another worker serves the cached copy without generating it
+    def fail(**kwargs):
+        raise AssertionError("schema regenerated")
+    monkeypatch.setattr(openapi, "get_openapi", fail)
+    with TestClient(create_app(custom)) as client:
+        assert client.get("/api/v1/openapi.json").json() == generated
+
+    # A stale key (the code changed) regenerates it
+    monkeypatch.setattr(openapi, "source_key", lambda app: "changed")
+    with TestClient(create_app(custom)) as client, pytest.raises(AssertionError, match="regenerated"):
+        client.get("/api/v1/openapi.json")
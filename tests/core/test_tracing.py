@@ -0,0 +1,90 @@
+import json
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.core.config import settings
+from app.core.tracing import Trace, Span, get_trace_exporter, reset_trace_exporter, start_span, to_otlp, _current_span
+from app.repositories.device_repository import DeviceRepository
+from app.schemas.device import DeviceCreate
+
+@pytest.fixture
+def tracing(monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 1.0)
+    reset_trace_exporter()
+    yield
+    reset_trace_exporter()
+
+def test_spans_nest_across_layers(db_session):
+    root = Span(Trace(), "root", None, {})
+    token = _current_span.set(root)
+    try:
+        DeviceRepository(db_session).create_device(DeviceCreate(name="Traced"))
+        with start_span("bcrypt.verify"):
+            pass
+    finally:
+        _current_span.reset(token)
+
+    spans = {span.name: span for span in root.trace.spans}
+    assert spans["DeviceRepository.create_device"].parent_id == root.span_id
+    sql = [span for span in root.trace.spans if span.name == "sql"]
+    assert sql and all(span.parent_id == spans["DeviceRepository.create_device"].span_id for span in sql)
+    assert spans["bcrypt.verify"].parent_id == root.span_id
+
+def test_failed_statement_ends_its_span_with_an_error(db_session):
+    root = Span(Trace(), "root", None, {})
+    token = _current_span.set(root)
+    try:
+        with pytest.raises(OperationalError):
+            db_session.execute(text("SELECT * FROM no_such_table"))
+    finally:
+        _current_span.reset(token)
+    db_session.rollback()
+
+    assert db_session.connection().info.get("tracing_spans") == []
+    (sql,) = [span for span in root.trace.spans if span.name == "sql"]
+    assert sql.end_ns and sql.attributes["error"] == "OperationalError"
+    (exported,) = [span for span in to_otlp(root.trace)["resourceSpans"][0]["scopeSpans"][0]["spans"] if span["name"] == "sql"]
+    assert exported["status"]["code"] == 2
+
+def test_untraced_code_records_nothing(db_session):
+    assert _current_span.get() is None
+    with start_span("anything") as span:
+        assert span is None
+
+def test_requests_are_traced_and_exported(client, tracing, tmp_path, monkeypatch):
+    path = tmp_path / "traces.json"
+    monkeypatch.setattr(settings, "TRACING_FILE", str(path))
+    monkeypatch.setattr(settings, "TRACING_FORMAT", "chrome")
+    reset_trace_exporter()
+
+    client.post("/api/v1/devices/", json={"name": "Traced Device"})
+    traceparent = "00-" + "ab" * 16 + "-" + "cd" * 8 + "-01"
+    client.get("/api/v1/devices/", headers={"traceparent": traceparent})
+
+    create, listing = get_trace_exporter().traces
+    names = {span.name for span in create.spans}
+    assert {"POST /api/v1/devices/", "DeviceService.create_device", "DeviceRepository.create_device", "sql"} <= names
+    # An upstream sampled trace is continued
+    assert listing.trace_id == "ab" * 16
+
+    otlp = get_trace_exporter().render("otlp")
+    assert otlp[0]["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["traceId"] == create.trace_id
+
+    # The Chrome trace file's closing bracket is optional
+    events = json.loads(path.read_text().rstrip(",\n") + "]")
+    assert {"POST /api/v1/devices/", "GET /api/v1/devices/"} <= {event["name"] for event in events}
+
+def test_bcrypt_is_traced_at_registration_and_login(client, tracing, test_user_data):
+    client.post("/api/v1/users/register", json=test_user_data)
+    client.post("/api/v1/auth/login", json={"email": test_user_data["email"], "password": test_user_data["password"]})
+
+    register, login = get_trace_exporter().traces
+    spans = {span.name: span for span in register.spans}
+    assert spans["bcrypt.hash"].parent_id == spans["UserRepository.create_user"].span_id
+    assert "bcrypt.verify" in {span.name for span in login.spans}
+
+def test_unsampled_requests_are_not_traced(client, tracing, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 0.0)
+    client.get("/api/v1/devices/")
+    assert len(get_trace_exporter().traces) == 0
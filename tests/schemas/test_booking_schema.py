@@ -0,0 +1,16 @@
+import pytest
+from datetime import datetime, timedelta
+from pydantic import ValidationError
+from app.schemas.booking import BookingCreate, BookingResponse
+
+def test_booking_create_rejects_past_slot():
+    with pytest.raises(ValidationError):
+        BookingCreate(device_id=1, description="Repair", time_slot=datetime.now() - timedelta(hours=1), address="1 St")
+
+def test_booking_response_allows_past_slot():
+    past = datetime.now() - timedelta(days=1)
+    booking = BookingResponse(
+        id=1, user_id=1, device_id=1, description="Repair", time_slot=past, address="1 St",
+        created_at=past, updated_at=past, version=1
+    )
+    assert booking.time_slot == past
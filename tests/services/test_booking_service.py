@@ -1,14 +1,26 @@
 import pytest
 from datetime import datetime, timedelta
 from fastapi import HTTPException
+from sqlalchemy import event
 from app.services.booking_service import BookingService
 from app.schemas.booking import BookingCreate, BookingUpdate
 from app.models.device import Device
+from app.models.user import User
+from app.core.exceptions import PreconditionFailedError
 
 @pytest.fixture
 def booking_service(db_session):
     return BookingService(db_session)
 
+@pytest.fixture(autouse=True)
+def test_users(db_session):
+    # Bookings reference their users; foreign keys are enforced
+    db_session.add_all([
+        User(id=user_id, name=f"User {user_id}", email=f"user{user_id}@example.com", password="hashed")
+        for user_id in range(1, 6)
+    ])
+    db_session.commit()
+
 @pytest.fixture
 def test_device(db_session):
     device = Device(name="Test Device")
@@ -166,4 +178,51 @@ def test_delete_booking_unauthorized(booking_service, test_booking_data):
     # Try to delete as user 2
     with pytest.raises(ValueError) as exc_info:
         booking_service.delete_booking(booking.id, user_id=2)
-    assert "Not authorized" in str(exc_info.value) 
\ No newline at end of file
+    assert "Not authorized" in str(exc_info.value) 
+
+def test_update_booking_expected_version(booking_service, test_booking_data):
+    booking_create = BookingCreate(**test_booking_data)
+    booking = booking_service.create_booking(booking_create, user_id=1)
+
+    updated_booking = booking_service.update_booking(
+        booking.id, BookingUpdate(description="Updated description"), user_id=1, expected_version=booking.version
+    )
+    assert updated_booking.description == "Updated description"
+    assert updated_booking.version == booking.version + 1
+
+    # Stale version
+    with pytest.raises(PreconditionFailedError):
+        booking_service.update_booking(
+            booking.id, BookingUpdate(description="Stale"), user_id=1, expected_version=booking.version
+        )
+
+    # Wrong owner is still reported as such
+    with pytest.raises(ValueError) as exc_info:
+        booking_service.update_booking(
+            booking.id, BookingUpdate(description="Other"), user_id=2, expected_version=updated_booking.version
+        )
+    assert "Not authorized" in str(exc_info.value)
+
+def test_get_device_bookings_expand_uses_one_query_per_relationship(booking_service, test_booking_data, db_session):
+    for hours in range(5):
+        booking_service.create_booking(
+            BookingCreate(**{**test_booking_data, "time_slot": test_booking_data["time_slot"] + timedelta(hours=hours)}),
+            user_id=hours + 1
+        )
+
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        bookings = booking_service.get_device_bookings(
+            test_booking_data["device_id"], frozenset({"device", "user"})
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(bookings) == 5
+    assert all(booking.device.name == "Test Device" for booking in bookings)
+    # Bookings, devices and users: one query each whatever the page size
+    assert len(statements) == 3
@@ -0,0 +1,76 @@
+import io
+import sqlite3
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.core.config import settings
+from app.repositories.device_repository import DeviceRepository
+from app.services.device_import_service import DeviceImportService
+from app.services.device_service import DeviceService
+
+def test_import_csv_in_batches(db_session):
+    rows = "".join(f"Device {i}\n" for i in range(25))
+    result = DeviceImportService(db_session).import_devices(io.StringIO("name\n" + rows), "csv", batch_size=10)
+
+    assert (result.processed, result.imported, result.failed) == (25, 25, 0)
+    assert len(DeviceService(db_session).get_all_devices()) == 25
+
+def test_import_jsonl_upserts_by_id(db_session):
+    service = DeviceImportService(db_session)
+    service.import_devices(io.StringIO('{"id": 5, "name": "Old name"}\n'), "jsonl")
+
+    stream = io.StringIO('{"id": 5, "name": "New name"}\n\n{"name": "Other"}\n')
+    result = service.import_devices(stream, "jsonl")
+    assert result.imported == 2
+
+    devices = {d.id: d.name for d in DeviceService(db_session).get_all_devices()}
+    assert devices[5] == "New name"
+    assert sorted(devices.values()) == ["New name", "Other"]
+
+def test_import_reports_errors_by_line(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "DEVICE_IMPORT_MAX_ERRORS", 2)
+    stream = io.StringIO('{"name": "Good"}\nnot json\n[1]\n{"id": -1, "name": "Bad id"}\n{"name": ""}\n')
+    result = DeviceImportService(db_session).import_devices(stream, "jsonl")
+
+    assert (result.processed, result.imported, result.failed) == (5, 1, 4)
+    assert [error.line for error in result.errors] == [2, 3]
+
+def test_import_reports_rows_the_database_rejects(db_session):
+    db_session.execute(text(
+        "CREATE TRIGGER reject_device BEFORE INSERT ON devices WHEN new.name = 'Rejected' "
+        "BEGIN SELECT RAISE(ABORT, 'name not allowed'); END"
+    ))
+    db_session.commit()
+    stream = io.StringIO(f"id,name\n,Scope\n,Rejected\n,Meter\n{2 ** 64},Huge id\n,Probe\n")
+    result = DeviceImportService(db_session).import_devices(stream, "csv", batch_size=2)
+
+    assert (result.processed, result.imported, result.failed) == (5, 3, 2)
+    assert [(error.line, error.error) for error in result.errors] == [
+        (3, "Database error: name not allowed"), (5, "id: too large")
+    ]
+    assert result.aborted is None
+    assert sorted(d.name for d in DeviceService(db_session).get_all_devices()) == ["Meter", "Probe", "Scope"]
+
+def test_import_stops_cleanly_when_the_database_fails(db_session, monkeypatch):
+    upsert_devices = DeviceRepository.upsert_devices
+    calls = []
+
+    def locked_on_second_batch(self, devices):
+        calls.append(len(devices))
+        if len(calls) == 2:
+            raise OperationalError("INSERT INTO devices", {}, sqlite3.OperationalError("database is locked"))
+        return upsert_devices(self, devices)
+    monkeypatch.setattr(DeviceRepository, "upsert_devices", locked_on_second_batch)
+
+    rows = "".join(f"Device {i}\n" for i in range(10))
+    result = DeviceImportService(db_session).import_devices(io.StringIO("name\n" + rows), "csv", batch_size=3)
+
+    # The first batch stays written; the file isn't read past the failed batch
+    assert (result.processed, result.imported, result.failed) == (6, 3, 3)
+    assert [error.line for error in result.errors] == [5, 6, 7]
+    assert result.aborted == "Stopped at line 5: Database error: database is locked"
+    assert len(DeviceService(db_session).get_all_devices()) == 3
+
+def test_import_rejects_unknown_format(db_session):
+    with pytest.raises(ValueError):
+        DeviceImportService(db_session).import_devices(io.StringIO(""), "xml")
@@ -0,0 +1,173 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import Response
+from app.core.config import settings
+from app.models.device import Device
+from app.models.idempotency_key import IdempotencyKey
+from app.repositories.idempotency_repository import COMMITTED
+from app.services import idempotency_service
+from app.services.idempotency_service import IdempotencyService, _response_cache
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    _response_cache.clear()
+    yield
+    _response_cache.clear()
+
+def test_execute_runs_handler_once(db_session):
+    service = IdempotencyService(db_session)
+    calls = []
+
+    def handler():
+        calls.append(1)
+        return {"id": 1}
+
+    assert service.execute(1, "key", "fp", handler) == {"id": 1}
+    replay = service.execute(1, "key", "fp", handler)
+    assert isinstance(replay, Response)
+    assert replay.body == b'{"id":1}'
+    assert len(calls) == 1
+
+    # Keys are scoped per user
+    assert service.execute(2, "key", "fp", handler) == {"id": 1}
+    assert len(calls) == 2
+
+def test_execute_records_client_errors(db_session):
+    service = IdempotencyService(db_session)
+
+    def handler():
+        raise HTTPException(status_code=400, detail="Device not found")
+
+    with pytest.raises(HTTPException):
+        service.execute(1, "key", "fp", handler)
+    replay = service.execute(1, "key", "fp", lambda: {"id": 1})
+    assert replay.status_code == 400
+
+def test_execute_releases_key_on_unexpected_error(db_session):
+    service = IdempotencyService(db_session)
+
+    def handler():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        service.execute(1, "key", "fp", handler)
+    # A retry is free to run again
+    assert service.execute(1, "key", "fp", lambda: {"id": 1}) == {"id": 1}
+
+def test_execute_coalesces_concurrent_duplicates(db_session):
+    TestingSessionLocal = sessionmaker(bind=db_session.get_bind())
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = {}
+
+    def handler():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"id": 1}
+
+    def first():
+        session = TestingSessionLocal()
+        results["first"] = IdempotencyService(session).execute(1, "key", "fp", handler)
+        session.close()
+
+    def duplicate():
+        session = TestingSessionLocal()
+        results["duplicate"] = IdempotencyService(session).execute(1, "key", "fp", handler)
+        session.close()
+
+    first_thread = threading.Thread(target=first)
+    first_thread.start()
+    assert started.wait(5)
+    duplicate_thread = threading.Thread(target=duplicate)
+    duplicate_thread.start()
+    release.set()
+    first_thread.join(5)
+    duplicate_thread.join(5)
+
+    assert len(calls) == 1
+    assert results["first"] == {"id": 1}
+    assert isinstance(results["duplicate"], Response)
+
+def test_expired_keys_are_purged(db_session, monkeypatch):
+    expired = datetime.utcnow() - timedelta(seconds=1)
+    db_session.add_all([
+        IdempotencyKey(user_id=1, key=f"old-{i}", fingerprint="fp", status_code=201, response_body="{}",
+                       created_at=expired - timedelta(days=1), expires_at=expired - timedelta(minutes=3 - i))
+        for i in range(3)
+    ])
+    db_session.commit()
+    monkeypatch.setattr(settings, "IDEMPOTENCY_PURGE_BATCH_SIZE", 2)
+    monkeypatch.setattr(idempotency_service, "_next_purge", 0.0)
+    service = IdempotencyService(db_session)
+
+    service.execute(1, "new", "fp", lambda: {"id": 1})
+    assert {key for (key,) in db_session.query(IdempotencyKey.key)} == {"old-2", "new"}
+
+    # At most one purge per interval
+    service.execute(1, "newer", "fp", lambda: {"id": 2})
+    assert db_session.query(IdempotencyKey).filter_by(key="old-2").count() == 1
+    monkeypatch.setattr(idempotency_service, "_next_purge", 0.0)
+    service.execute(1, "newest", "fp", lambda: {"id": 3})
+    assert db_session.query(IdempotencyKey).filter_by(key="old-2").count() == 0
+
+def test_slow_attempt_is_not_taken_over(db_session, monkeypatch):
+    # Pending for longer than duplicates wait, but well within the pending TTL
+    now = datetime.utcnow()
+    db_session.add(IdempotencyKey(user_id=1, key="key", fingerprint="fp",
+                                  created_at=now - timedelta(seconds=30), expires_at=now + timedelta(days=1)))
+    db_session.commit()
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    calls = []
+
+    with pytest.raises(HTTPException) as raised:
+        IdempotencyService(db_session).execute(1, "key", "fp", lambda: calls.append(1))
+    assert raised.value.status_code == 409
+    assert calls == []
+
+def test_committed_work_is_not_repeated_when_recording_fails(db_session, monkeypatch):
+    service = IdempotencyService(db_session)
+    calls = []
+
+    def handler():
+        calls.append(1)
+        db_session.add(Device(name="Booked"))
+        db_session.commit()
+        return {"id": 1}
+
+    def fail(*args):
+        raise OperationalError("UPDATE idempotency_keys", {}, Exception("database is locked"))
+    monkeypatch.setattr(service.idempotency_repository, "complete", fail)
+    assert service.execute(1, "key", "fp", handler) == {"id": 1}
+    assert db_session.query(IdempotencyKey.status_code).scalar() == COMMITTED
+
+    # This process still replays the response
+    assert service.execute(1, "key", "fp", handler).body == b'{"id":1}'
+    # Another process can't, but doesn't run the handler again either
+    _response_cache.clear()
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    with pytest.raises(HTTPException, match="wasn't recorded"):
+        service.execute(1, "key", "fp", handler)
+    assert len(calls) == 1
+
+def test_error_after_commit_keeps_the_key(db_session):
+    service = IdempotencyService(db_session)
+
+    def handler():
+        db_session.add(Device(name="Booked"))
+        db_session.commit()
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        service.execute(1, "key", "fp", handler)
+    assert db_session.query(IdempotencyKey.status_code).scalar() == COMMITTED
+
+def test_overlong_key_is_rejected(db_session):
+    with pytest.raises(HTTPException) as raised:
+        IdempotencyService(db_session).execute(1, "k" * (settings.IDEMPOTENCY_KEY_MAX_LENGTH + 1), "fp", lambda: {})
+    assert raised.value.status_code == 400